@@ -1,227 +1,533 @@
 """
 ======================= NW DIAGNOSTIC UTILITY ==================================
-https://github.com/denisecase/nw-diagnostics/
+https://github.com/denisecase/nw-diagnostics-python/
 ================================================================================
 
 PURPOSE:
-- Generate detailed information about the Python virtual environment.
-- Help detect common setup issues before they become bigger problems.
-- Offer a standardized way to gather info across multiple projects.
+Generate diagnostic information about the local Python virtual environment 
+  and the third-party dependencies listed in requirements.txt.
 
 ORIGIN:
-This module is part of the NW Diagnostics hosted on GitHub. 
-It's a centralized tool designed to aid instructors and students in 
-  diagnosing and understanding their Python virtual environments.
-
-NOTES:
-This is a utility module. It's designed to be imported and its functions 
-  used in other scripts, rather than being executed directly.
-This module exclusively uses modules from the Python standard library, ensuring 
-  compatibility without additional installations.
+This is an instructor-generated script. You do not need to edit or understand 
+  the code in this file. 
 
 USAGE:
-Execute the function, which will display information 
-   in the terminal and save it to a designated file.
-If you encounter setup issues, refer to the outputs of this module 
-   for insights. The information can be shared to facilitate debugging.
+In the terminal, run the following command:  
 
-LOCALLY:
-Copy this repo's 00_check_env.py file to your local repository.
+python 00_check_env.py
+
+OUTPUT:
+See the new file named `00_report_env.txt` in your local repository.
+
+REQUIREMENTS:
+An active internet connection is required to fetch the diagnostic utility from 
+  the GitHub repository.
+
+CAUTION:
+This script fetches and executes Python code from a remote source using 
+  the `exec` function. While efforts have been made to ensure the security and 
+  integrity of the hosted code, always be cautious and aware of the potential 
+  risks associated with executing remote code. Ensure that the URL 
+  (https://github.com/denisecase/nw-diagnostics-python/) is trusted before running the script.
 
-================================================================================
-To learn more or contribute, see the repository and its documentation.
 ================================================================================
 """
-
 # Python Standard Library
-
-import datetime
-import logging
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import importlib.util
+import json
+import marshal
 import os
 import sys
+import threading
+import time
+import timeit
+import urllib.error
+import urllib.request
 
-# Setup logging
 
-OUTPUT_FILENAME = "00_report_env.txt"
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    handlers=[logging.FileHandler(OUTPUT_FILENAME, mode="w"), logging.StreamHandler()],
+# The web addresses (URLs) of the code
+URLS = [
+    "https://raw.githubusercontent.com/denisecase/nw-diagnostics-python/main/environment/nw_check_env.py",
+]
+
+# Seconds to wait for each remote code file before giving up
+FETCH_TIMEOUT_SECONDS = 30
+
+# Local cache of fetched code (set NW_DIAGNOSTICS_CACHE_DIR to move it)
+CACHE_DIR = os.environ.get(
+    "NW_DIAGNOSTICS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "nw-diagnostics"),
 )
+CACHE_TTL_SECONDS = 60 * 60  # Use cached code without asking the server for an hour
+CACHE_MAX_BYTES = 5 * 1024 * 1024  # Drop the oldest cached code beyond this size
+CACHE_LOCK_TIMEOUT_SECONDS = 10  # Wait this long for another launcher to finish with the index
+CACHE_LOCK_STALE_SECONDS = 60  # A lock file this old was left behind by a launcher that crashed
 
-# Declare additional program constants
+# Only one thread at a time may update the cache index. Other launchers,
+# possibly on other machines sharing the folder, are kept out by a lock file.
+cache_lock = threading.Lock()
+WATCH_INTERVAL_SECONDS = 0.5  # Time between polls in watch mode
 
-DIVIDER = "=" * 70  # A string divider for cleaner output formatting
-CREATE_COMMAND = "python -m venv .venv"
-ACTIVATE_COMMAND_WINDOWS = ".venv\\Scripts\\activate"
-ACTIVATE_COMMAND_MAC_LINUX = "source .venv/bin/activate"
-UPGRADE_COMMAND = "python -m pip install --upgrade pip"
-INSTALL_COMMAND = "python -m pip install"
-INSTALL_COMMAND_WITH_REQUIREMENTS_FILE = "python -m pip install -r requirements.txt"
+# List of output files generated by the remote code
+report_files = [
+    "00_report_env.txt",
+    "00_report_env.ndjson",
+]
 
-SUCCESS_MESSAGE = """
-All checks passed successfully! Your environment is set up correctly.
-If it asks you to upgrade pip, please do so using the suggested command.
-"""
 
-NO_REQUIREMENTS_FILE_MESSAGE = """
-WARNING: No requirements.txt file found.
-SOLUTION: Create a new requirements.txt file in the repo folder. 
-          In the file, list each external dependency on a separate line.
-"""
+def delete_report_files():
+    """
+    Delete the report files from the current directory.
+    """
+    for file in report_files:
+        try:
+            os.remove(file)
+        except FileNotFoundError:
+            pass
 
-MISSING_DEPENDENCY_MESSAGE = f"""
-SOLUTION: Add the missing dependency to requirements.txt and install by running: 
-{INSTALL_COMMAND_WITH_REQUIREMENTS_FILE}
-"""
 
+def get_cache_index_path():
+    """Returns the path to the index file that describes the cached code."""
+    return os.path.join(CACHE_DIR, "index.json")
 
-# Define program functions
 
+def get_cached_code_path(digest):
+    """
+    Returns the path where code with the given SHA-256 digest is stored.
 
-def get_activate_command():
-    """Returns the command to activate the virtual environment."""
-    if sys.platform == "win32":
-        return ACTIVATE_COMMAND_WINDOWS
-    else:
-        return ACTIVATE_COMMAND_MAC_LINUX
+    Files are named by their content, so URLs that serve the same code
+    share one file.
+    """
+    return os.path.join(CACHE_DIR, "code", digest + ".py")
 
 
-def check_for_dotvenv_folder():
-    """Checks if the .venv folder exists."""
-    if os.path.exists(".venv"):
-        return {"status": "success", "message": "YAY! .venv directory exists."}
-    else:
-        return {
-            "status": "error",
-            "message": f"ERROR: Missing .venv directory. Create it (may take a while) using: {CREATE_COMMAND}",
-        }
+@contextlib.contextmanager
+def locked_cache():
+    """
+    Holds the cache lock while the index is read, changed and written.
 
+    The lock file is created with O_EXCL, which is atomic on local disks
+    and on network folders, so only one launcher holds it at a time.
 
-def check_dotvenv_is_active():
-    """Checks if the .venv virtual environment is active."""
-    venv_path = os.environ.get("VIRTUAL_ENV")
-    if venv_path and ".venv" in venv_path:
-        return {
-            "status": "success",
-            "message": "YAY! The .venv virtual environment is active.",
-        }
-    else:
-        return {
-            "status": "error",
-            "message": f"ERROR: Activate the .venv virtual environment using: {get_activate_command()}",
+    Raises:
+    - OSError: If the lock could not be taken within CACHE_LOCK_TIMEOUT_SECONDS.
+    """
+    lock_path = get_cache_index_path() + ".lock"
+    with cache_lock:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        deadline = time.monotonic() + CACHE_LOCK_TIMEOUT_SECONDS
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > CACHE_LOCK_STALE_SECONDS:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue  # The other launcher just released it
+                if time.monotonic() > deadline:
+                    raise OSError(f"timed out waiting for {lock_path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+
+def get_cache_index_time():
+    """Returns when the cache index was last written, or 0 if there is none."""
+    try:
+        return os.path.getmtime(get_cache_index_path())
+    except OSError:
+        return 0
+
+
+def load_cache_index():
+    """
+    Loads the cache index.
+
+    Returns:
+    - dict: Cache entries keyed by URL, or an empty dict if there is no index.
+    """
+    try:
+        with open(get_cache_index_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache_index(index):
+    """Writes the cache index, replacing the old one in a single step."""
+    index_path = get_cache_index_path()
+    temp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(temp_path, index_path)
+
+
+def read_cached_code(entry):
+    """
+    Reads the cached code for a cache entry.
+
+    Returns:
+    - str: The cached code, or None if it is missing or does not match its digest.
+    """
+    try:
+        with open(get_cached_code_path(entry["sha256"]), "rb") as f:
+            body = f.read()
+    except (OSError, KeyError):
+        return None
+    if hashlib.sha256(body).hexdigest() != entry["sha256"]:
+        return None
+    return body.decode("utf-8")
+
+
+def remove_if_not_newer(path, index_time):
+    """
+    Deletes a cache file no entry refers to, unless it was written after
+    the index was loaded: then another launcher may have just written it
+    and not yet added its entry.
+    """
+    try:
+        if os.path.getmtime(path) <= index_time:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def evict_cache_entries(index, index_time):
+    """
+    Removes the least recently checked entries until the cached code fits
+    in CACHE_MAX_BYTES, then deletes code and bytecode files no entry
+    refers to.
+
+    Args:
+    - index (dict): The cache index. Updated in place.
+    - index_time (float): When the loaded index was written (see get_cache_index_time()).
+    """
+    sizes = {entry["sha256"]: entry["size"] for entry in index.values()}
+    by_age = sorted(index, key=lambda url: index[url]["checked_at"])
+    while by_age and sum(sizes.values()) > CACHE_MAX_BYTES:
+        evicted = index.pop(by_age.pop(0))
+        if all(entry["sha256"] != evicted["sha256"] for entry in index.values()):
+            sizes.pop(evicted["sha256"], None)
+
+    code_dir = os.path.dirname(get_cached_code_path(""))
+    for name in os.listdir(code_dir):
+        if name.endswith(".py") and name[:-3] not in sizes:
+            remove_if_not_newer(os.path.join(code_dir, name), index_time)
+
+    bytecode_dir = os.path.dirname(get_bytecode_path(""))
+    if os.path.isdir(bytecode_dir):
+        for name in os.listdir(bytecode_dir):
+            if name.split("-")[0] not in sizes:
+                remove_if_not_newer(os.path.join(bytecode_dir, name), index_time)
+
+
+def store_cached_code(url, body, headers):
+    """
+    Saves freshly fetched code and its validators (ETag and Last-Modified).
+
+    Args:
+    - url (str): The URL the code was fetched from.
+    - body (bytes): The fetched code.
+    - headers: The response headers.
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    code_path = get_cached_code_path(digest)
+    os.makedirs(os.path.dirname(code_path), exist_ok=True)
+
+    # The file and its index entry are written under one lock, so another
+    # thread's or launcher's eviction never sees the file without its entry.
+    with locked_cache():
+        if not os.path.exists(code_path):
+            temp_path = f"{code_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(body)
+            os.replace(temp_path, code_path)
+
+        index_time = get_cache_index_time()
+        index = load_cache_index()
+        index[url] = {
+            "sha256": digest,
+            "size": len(body),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "checked_at": time.time(),
         }
+        evict_cache_entries(index, index_time)
+        save_cache_index(index)
 
 
-def check_requirements_file_exists():
-    """Check if requirements.txt exists."""
-    if os.path.exists("requirements.txt"):
-        return {"status": "success", "message": "YAY! requirements.txt file exists."}
-    else:
-        return {"status": "error", "message": NO_REQUIREMENTS_FILE_MESSAGE}
+def touch_cached_code(url):
+    """Records that the cached code for the URL was just confirmed as current."""
+    with locked_cache():
+        index = load_cache_index()
+        if url in index:
+            index[url]["checked_at"] = time.time()
+            save_cache_index(index)
 
 
-def get_search_path_string():
-    paths = "\n".join(sys.path)
-    return f"""
-Python's package search paths:
-{"-" * 40}
-{paths}
-{"-" * 40}
-"""
+def fetch_code(url):
+    """
+    Fetches the code from the URL but doesn't execute it.
+
+    Code is kept in a local cache. Within CACHE_TTL_SECONDS the cached copy
+    is used as is. After that, the server is asked whether the code changed,
+    and an unchanged file costs a "304 Not Modified" reply with no body.
+    If the server cannot be reached, the last good copy is used.
+
+    Args:
+    - url (str): The URL to fetch the Python code from.
+
+    Returns:
+    - str: The fetched code as a string.
+    """
+    entry = load_cache_index().get(url)
+    cached_code = read_cached_code(entry) if entry else None
+    if cached_code is not None and time.time() - entry["checked_at"] < CACHE_TTL_SECONDS:
+        return cached_code
+
+    request = urllib.request.Request(url)
+    if cached_code is not None:
+        if entry.get("etag"):
+            request.add_header("If-None-Match", entry["etag"])
+        if entry.get("last_modified"):
+            request.add_header("If-Modified-Since", entry["last_modified"])
+
+    try:
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT_SECONDS) as response:
+            body = response.read()
+        try:
+            store_cached_code(url, body, response.headers)
+        except OSError as e:
+            print(f"WARNING: Could not cache code from {url}. Reason: {e}")
+        return body.decode("utf-8")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached_code is not None:
+            try:
+                touch_cached_code(url)
+            except OSError:
+                pass
+            return cached_code
+        reason = e
+    except Exception as e:
+        reason = e
+
+    if cached_code is not None:
+        print(f"WARNING: Failed to fetch code from {url}. Using cached copy. Reason: {reason}")
+        return cached_code
+    print(f"ERROR: Failed to fetch code from {url}. Reason: {reason}")
+    return None
+
+
+def fetch_all_code(urls):
+    """
+    Fetches the code from all URLs at the same time.
 
+    Each URL is fetched on its own thread, so the total wait is about
+    one round trip instead of one round trip per URL.
 
-def log_with_divider(message):
-    """Logs a message and the DIVIDER."""
-    logging.info(message)
-    logging.info(DIVIDER)
+    Args:
+    - urls (list): The URLs to fetch the Python code from.
 
+    Returns:
+    - dict: The fetched code (or None on failure) keyed by URL.
+    """
+    if not urls:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        return dict(zip(urls, executor.map(fetch_code, urls)))
 
-def read_dependencies():
-    """Read dependencies from requirements.txt and return a list of package names."""
-    if not check_requirements_file_exists():
-        return []
 
-    with open("requirements.txt", "r") as f:
-        # Use list comprehension to extract package names
-        return [line.split("==")[0].strip() for line in f.readlines()]
+def get_bytecode_path(code):
+    """
+    Returns the path where the compiled form of the code is stored.
 
+    The name combines the SHA-256 of the source with the interpreter's
+    bytecode magic number, so a Python upgrade never loads stale bytecode.
+    """
+    digest = hashlib.sha256(code.encode("utf-8")).hexdigest()
+    magic = importlib.util.MAGIC_NUMBER.hex()
+    return os.path.join(CACHE_DIR, "bytecode", f"{digest}-{magic}.bin")
+
+
+def compile_code(url, code):
+    """
+    Compiles the code, reusing the compiled code object from an earlier run
+    when the source is unchanged (like __pycache__ does for imports).
 
-def is_dependency_installed(dependency):
-    """Check if a given dependency is installed."""
+    Args:
+    - url (str): The URL the code comes from (shown in tracebacks).
+    - code (str): The Python source code.
+
+    Returns:
+    - code: A code object ready to pass to exec().
+    """
+    bytecode_path = get_bytecode_path(code)
     try:
-        __import__(dependency)
-        return True
-    except ImportError:
-        return False
-
-
-def check_dependencies_installed_in_dotvenv():
-    """Checks if dependencies are installed in the virtual environment."""
-    dependencies = read_dependencies()
-
-    # Use list comprehensions for results
-    return [
-        {
-            "status": "success" if is_dependency_installed(dep) else "error",
-            "message": (
-                f"YAY! {dep} is installed in the .venv.\n{DIVIDER}"
-                if is_dependency_installed(dep)
-                else f"ERROR: {dep} is not installed in .venv. {MISSING_DEPENDENCY_MESSAGE}"
-            ),
-        }
-        for dep in dependencies
-    ]
+        with open(bytecode_path, "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    code_object = compile(code, url, "exec")
+    try:
+        os.makedirs(os.path.dirname(bytecode_path), exist_ok=True)
+        temp_path = f"{bytecode_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            marshal.dump(code_object, f)
+        os.replace(temp_path, bytecode_path)
+    except OSError:
+        pass
+    return code_object
 
 
-def check_env(fn):
+def benchmark_compile_cache(urls, repeat=20):
     """
-    Generates and prints debug information about the current Python environment.
+    Prints how long it takes to get runnable code for each URL, compiling
+    from source (cold) versus loading the cached bytecode (warm).
 
     Args:
-    - fn (str): Path to the file for which the information should be generated.
+    - urls (list): The URLs of the code to time.
+    - repeat (int): Number of timing runs; the fastest run is reported.
     """
-    logging.info(DIVIDER)
-    logging.info("Welcome to NW Diagnostics!")
-    logging.info(
-        f"At: {datetime.date.today()} at {datetime.datetime.now().strftime('%I:%M %p')}"
-    )
+    fetched = fetch_all_code(urls)
+    for url in urls:
+        code = fetched[url]
+        if code is None:
+            continue
+        compile_code(url, code)  # Make sure the bytecode is cached
 
-    results = []
-    checks = [
-        check_for_dotvenv_folder,
-        check_dotvenv_is_active,
-        check_requirements_file_exists,
-        check_dependencies_installed_in_dotvenv,
-    ]
+        cold = min(timeit.repeat(lambda: compile(code, url, "exec"), number=1, repeat=repeat))
+        warm = min(timeit.repeat(lambda: compile_code(url, code), number=1, repeat=repeat))
+        print(url)
+        print(f"  cold (compile source): {cold * 1000:8.3f} ms")
+        print(f"  warm (load bytecode):  {warm * 1000:8.3f} ms  ({cold / warm:.1f}x faster)")
+
+
+def parse_launcher_args():
+    """
+    Reads the options for this launcher.
+
+    Options the launcher does not know are left in sys.argv so the
+    diagnostics can read them.
+    """
+    parser = argparse.ArgumentParser(description="Run the NW diagnostics.")
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="time compiling the diagnostics versus loading cached bytecode, then exit",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after the checks, keep watching and check again whenever something changes",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=WATCH_INTERVAL_SECONDS,
+        help="seconds between checks for changes in watch mode",
+    )
+    args, remaining = parser.parse_known_args()
+    sys.argv = sys.argv[:1] + remaining
+    return args
 
-    for check in checks:
-        result = check()
-        if isinstance(result, list):
-            for individual_result in result:
-                logging.info(individual_result["message"])
-            results.extend(result)
-            # Check if any individual check resulted in an error
-            if any(item["status"] == "error" for item in result):
-                break
-        else:
-            logging.info(result["message"])  # Log the message of each result
-            results.append(result)
-            logging.info(DIVIDER)  # Separate each result with a divider
-
-        # if result exists and the type is dict and the status is error, break
-        if result and isinstance(result, dict):
-            if result["status"] == "error":
-                break
 
-    return results
+def execute_diagnostic(url, function_name, fetched=None):
+    """
+    Executes and runs the diagnostic function from the given URL.
 
+    Args:
+    - url (str): The URL the Python code comes from.
+    - function_name (str): The name of the diagnostic function to call.
+    - fetched (dict): Code already fetched by fetch_all_code(). If None,
+      the code is fetched now.
 
-def run_diagnostic_env(namespace=None):
-    """Function to run the main diagnostic checks."""
-    if namespace:
-        check_env_func = namespace.get("check_env")
-        if callable(check_env_func):
-            check_env_func(__file__)
+    Returns:
+    - dict: The diagnostic's namespace if successful, None otherwise.
+    """
+    code = fetched.get(url) if fetched is not None else fetch_code(url)
+    if code is None:
+        return None
+
+    # Use one dictionary for globals and locals so the functions in the
+    # fetched code can see its imports and constants.
+    module_name = os.path.splitext(os.path.basename(url))[0]
+    namespace = {"__name__": module_name, "__file__": __file__}
+    exec(compile_code(url, code), namespace)
+    run_diagnostic = namespace.get(function_name)
+
+    if callable(run_diagnostic):
+        run_diagnostic()
+        return namespace
     else:
-        check_env(__file__)
+        print(f"ERROR: Failed to find {function_name} in {url}.")
+        return None
+
+
+def watch_diagnostics(namespaces, interval=WATCH_INTERVAL_SECONDS):
+    """
+    Polls the diagnostics that support watching and lets each one check
+    again when its inputs change, until interrupted with Ctrl+C.
+
+    A diagnostic supports watching if it has get_watch_snapshot(), which
+    cheaply describes its inputs, and rerun_changed_checks(old, new).
+
+    Args:
+    - namespaces (list): Namespaces returned by execute_diagnostic().
+    - interval (float): Seconds between polls.
+    """
+    watched = [
+        namespace
+        for namespace in namespaces
+        if callable(namespace.get("get_watch_snapshot")) and callable(namespace.get("rerun_changed_checks"))
+    ]
+    if not watched:
+        print("These diagnostics cannot watch for changes.")
+        return
+
+    snapshots = [namespace["get_watch_snapshot"]() for namespace in watched]
+    print("Watching for changes. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(interval)
+            for i, namespace in enumerate(watched):
+                snapshot = namespace["get_watch_snapshot"]()
+                if snapshot != snapshots[i]:
+                    namespace["rerun_changed_checks"](snapshots[i], snapshot)
+                    snapshots[i] = snapshot
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+# ---------------------------------------------------------------------------
+# If this is the script we are running, then call some functions and execute code!
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    args = parse_launcher_args()
+    if args.benchmark:
+        benchmark_compile_cache(URLS)
+        exit(0)
+
+    delete_report_files()
+    fetched = fetch_all_code(URLS)
+
+    namespaces = []
+    namespace = execute_diagnostic(URLS[0], "run_diagnostic_env", fetched)
+    if namespace is None:
+        exit(1)
+    namespaces.append(namespace)
+
+    if args.watch:
+        watch_diagnostics(namespaces, args.watch_interval)
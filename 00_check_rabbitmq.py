@@ -32,22 +32,54 @@ This script fetches and executes Python code from a remote source using
 ================================================================================
 """
 # Python Standard Library
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import importlib.util
+import json
+import marshal
 import os
+import sys
+import threading
+import time
+import timeit
+import urllib.error
 import urllib.request
 
 
 # List of web addresses (URLs) for remote code files
 URLS = [
     "https://raw.githubusercontent.com/denisecase/nw-diagnostics-python/main/environment/nw_check_env.py",
-        "https://raw.githubusercontent.com/denisecase/nw-diagnostics-python/main/external/nw_check_rabbitmq.py",
-
+    "https://raw.githubusercontent.com/denisecase/nw-diagnostics-python/main/external/nw_check_rabbitmq.py",
 ]
 
+# Seconds to wait for each remote code file before giving up
+FETCH_TIMEOUT_SECONDS = 30
+
+# Local cache of fetched code (set NW_DIAGNOSTICS_CACHE_DIR to move it)
+CACHE_DIR = os.environ.get(
+    "NW_DIAGNOSTICS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "nw-diagnostics"),
+)
+CACHE_TTL_SECONDS = 60 * 60  # Use cached code without asking the server for an hour
+CACHE_MAX_BYTES = 5 * 1024 * 1024  # Drop the oldest cached code beyond this size
+CACHE_LOCK_TIMEOUT_SECONDS = 10  # Wait this long for another launcher to finish with the index
+CACHE_LOCK_STALE_SECONDS = 60  # A lock file this old was left behind by a launcher that crashed
+
+# Only one thread at a time may update the cache index. Other launchers,
+# possibly on other machines sharing the folder, are kept out by a lock file.
+cache_lock = threading.Lock()
+WATCH_INTERVAL_SECONDS = 0.5  # Time between polls in watch mode
+
 # List of output files generated by the remote code
 report_files = [
     "00_report_core.txt",
+    "00_report_core.ndjson",
     "00_report_env.txt",
+    "00_report_env.ndjson",
     "00_report_rabbitmq.txt",
+    "00_report_rabbitmq.ndjson",
 ]
 
 def delete_report_files():
@@ -61,59 +93,448 @@ def delete_report_files():
             pass
 
 
+def get_cache_index_path():
+    """Returns the path to the index file that describes the cached code."""
+    return os.path.join(CACHE_DIR, "index.json")
+
+
+def get_cached_code_path(digest):
+    """
+    Returns the path where code with the given SHA-256 digest is stored.
+
+    Files are named by their content, so URLs that serve the same code
+    share one file.
+    """
+    return os.path.join(CACHE_DIR, "code", digest + ".py")
+
+
+@contextlib.contextmanager
+def locked_cache():
+    """
+    Holds the cache lock while the index is read, changed and written.
+
+    The lock file is created with O_EXCL, which is atomic on local disks
+    and on network folders, so only one launcher holds it at a time.
+
+    Raises:
+    - OSError: If the lock could not be taken within CACHE_LOCK_TIMEOUT_SECONDS.
+    """
+    lock_path = get_cache_index_path() + ".lock"
+    with cache_lock:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        deadline = time.monotonic() + CACHE_LOCK_TIMEOUT_SECONDS
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > CACHE_LOCK_STALE_SECONDS:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue  # The other launcher just released it
+                if time.monotonic() > deadline:
+                    raise OSError(f"timed out waiting for {lock_path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+
+def get_cache_index_time():
+    """Returns when the cache index was last written, or 0 if there is none."""
+    try:
+        return os.path.getmtime(get_cache_index_path())
+    except OSError:
+        return 0
+
+
+def load_cache_index():
+    """
+    Loads the cache index.
+
+    Returns:
+    - dict: Cache entries keyed by URL, or an empty dict if there is no index.
+    """
+    try:
+        with open(get_cache_index_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache_index(index):
+    """Writes the cache index, replacing the old one in a single step."""
+    index_path = get_cache_index_path()
+    temp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(temp_path, index_path)
+
+
+def read_cached_code(entry):
+    """
+    Reads the cached code for a cache entry.
+
+    Returns:
+    - str: The cached code, or None if it is missing or does not match its digest.
+    """
+    try:
+        with open(get_cached_code_path(entry["sha256"]), "rb") as f:
+            body = f.read()
+    except (OSError, KeyError):
+        return None
+    if hashlib.sha256(body).hexdigest() != entry["sha256"]:
+        return None
+    return body.decode("utf-8")
+
+
+def remove_if_not_newer(path, index_time):
+    """
+    Deletes a cache file no entry refers to, unless it was written after
+    the index was loaded: then another launcher may have just written it
+    and not yet added its entry.
+    """
+    try:
+        if os.path.getmtime(path) <= index_time:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def evict_cache_entries(index, index_time):
+    """
+    Removes the least recently checked entries until the cached code fits
+    in CACHE_MAX_BYTES, then deletes code and bytecode files no entry
+    refers to.
+
+    Args:
+    - index (dict): The cache index. Updated in place.
+    - index_time (float): When the loaded index was written (see get_cache_index_time()).
+    """
+    sizes = {entry["sha256"]: entry["size"] for entry in index.values()}
+    by_age = sorted(index, key=lambda url: index[url]["checked_at"])
+    while by_age and sum(sizes.values()) > CACHE_MAX_BYTES:
+        evicted = index.pop(by_age.pop(0))
+        if all(entry["sha256"] != evicted["sha256"] for entry in index.values()):
+            sizes.pop(evicted["sha256"], None)
+
+    code_dir = os.path.dirname(get_cached_code_path(""))
+    for name in os.listdir(code_dir):
+        if name.endswith(".py") and name[:-3] not in sizes:
+            remove_if_not_newer(os.path.join(code_dir, name), index_time)
+
+    bytecode_dir = os.path.dirname(get_bytecode_path(""))
+    if os.path.isdir(bytecode_dir):
+        for name in os.listdir(bytecode_dir):
+            if name.split("-")[0] not in sizes:
+                remove_if_not_newer(os.path.join(bytecode_dir, name), index_time)
+
+
+def store_cached_code(url, body, headers):
+    """
+    Saves freshly fetched code and its validators (ETag and Last-Modified).
+
+    Args:
+    - url (str): The URL the code was fetched from.
+    - body (bytes): The fetched code.
+    - headers: The response headers.
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    code_path = get_cached_code_path(digest)
+    os.makedirs(os.path.dirname(code_path), exist_ok=True)
+
+    # The file and its index entry are written under one lock, so another
+    # thread's or launcher's eviction never sees the file without its entry.
+    with locked_cache():
+        if not os.path.exists(code_path):
+            temp_path = f"{code_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(body)
+            os.replace(temp_path, code_path)
+
+        index_time = get_cache_index_time()
+        index = load_cache_index()
+        index[url] = {
+            "sha256": digest,
+            "size": len(body),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "checked_at": time.time(),
+        }
+        evict_cache_entries(index, index_time)
+        save_cache_index(index)
+
+
+def touch_cached_code(url):
+    """Records that the cached code for the URL was just confirmed as current."""
+    with locked_cache():
+        index = load_cache_index()
+        if url in index:
+            index[url]["checked_at"] = time.time()
+            save_cache_index(index)
+
+
 def fetch_code(url):
     """
     Fetches the code from the URL but doesn't execute it.
 
+    Code is kept in a local cache. Within CACHE_TTL_SECONDS the cached copy
+    is used as is. After that, the server is asked whether the code changed,
+    and an unchanged file costs a "304 Not Modified" reply with no body.
+    If the server cannot be reached, the last good copy is used.
+
     Args:
     - url (str): The URL to fetch the Python code from.
 
     Returns:
     - str: The fetched code as a string.
     """
+    entry = load_cache_index().get(url)
+    cached_code = read_cached_code(entry) if entry else None
+    if cached_code is not None and time.time() - entry["checked_at"] < CACHE_TTL_SECONDS:
+        return cached_code
+
+    request = urllib.request.Request(url)
+    if cached_code is not None:
+        if entry.get("etag"):
+            request.add_header("If-None-Match", entry["etag"])
+        if entry.get("last_modified"):
+            request.add_header("If-Modified-Since", entry["last_modified"])
+
     try:
-        with urllib.request.urlopen(url) as response:
-            return response.read().decode("utf-8")
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT_SECONDS) as response:
+            body = response.read()
+        try:
+            store_cached_code(url, body, response.headers)
+        except OSError as e:
+            print(f"WARNING: Could not cache code from {url}. Reason: {e}")
+        return body.decode("utf-8")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached_code is not None:
+            try:
+                touch_cached_code(url)
+            except OSError:
+                pass
+            return cached_code
+        reason = e
     except Exception as e:
-        print(f"ERROR: Failed to fetch code from {url}. Reason: {e}")
-        return None
+        reason = e
+
+    if cached_code is not None:
+        print(f"WARNING: Failed to fetch code from {url}. Using cached copy. Reason: {reason}")
+        return cached_code
+    print(f"ERROR: Failed to fetch code from {url}. Reason: {reason}")
+    return None
 
 
-def execute_diagnostic(url, function_name):
+def fetch_all_code(urls):
     """
-    Fetches, executes, and runs the diagnostic function from the given URL.
+    Fetches the code from all URLs at the same time.
+
+    Each URL is fetched on its own thread, so the total wait is about
+    one round trip instead of one round trip per URL.
 
     Args:
-    - url (str): The URL to fetch the Python code from.
+    - urls (list): The URLs to fetch the Python code from.
+
+    Returns:
+    - dict: The fetched code (or None on failure) keyed by URL.
+    """
+    if not urls:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        return dict(zip(urls, executor.map(fetch_code, urls)))
+
+
+def get_bytecode_path(code):
+    """
+    Returns the path where the compiled form of the code is stored.
+
+    The name combines the SHA-256 of the source with the interpreter's
+    bytecode magic number, so a Python upgrade never loads stale bytecode.
+    """
+    digest = hashlib.sha256(code.encode("utf-8")).hexdigest()
+    magic = importlib.util.MAGIC_NUMBER.hex()
+    return os.path.join(CACHE_DIR, "bytecode", f"{digest}-{magic}.bin")
+
+
+def compile_code(url, code):
+    """
+    Compiles the code, reusing the compiled code object from an earlier run
+    when the source is unchanged (like __pycache__ does for imports).
+
+    Args:
+    - url (str): The URL the code comes from (shown in tracebacks).
+    - code (str): The Python source code.
+
+    Returns:
+    - code: A code object ready to pass to exec().
+    """
+    bytecode_path = get_bytecode_path(code)
+    try:
+        with open(bytecode_path, "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    code_object = compile(code, url, "exec")
+    try:
+        os.makedirs(os.path.dirname(bytecode_path), exist_ok=True)
+        temp_path = f"{bytecode_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            marshal.dump(code_object, f)
+        os.replace(temp_path, bytecode_path)
+    except OSError:
+        pass
+    return code_object
+
+
+def benchmark_compile_cache(urls, repeat=20):
+    """
+    Prints how long it takes to get runnable code for each URL, compiling
+    from source (cold) versus loading the cached bytecode (warm).
+
+    Args:
+    - urls (list): The URLs of the code to time.
+    - repeat (int): Number of timing runs; the fastest run is reported.
+    """
+    fetched = fetch_all_code(urls)
+    for url in urls:
+        code = fetched[url]
+        if code is None:
+            continue
+        compile_code(url, code)  # Make sure the bytecode is cached
+
+        cold = min(timeit.repeat(lambda: compile(code, url, "exec"), number=1, repeat=repeat))
+        warm = min(timeit.repeat(lambda: compile_code(url, code), number=1, repeat=repeat))
+        print(url)
+        print(f"  cold (compile source): {cold * 1000:8.3f} ms")
+        print(f"  warm (load bytecode):  {warm * 1000:8.3f} ms  ({cold / warm:.1f}x faster)")
+
+
+def parse_launcher_args():
+    """
+    Reads the options for this launcher.
+
+    Options the launcher does not know are left in sys.argv so the
+    diagnostics can read them.
+    """
+    parser = argparse.ArgumentParser(description="Run the NW diagnostics.")
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="time compiling the diagnostics versus loading cached bytecode, then exit",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after the checks, keep watching and check again whenever something changes",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=WATCH_INTERVAL_SECONDS,
+        help="seconds between checks for changes in watch mode",
+    )
+    args, remaining = parser.parse_known_args()
+    sys.argv = sys.argv[:1] + remaining
+    return args
+
+
+def execute_diagnostic(url, function_name, fetched=None):
+    """
+    Executes and runs the diagnostic function from the given URL.
+
+    Args:
+    - url (str): The URL the Python code comes from.
     - function_name (str): The name of the diagnostic function to call.
+    - fetched (dict): Code already fetched by fetch_all_code(). If None,
+      the code is fetched now.
 
     Returns:
-    - bool: True if successful, False otherwise.
+    - dict: The diagnostic's namespace if successful, None otherwise.
     """
-    code = fetch_code(url)
+    code = fetched.get(url) if fetched is not None else fetch_code(url)
     if code is None:
-        return False
+        return None
 
-    namespace = {}
-    exec(code, {}, namespace)
+    # Use one dictionary for globals and locals so the functions in the
+    # fetched code can see its imports and constants.
+    module_name = os.path.splitext(os.path.basename(url))[0]
+    namespace = {"__name__": module_name, "__file__": __file__}
+    exec(compile_code(url, code), namespace)
     run_diagnostic = namespace.get(function_name)
 
     if callable(run_diagnostic):
         run_diagnostic()
-        return True
+        return namespace
     else:
         print(f"ERROR: Failed to find {function_name} in {url}.")
-        return False
+        return None
+
+
+def watch_diagnostics(namespaces, interval=WATCH_INTERVAL_SECONDS):
+    """
+    Polls the diagnostics that support watching and lets each one check
+    again when its inputs change, until interrupted with Ctrl+C.
+
+    A diagnostic supports watching if it has get_watch_snapshot(), which
+    cheaply describes its inputs, and rerun_changed_checks(old, new).
+
+    Args:
+    - namespaces (list): Namespaces returned by execute_diagnostic().
+    - interval (float): Seconds between polls.
+    """
+    watched = [
+        namespace
+        for namespace in namespaces
+        if callable(namespace.get("get_watch_snapshot")) and callable(namespace.get("rerun_changed_checks"))
+    ]
+    if not watched:
+        print("These diagnostics cannot watch for changes.")
+        return
+
+    snapshots = [namespace["get_watch_snapshot"]() for namespace in watched]
+    print("Watching for changes. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(interval)
+            for i, namespace in enumerate(watched):
+                snapshot = namespace["get_watch_snapshot"]()
+                if snapshot != snapshots[i]:
+                    namespace["rerun_changed_checks"](snapshots[i], snapshot)
+                    snapshots[i] = snapshot
+    except KeyboardInterrupt:
+        print("Stopped watching.")
 
 
 # ---------------------------------------------------------------------------
 # If this is the script we are running, then call some functions and execute code!
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
+    args = parse_launcher_args()
+    if args.benchmark:
+        benchmark_compile_cache(URLS)
+        exit(0)
+
     delete_report_files()
+    fetched = fetch_all_code(URLS)
 
-    if not execute_diagnostic(URLS[0], "run_diagnostic_env"):
+    namespaces = []
+    namespace = execute_diagnostic(URLS[0], "run_diagnostic_env", fetched)
+    if namespace is None:
         exit(1)
-
-    if not execute_diagnostic(URLS[1], "run_diagnostic_rabbitmq"):
+    namespaces.append(namespace)
+    namespace = execute_diagnostic(URLS[1], "run_diagnostic_rabbitmq", fetched)
+    if namespace is None:
         exit(1)
+    namespaces.append(namespace)
+
+    if args.watch:
+        watch_diagnostics(namespaces, args.watch_interval)
@@ -0,0 +1,461 @@
+"""
+======================= NW DIAGNOSTIC UTILITY ==================================
+https://github.com/denisecase/nw-diagnostics-python/
+================================================================================
+
+PURPOSE:
+Summarize the reports collected from many machines, e.g. every lab and CI
+  machine, in one place.
+
+ORIGIN:
+This is a maintainer script. Students do not need to run it.
+
+USAGE:
+Collect the `00_report_*.txt` and `00_report_*.ndjson` files into a folder,
+  one subfolder per machine, then run the following command:
+
+python aggregate_nw_reports.py path/to/reports
+
+The results are stored in `nw_reports.sqlite` (use -d to choose another file)
+  and a summary is printed: Python versions, missing dependencies per
+  requirement, and how often RabbitMQ was not installed or not running.
+Running it again only reads the reports that are new or changed, and
+  forgets reports that were deleted.
+
+NOTES:
+Reports are read in parallel by several processes. Each process reads its
+  files through memory maps and sends back only the parsed results, so
+  memory use stays about the same no matter how many reports there are.
+Text reports are read from the same layout the diagnostics write.
+  Structured (.ndjson) reports are used as they are. When a machine has
+  both for the same diagnostic, only the .ndjson report is summarized.
+The folder holding a report is taken to be the machine it came from.
+
+================================================================================
+"""
+# Python Standard Library
+import argparse
+import concurrent.futures
+import json
+import mmap
+import os
+import re
+import sqlite3
+import sys
+
+
+OUTPUT_FILENAME = "nw_reports.sqlite"
+REPORT_PATTERN = re.compile(r"^00_report_([a-z]+)\.(txt|ndjson)$")
+BATCH_SIZE = 256  # Reports parsed by a worker in one task
+WORKERS = os.cpu_count() or 1  # Worker processes
+SUMMARY_TOP = 20  # Rows shown in each summary
+
+# Header lines in the text reports: label -> fact name
+HEADER_LABELS = {
+    "At": "date_time",
+    "Operating System": "operating_system",
+    "System Architecture": "architecture",
+    "Number of CPUs": "cpu_count",
+    "Machine Type": "machine",
+    "Python Version": "python_version",
+    "Python Build Date and Compiler": "python_build",
+    "Python Implementation": "python_implementation",
+    "Active pip environment": "pip_environment",
+    "Path to Interpreter": "interpreter_path",
+    "Path to virtual environment": "virtual_environment_path",
+    "Current Working Directory": "working_directory",
+    "Path to source directory": "source_directory",
+    "Path to script file": "script_file",
+    "User's Home Directory": "home_directory",
+    "Terminal Environment": "terminal_environment",
+    "Terminal Type": "terminal_type",
+    "Git available in PATH": "git_in_path",
+}
+HEADER_PATTERN = re.compile(r"^ ?([A-Za-z' ]+?):\s+(.*?)\s*$")
+
+# Result lines in the text reports: (pattern, check name, status)
+CHECK_PATTERNS = [
+    (re.compile(r"^YAY! \.venv directory exists\."), "dotvenv_folder", "success"),
+    (re.compile(r"^ERROR: Missing \.venv directory\."), "dotvenv_folder", "error"),
+    (re.compile(r"^YAY! The \.venv virtual environment is active\."), "dotvenv_active", "success"),
+    (re.compile(r"^ERROR: Activate the \.venv virtual environment"), "dotvenv_active", "error"),
+    (re.compile(r"^YAY! requirements\.txt file exists\."), "requirements_file", "success"),
+    (re.compile(r"^WARNING: No requirements\.txt file found\."), "requirements_file", "error"),
+    (re.compile(r"^Yay! RabbitMQ is installed\."), "rabbitmq_installed", "success"),
+    (re.compile(r"^ERROR: RabbitMQ is NOT installed\."), "rabbitmq_installed", "error"),
+    (re.compile(r"^RabbitMQ is NOT running\."), "rabbitmq_running", "warning"),
+]
+
+# Dependency lines in the text env reports: (pattern, status)
+# Groups: name, installed version (optional), required versions (optional)
+DEPENDENCY_PATTERNS = [
+    (re.compile(r"^YAY! (\S+?)(?: (\S+))? is installed in the \.venv\.()"), "success"),
+    (re.compile(r"^ERROR: (\S+) is not installed in \.venv\.()()"), "error"),
+    (re.compile(r"^ERROR: (\S+) has the wrong version in \.venv: installed (\S+), need (.+?)\.(?:\s|$)"), "error"),
+    (re.compile(r"^WARNING: (\S+) is installed without package information.*?against (.+?)\.()$"), "warning"),
+    (re.compile(r"^SKIPPED: (\S+) is not needed here()()"), "skipped"),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    diagnostic TEXT NOT NULL,
+    format TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS facts (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS checks (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dependencies (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    installed TEXT,
+    required TEXT
+);
+CREATE INDEX IF NOT EXISTS reports_source_diagnostic ON reports(source, diagnostic, format);
+CREATE INDEX IF NOT EXISTS facts_name_value ON facts(name, value);
+CREATE INDEX IF NOT EXISTS facts_report ON facts(report_id);
+CREATE INDEX IF NOT EXISTS checks_name_status ON checks(name, status);
+CREATE INDEX IF NOT EXISTS checks_report ON checks(report_id);
+CREATE INDEX IF NOT EXISTS dependencies_name_status ON dependencies(name, status);
+CREATE INDEX IF NOT EXISTS dependencies_report ON dependencies(report_id);
+
+-- One report per machine and diagnostic: the .ndjson one when there is one
+CREATE VIEW IF NOT EXISTS summarized_reports AS
+SELECT * FROM reports r
+WHERE r.format = 'ndjson' OR NOT EXISTS (
+    SELECT 1 FROM reports n
+    WHERE n.source = r.source AND n.diagnostic = r.diagnostic AND n.format = 'ndjson'
+);
+"""
+
+
+def iter_report_paths(root_dir):
+    """
+    Walks a folder tree and yields every report file, without listing the
+    whole tree first.
+
+    Args:
+    - root_dir (str): The folder holding the reports.
+
+    Returns:
+    - iterator: (path, diagnostic, format, mtime, size) for each report.
+    """
+    folders = [root_dir]
+    while folders:
+        folder = folders.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                folders.append(entry.path)
+                continue
+            match = REPORT_PATTERN.match(entry.name)
+            if match and entry.is_file():
+                stat = entry.stat()
+                yield entry.path, match.group(1), match.group(2), stat.st_mtime, stat.st_size
+
+
+def iter_lines(path):
+    """
+    Yields the lines of a file, read through a memory map.
+
+    Returns:
+    - iterator: Each line as text, without the line ending.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # Empty files cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for line in iter(mapped.readline, b""):
+                yield line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+def parse_text_report(path):
+    """
+    Reads a text report.
+
+    Returns:
+    - dict: {"facts": [(name, value)], "checks": [(name, status)],
+      "dependencies": [(name, status, installed, required)]}
+    """
+    facts, checks, dependencies = [], [], []
+    installed = None
+    for line in iter_lines(path):
+        match = HEADER_PATTERN.match(line)
+        if match and match.group(1) in HEADER_LABELS:
+            facts.append((HEADER_LABELS[match.group(1)], match.group(2)))
+            continue
+        line = line.strip()
+        for pattern, status in DEPENDENCY_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                name, version, required = match.groups()
+                if status == "warning":
+                    version, required = None, version
+                dependencies.append((name, status, version or None, required or None))
+                break
+        else:
+            for pattern, name, status in CHECK_PATTERNS:
+                if pattern.match(line):
+                    checks.append((name, status))
+                    if name == "rabbitmq_installed":
+                        installed = status == "success"
+                    break
+
+    # A RabbitMQ report that is installed and has no warning found it running
+    if installed and not any(name == "rabbitmq_running" for name, _ in checks):
+        checks.append(("rabbitmq_running", "success"))
+    return {"facts": facts, "checks": checks, "dependencies": dependencies}
+
+
+def parse_ndjson_report(path):
+    """
+    Reads a structured report.
+
+    Returns:
+    - dict: Same as parse_text_report().
+    """
+    facts, checks, dependencies = [], [], []
+    for line in iter_lines(path):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # A partly written line, e.g. from an interrupted run
+        if not isinstance(record, dict):
+            continue
+        record_type = record.get("type")
+        value = record.get("value")
+        if record_type == "run" and isinstance(value, dict):
+            facts.extend((name, str(item)) for name, item in value.items())
+        elif record_type == "fact":
+            facts.append((record.get("name"), None if value is None else str(value)))
+        elif record_type == "check":
+            if isinstance(value, dict) and "required" in value:
+                dependencies.append(
+                    (value.get("name"), record.get("status"), value.get("installed"), value.get("required") or None)
+                )
+            else:
+                checks.append((record.get("name"), record.get("status")))
+    return {"facts": facts, "checks": checks, "dependencies": dependencies}
+
+
+def parse_reports(batch):
+    """
+    Reads a batch of reports. Runs in a worker process.
+
+    Args:
+    - batch (list): (path, diagnostic, format, mtime, size) for each report.
+
+    Returns:
+    - list: (report, parsed results or None, error or None) for each report.
+    """
+    parsed = []
+    for report in batch:
+        path, format = report[0], report[2]
+        try:
+            results = parse_ndjson_report(path) if format == "ndjson" else parse_text_report(path)
+            parsed.append((report, results, None))
+        except (OSError, ValueError) as e:
+            parsed.append((report, None, str(e)))
+    return parsed
+
+
+def connect(db_path):
+    """Opens the results database, creating its tables if needed."""
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def iter_batches(reports, size=BATCH_SIZE):
+    """Groups reports into lists of the given size."""
+    batch = []
+    for report in reports:
+        batch.append(report)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def store_results(connection, root_dir, parsed):
+    """
+    Saves a batch of parsed reports, replacing older results for the same files.
+
+    Returns:
+    - list: Error messages for reports that could not be read.
+    """
+    errors = []
+    with connection:
+        for (path, diagnostic, format, mtime, size), results, error in parsed:
+            if error:
+                errors.append(f"{path}: {error}")
+                continue
+            connection.execute("DELETE FROM reports WHERE path = ?", (path,))
+            source = os.path.relpath(os.path.dirname(path), root_dir)
+            report_id = connection.execute(
+                "INSERT INTO reports (path, source, diagnostic, format, mtime, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, source, diagnostic, format, mtime, size),
+            ).lastrowid
+            connection.executemany(
+                "INSERT INTO facts VALUES (?, ?, ?)",
+                ((report_id, name, value) for name, value in results["facts"]),
+            )
+            connection.executemany(
+                "INSERT INTO checks VALUES (?, ?, ?)",
+                ((report_id, name, status) for name, status in results["checks"]),
+            )
+            connection.executemany(
+                "INSERT INTO dependencies VALUES (?, ?, ?, ?, ?)",
+                ((report_id,) + dependency for dependency in results["dependencies"]),
+            )
+    return errors
+
+
+def aggregate_reports(root_dir, db_path=OUTPUT_FILENAME, workers=WORKERS):
+    """
+    Reads every new or changed report under a folder into the database,
+    and removes reports under the folder that no longer exist.
+
+    Args:
+    - root_dir (str): The folder holding the reports.
+    - db_path (str): The SQLite database to update.
+    - workers (int): Worker processes reading reports.
+
+    Returns:
+    - tuple: (reports read, reports unchanged, reports removed, list of errors)
+    """
+    root_dir = os.path.abspath(root_dir)
+    connection = connect(db_path)
+    known = {path: (mtime, size) for path, mtime, size in connection.execute("SELECT path, mtime, size FROM reports")}
+    missing = set(known)  # Reports not found on this run
+
+    read = unchanged = 0
+    errors = []
+
+    def iter_changed_reports():
+        nonlocal unchanged
+        for report in iter_report_paths(root_dir):
+            missing.discard(report[0])
+            if known.get(report[0]) == report[3:]:
+                unchanged += 1
+            else:
+                yield report
+
+    max_pending = workers * 2  # Batches in flight, so memory use stays bounded
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch in iter_batches(iter_changed_reports()):
+            pending.add(executor.submit(parse_reports, batch))
+            if len(pending) >= max_pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    parsed = future.result()
+                    read += len(parsed)
+                    errors.extend(store_results(connection, root_dir, parsed))
+        for future in concurrent.futures.as_completed(pending):
+            parsed = future.result()
+            read += len(parsed)
+            errors.extend(store_results(connection, root_dir, parsed))
+
+    # Only reports under this folder; the database may hold other folders too
+    removed = [(path,) for path in missing if path.startswith(os.path.join(root_dir, ""))]
+    with connection:
+        connection.executemany("DELETE FROM reports WHERE path = ?", removed)
+    connection.close()
+    return read, unchanged, len(removed), errors
+
+
+def get_summary(db_path=OUTPUT_FILENAME, top=SUMMARY_TOP):
+    """
+    Summarizes the stored results.
+
+    Returns:
+    - dict: Lists of rows for each summary, by title.
+    """
+    connection = connect(db_path)
+    queries = {
+        "Reports": (
+            "SELECT diagnostic, format, COUNT(*), COUNT(DISTINCT source) FROM reports "
+            "GROUP BY diagnostic, format ORDER BY diagnostic, format",
+            ("diagnostic", "format", "reports", "machines"),
+        ),
+        "Python versions": (
+            "SELECT f.value, COUNT(DISTINCT r.source) AS machines FROM facts f JOIN summarized_reports r ON r.id = f.report_id "
+            "WHERE f.name = 'python_version' GROUP BY f.value ORDER BY machines DESC LIMIT ?",
+            ("version", "machines"),
+        ),
+        "Missing or wrong dependencies": (
+            "SELECT d.name, COUNT(DISTINCT r.id), COUNT(DISTINCT r.source) AS machines FROM dependencies d "
+            "JOIN summarized_reports r ON r.id = d.report_id WHERE d.status = 'error' "
+            "GROUP BY d.name ORDER BY machines DESC LIMIT ?",
+            ("requirement", "reports", "machines"),
+        ),
+        "RabbitMQ problems": (
+            "SELECT c.name, c.status, COUNT(DISTINCT r.id), COUNT(DISTINCT r.source) AS machines FROM checks c "
+            "JOIN summarized_reports r ON r.id = c.report_id "
+            "WHERE c.name LIKE 'rabbitmq%' AND c.status NOT IN ('success', 'info', 'skipped') "
+            "GROUP BY c.name, c.status ORDER BY machines DESC LIMIT ?",
+            ("check", "status", "reports", "machines"),
+        ),
+    }
+    summary = {}
+    for title, (query, columns) in queries.items():
+        parameters = (top,) if "?" in query else ()
+        summary[title] = (columns, connection.execute(query, parameters).fetchall())
+    connection.close()
+    return summary
+
+
+def get_summary_text(summary):
+    """Formats the summary as aligned text tables."""
+    lines = []
+    for title, (columns, rows) in summary.items():
+        lines.append(f"\n{title}:")
+        if not rows:
+            lines.append("  (none)")
+            continue
+        table = [columns] + [tuple("" if item is None else str(item) for item in row) for row in rows]
+        widths = [max(len(row[i]) for row in table) for i in range(len(columns))]
+        for row in table:
+            lines.append("  " + "  ".join(item.ljust(width) for item, width in zip(row, widths)).rstrip())
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# If this is the script we are running, then call some functions and execute code!
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize NW diagnostics reports from many machines.")
+    parser.add_argument("reports_dir", help="folder holding the reports, one subfolder per machine")
+    parser.add_argument("-d", "--database", default=OUTPUT_FILENAME, help="SQLite file to store the results")
+    parser.add_argument("-j", "--workers", type=int, default=WORKERS, help="worker processes")
+    parser.add_argument("--top", type=int, default=SUMMARY_TOP, help="rows shown in each summary")
+    args = parser.parse_args()
+    if not os.path.isdir(args.reports_dir):
+        parser.error(f"not a folder: {args.reports_dir}")
+
+    read, unchanged, removed, errors = aggregate_reports(args.reports_dir, args.database, args.workers)
+    print(f"Read {read - len(errors)} reports ({unchanged} unchanged, {removed} removed) into {args.database}.")
+    for error in errors:
+        print(f"Could not read {error}", file=sys.stderr)
+    print(get_summary_text(get_summary(args.database, args.top)))
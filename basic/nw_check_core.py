@@ -35,33 +35,83 @@ To learn more or contribute, see the repository and its documentation.
 
 # Python Standard Library
 
+import argparse
+import atexit
 import datetime
+import functools
+import hashlib
+import json
 import logging
+import logging.handlers
 import os
 import platform
-import shutil
+import queue
 import sys
+import time
 
 # Setup logging
+#
+# Every NW diagnostic run in the same process shares one background
+# thread that writes the reports, so checks only put lines on a queue.
+# Each diagnostic has its own logger and its own buffered report file.
 
 OUTPUT_FILENAME = "00_report_core.txt"
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    handlers=[logging.FileHandler(OUTPUT_FILENAME, mode="w"), logging.StreamHandler()],
-)
+REPORT_LOGGER_NAME = "nw_diagnostics"
+REPORT_BUFFER_RECORDS = 100  # Report lines held in memory before writing
 
-# Declare additional program constants
+logger = logging.getLogger(f"{REPORT_LOGGER_NAME}.core")
 
-DIVIDER = "=" * 70  # A string divider for cleaner output formatting
 
-# Retrieve additional system information using platform and os modules
+def get_report_listener():
+    """
+    Returns the report writer thread shared by all diagnostics in this
+    process, starting it on first use.
+    """
+    parent = logging.getLogger(REPORT_LOGGER_NAME)
+    listener = getattr(parent, "report_listener", None)
+    if listener is None:
+        report_queue = queue.SimpleQueue()
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter("%(message)s"))
+        listener = logging.handlers.QueueListener(report_queue, console_handler, respect_handler_level=True)
+        parent.addHandler(logging.handlers.QueueHandler(report_queue))
+        parent.setLevel(logging.INFO)
+        parent.propagate = False
+        listener.start()
+        atexit.register(close_report_listener, listener)
+        parent.report_listener = listener
+    return listener
+
+
+def close_report_listener(listener):
+    """Writes any queued and buffered report lines, then closes the report files."""
+    listener.stop()
+    for handler in listener.handlers:
+        target = getattr(handler, "target", None)
+        handler.close()
+        if target is not None:
+            target.close()
+
+
+def setup_report_sink():
+    """Starts this diagnostic's report file. Does nothing if it was already started."""
+    if getattr(logger, "report_sink", None) is not None:
+        return
+    listener = get_report_listener()
+    file_handler = logging.FileHandler(OUTPUT_FILENAME, mode="w")
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    report_sink = logging.handlers.MemoryHandler(
+        REPORT_BUFFER_RECORDS, flushLevel=logging.ERROR, target=file_handler
+    )
+    report_sink.addFilter(logging.Filter(logger.name))  # Only this diagnostic's lines
+    listener.handlers = listener.handlers + (report_sink,)
+    logger.report_sink = report_sink
 
-build_date, compiler = platform.python_build()
-implementation = platform.python_implementation()
-architecture = platform.architecture()[0]
-user_home = os.path.expanduser("~")
 
+# Declare additional program constants
+
+DIVIDER = "=" * 70  # A string divider for cleaner output formatting
+SHADOWED_COMMANDS = ["python", "python3", "pip", "pip3", "git"]  # Reported when found more than once on PATH
 
 # Define program functions
 
@@ -108,65 +158,532 @@ def is_git_in_path():
     Returns:
     - bool: True if git is in the PATH, otherwise False.
     """
-    return shutil.which("git") is not None
+    return find_executable("git") is not None
+
+
+# PATH index
+#
+# Tools are looked up in an index of every file on PATH, built with one
+# os.scandir() pass per PATH folder the first time a tool is looked up.
+# Each lookup is then a dictionary access instead of another walk of PATH,
+# which is slow with long PATHs on network or Windows-mounted folders.
+
+
+def get_executable_extensions():
+    """
+    Returns the file extensions that make a file runnable on Windows, in
+    the order they are tried, or None on other systems.
+    """
+    if os.name != "nt":
+        return None
+    pathext = os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD")
+    return [extension.lower() for extension in pathext.split(os.pathsep) if extension]
+
+
+@functools.lru_cache(maxsize=None)
+def get_path_index():
+    """
+    Lists the files in every PATH folder, once per run.
+
+    On Windows, only files with a PATHEXT extension are kept, under both
+    their full name ("git.exe") and the command name ("git"). Names are
+    lower case there, as lookups are not case sensitive.
+
+    Returns:
+    - dict: Command name -> list of paths, in the order they are found on PATH.
+    """
+    extensions = get_executable_extensions()
+    index = {}
+    folders_seen = set()
+    for folder in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        folder = folder.strip('"')  # Windows allows quoted PATH entries
+        if not folder:
+            continue
+        folder_key = os.path.normcase(os.path.abspath(folder))
+        if folder_key in folders_seen:
+            continue  # The same folder listed twice on PATH
+        folders_seen.add(folder_key)
+        try:
+            with os.scandir(folder) as entries:
+                names = [entry.name for entry in entries]
+        except OSError:
+            continue  # Missing or unreadable folder
+
+        if extensions is None:
+            for name in names:
+                index.setdefault(name, []).append(os.path.join(folder, name))
+            continue
+        found = []
+        for name in names:
+            stem, extension = os.path.splitext(name.lower())
+            if extension in extensions:
+                found.append((extensions.index(extension), stem, name))
+        for rank, stem, name in sorted(found):  # git.com runs before git.exe
+            path = os.path.join(folder, name)
+            index.setdefault(name.lower(), []).append(path)
+            index.setdefault(stem, []).append(path)
+    return index
+
+
+def is_executable_file(path):
+    """Returns True if path is a file this user can run."""
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def find_executable(command):
+    """
+    Finds the file that runs for a command, like shutil.which().
+
+    Args:
+    - command (str): The command name, e.g. "git".
+
+    Returns:
+    - str: The full path, or None if the command is not on PATH.
+    """
+    key = command.lower() if os.name == "nt" else command
+    for path in get_path_index().get(key, []):
+        if is_executable_file(path):
+            return path
+    return None
+
+
+def get_executable_paths(command):
+    """
+    Lists every copy of a command on PATH. The first one is the one that
+    runs; the others are shadowed by it. Links to the same file count once.
+
+    Args:
+    - command (str): The command name, e.g. "python3".
+
+    Returns:
+    - list: Full paths, in PATH order.
+    """
+    key = command.lower() if os.name == "nt" else command
+    paths = []
+    real_paths = set()
+    for path in get_path_index().get(key, []):
+        if not is_executable_file(path):
+            continue
+        real_path = os.path.normcase(os.path.realpath(path))
+        if real_path not in real_paths:
+            real_paths.add(real_path)
+            paths.append(path)
+    return paths
+
+
+def get_shadowed_commands(commands=SHADOWED_COMMANDS):
+    """
+    Finds commands with more than one copy on PATH, e.g. two python3.
+
+    Returns:
+    - dict: Command -> list of paths, in PATH order, for each shadowed command.
+    """
+    shadowed = {}
+    for command in commands:
+        paths = get_executable_paths(command)
+        if len(paths) > 1:
+            shadowed[command] = paths
+    return shadowed
+
+
+# System facts
+#
+# Facts about the machine and Python are looked up the first time they are
+# read and then kept, so importing this module does no work and each fact
+# costs at most one lookup per run, however many places show it.
+
+
+def get_shadowed_commands_text():
+    """Returns the shadowed commands as one line, or "None"."""
+    shadowed = get_shadowed_commands()
+    if not shadowed:
+        return "None"
+    return "; ".join(f"{command} ({', '.join(paths)})" for command, paths in shadowed.items())
+
+
+SYSTEM_FACT_LOOKUPS = {
+    "operating_system": lambda: f"{os.name} {platform.system()} {platform.release()}",
+    "architecture": lambda: platform.architecture()[0],
+    "cpu_count": lambda: os.cpu_count(),
+    "machine": lambda: platform.machine(),
+    "python_version": lambda: platform.python_version(),
+    "python_build": lambda: " with ".join(platform.python_build()),
+    "python_implementation": lambda: platform.python_implementation(),
+    "source_directory": lambda: get_source_directory_path(),
+    "home_directory": lambda: os.path.expanduser("~"),
+    "terminal": lambda: get_terminal_info(),  # (environment, shell)
+    "git_in_path": lambda: is_git_in_path(),
+    "shadowed_commands": lambda: get_shadowed_commands_text(),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_system_fact(name):
+    """Looks up one system fact, e.g. "python_version", the first time it is asked for."""
+    return SYSTEM_FACT_LOOKUPS[name]()
+
+
+class SystemFacts:
+    """
+    Facts about this machine and Python, each computed on first access.
+
+    The class body must not use module-level names: older launchers exec
+    this file with separate globals and locals, and a class body cannot
+    see the locals.
+    """
+
+    def __getattr__(self, name):
+        if name not in SYSTEM_FACT_LOOKUPS:
+            raise AttributeError(name)
+        return get_system_fact(name)
+
+
+system_facts = SystemFacts()
+
+
+# Structured report
+#
+# Alongside the text report, each diagnostic writes one JSON record per
+# line (NDJSON), so other tools can read the results without parsing text.
+
+RECORDS_FILENAME = "00_report_core.ndjson"
+RECORD_SCHEMA = "nw-diagnostics/report"
+RECORD_VERSION = 1
+
+record_encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+record_stream = None
+record_counts = {}  # Records written so far, by status
+
+
+def open_record_stream():
+    """Starts this diagnostic's NDJSON report with a record describing the run."""
+    global record_stream
+    close_record_stream()
+    record_counts.clear()
+    record_stream = open(RECORDS_FILENAME, "w", encoding="utf-8")
+    atexit.unregister(close_record_stream)
+    atexit.register(close_record_stream)
+    emit_record(
+        "run",
+        "started",
+        "info",
+        value={
+            "python_version": system_facts.python_version,
+            "executable": sys.executable,
+            "platform": sys.platform,
+            "working_directory": os.getcwd(),
+        },
+    )
 
 
-def get_header(fn):
+def emit_record(record_type, name, status, value=None, message=None, duration_ms=None):
+    """
+    Writes one record to the NDJSON report, if it was started.
+
+    Args:
+    - record_type (str): "run", "fact", "check" or "summary".
+    - name (str): What the record is about, e.g. "python_version".
+    - status (str): "success", "warning", "error", "skipped" or "info".
+    - value: Any JSON-friendly data.
+    - message (str): The text shown in the text report, if any.
+    - duration_ms (float): How long it took to get the value.
+    """
+    if record_stream is None:
+        return
+    record = {
+        "schema": RECORD_SCHEMA,
+        "version": RECORD_VERSION,
+        "diagnostic": "core",
+        "type": record_type,
+        "name": name,
+        "status": status,
+        "value": value,
+        "message": message,
+        "duration_ms": duration_ms,
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+    for chunk in record_encoder.iterencode(record):
+        record_stream.write(chunk)
+    record_stream.write("\n")
+    record_counts[status] = record_counts.get(status, 0) + 1
+
+
+def close_record_stream():
+    """Finishes the NDJSON report with a summary record counting each status."""
+    global record_stream
+    if record_stream is not None:
+        emit_record("summary", "finished", "info", value=dict(record_counts))
+        record_stream.close()
+        record_stream = None
+
+
+# Baseline snapshots
+#
+# A baseline saves the current state in named sections, each with a hash
+# of its contents. Comparing hashes the current sections the same way and
+# only looks inside the sections whose hashes differ, so a check with
+# nothing changed costs little more than gathering the state.
+
+BASELINE_FILENAME = "00_baseline_core.json"
+BASELINE_SCHEMA = "nw-diagnostics/baseline"
+BASELINE_VERSION = 1
+
+
+def get_section_hash(data):
+    """Returns a hash of a section's contents that does not depend on key order."""
+    text = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def save_baseline(sections, passed, path=BASELINE_FILENAME):
+    """
+    Saves the sections as the baseline to compare against later.
+
+    Args:
+    - sections (dict): Section name -> JSON-friendly data.
+    - passed (bool): Whether every check passed when the baseline was saved.
+    - path (str): The baseline file.
+
+    Returns:
+    - dict: {"status", "message"}
+    """
+    baseline = {
+        "schema": BASELINE_SCHEMA,
+        "version": BASELINE_VERSION,
+        "saved_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "passed": passed,
+        "sections": {
+            name: {"hash": get_section_hash(data), "data": data} for name, data in sections.items()
+        },
+    }
+    try:
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=1, default=str)
+        os.replace(temp_path, path)
+    except OSError as e:
+        return {"status": "error", "message": f"ERROR: Could not save the baseline to {path}: {e}"}
+    return {"status": "success", "message": f"Saved the baseline to {path} ({len(sections)} sections)."}
+
+
+def diff_section(old, new):
+    """
+    Lists what changed between two versions of a section's data.
+
+    Returns:
+    - list: One line of text per change.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = [f"added {key}: {new[key]}" for key in new if key not in old]
+        changes += [f"removed {key}: {old[key]}" for key in old if key not in new]
+        changes += [f"changed {key}: {old[key]} -> {new[key]}" for key in new if key in old and old[key] != new[key]]
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        old_items, new_items = set(map(str, old)), set(map(str, new))
+        changes = [f"added {item}" for item in map(str, new) if item not in old_items]
+        changes += [f"removed {item}" for item in map(str, old) if item not in new_items]
+        return changes or ["order changed"]
+    return [f"changed: {old} -> {new}"]
+
+
+def compare_baseline(sections, path=BASELINE_FILENAME):
+    """
+    Compares the sections with the saved baseline.
+
+    Args:
+    - sections (dict): Section name -> JSON-friendly data, as for save_baseline().
+    - path (str): The baseline file.
+
+    Returns:
+    - list: {"status", "message", "section", "changes"} for each section that
+      changed, or one result saying nothing changed.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return [
+            {
+                "status": "warning",
+                "message": f"WARNING: No baseline found in {path}. Save one with --save-baseline.",
+                "section": None,
+                "changes": [],
+            }
+        ]
+
+    saved = baseline.get("sections", {})
+    saved_at = baseline.get("saved_at", "an unknown time")
+    results = []
+    for name, data in sections.items():
+        if name not in saved:
+            continue  # Sections added after the baseline was saved have nothing to compare
+        if saved[name]["hash"] == get_section_hash(data):
+            continue
+        changes = diff_section(saved[name]["data"], data)
+        lines = "\n".join(f"  {change}" for change in changes)
+        results.append(
+            {
+                "status": "warning",
+                "message": f"DRIFT: {name} changed since the baseline saved at {saved_at}:\n{lines}",
+                "section": name,
+                "changes": changes,
+            }
+        )
+    if not results:
+        results.append(
+            {
+                "status": "success",
+                "message": f"YAY! Nothing changed since the baseline saved at {saved_at}.",
+                "section": None,
+                "changes": [],
+            }
+        )
+    return results
+
+
+# Header facts left out of baselines because they change on every run
+VOLATILE_FACTS = {"date_time"}
+
+
+def get_baseline_sections(facts):
+    """
+    Gathers the state saved in the core baseline.
+
+    Args:
+    - facts (list): Facts from get_header_facts().
+
+    Returns:
+    - dict: {"header_facts", "sys_path"}
+    """
+    return {
+        "header_facts": {fact["name"]: fact["value"] for fact in facts if fact["name"] not in VOLATILE_FACTS},
+        "sys_path": list(sys.path),
+    }
+
+
+def get_options(argv=None):
+    """
+    Reads the core diagnostic's options from the command line.
+
+    Options meant for other diagnostics are ignored.
+
+    Returns:
+    - argparse.Namespace: The options.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--save-baseline", action="store_true", help="save the current state as the baseline")
+    parser.add_argument("--compare-baseline", action="store_true", help="report what changed since the baseline")
+    options, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return options
+
+
+# The facts shown in the header, in order: (name, label, function of fn)
+HEADER_FACTS = [
+    ("date_time", "At: ", lambda fn: f"{datetime.date.today()} at {datetime.datetime.now().strftime('%I:%M %p')}"),
+    ("operating_system", "Operating System: ", lambda fn: system_facts.operating_system),
+    ("architecture", "System Architecture: ", lambda fn: system_facts.architecture),
+    ("cpu_count", "Number of CPUs: ", lambda fn: system_facts.cpu_count),
+    ("machine", "Machine Type: ", lambda fn: system_facts.machine),
+    ("python_version", "Python Version: ", lambda fn: system_facts.python_version),
+    ("python_build", "Python Build Date and Compiler: ", lambda fn: system_facts.python_build),
+    ("python_implementation", "Python Implementation: ", lambda fn: system_facts.python_implementation),
+    ("pip_environment", "Active pip environment: ", lambda fn: os.environ.get("PIP_DEFAULT_ENV", "None")),
+    ("interpreter_path", "Path to Interpreter:         ", lambda fn: sys.executable),
+    ("virtual_environment_path", "Path to virtual environment: ", lambda fn: sys.prefix),
+    ("working_directory", "Current Working Directory:   ", lambda fn: os.getcwd()),
+    ("source_directory", "Path to source directory:    ", lambda fn: system_facts.source_directory),
+    ("script_file", "Path to script file:         ", lambda fn: fn),
+    ("home_directory", "User's Home Directory:       ", lambda fn: system_facts.home_directory),
+    ("terminal_environment", "Terminal Environment:        ", lambda fn: system_facts.terminal[0]),
+    ("terminal_type", "Terminal Type:               ", lambda fn: system_facts.terminal[1]),
+    ("git_in_path", "Git available in PATH:       ", lambda fn: system_facts.git_in_path),
+    ("shadowed_commands", "Shadowed on PATH:            ", lambda fn: system_facts.shadowed_commands),
+]
+
+
+def get_header_facts(fn):
+    """
+    Collects the facts shown in the header.
+
+    Args:
+    - fn (str): Path to the file for which the information should be generated.
+
+    Returns:
+    - list: One dict per fact: {"name", "label", "value", "duration_ms"}.
+    """
+    facts = []
+    for name, label, get_value in HEADER_FACTS:
+        start = time.perf_counter()
+        value = get_value(fn)
+        duration_ms = (time.perf_counter() - start) * 1000
+        facts.append({"name": name, "label": label, "value": value, "duration_ms": duration_ms})
+    return facts
+
+
+def get_header(fn, facts=None):
     """
     Constructs a formatted string that provides helpful information.
 
     Args:
     - fn (str): Path to the file for which the information should be generated.
+    - facts (list): Facts from get_header_facts(). Collected now if None.
 
     Returns:
     - str: Formatted debug information.
     """
-
-    environment, current_shell = get_terminal_info()
+    if facts is None:
+        facts = get_header_facts(fn)
+    lines = "\n".join(f" {fact['label']}{fact['value']}" for fact in facts)
 
     return f"""
 {DIVIDER}
 {DIVIDER}
  Welcome to NW Diagnostics!
- At: {datetime.date.today()} at {datetime.datetime.now().strftime("%I:%M %p")}
- Operating System: {os.name} {platform.system()} {platform.release()}
- System Architecture: {architecture}
- Number of CPUs: {os.cpu_count()}
- Machine Type: {platform.machine()}
- Python Version: {platform.python_version()}
- Python Build Date and Compiler: {build_date} with {compiler}
- Python Implementation: {implementation}
- Active pip environment: {os.environ.get('PIP_DEFAULT_ENV', 'None')}
- Path to Interpreter:         {sys.executable}
- Path to virtual environment: {sys.prefix}
- Current Working Directory:   {os.getcwd()}
- Path to source directory:    {get_source_directory_path()}
- Path to script file:         {fn}
- User's Home Directory:       {user_home}
- Terminal Environment:        {environment}
- Terminal Type:               {current_shell}
- Git available in PATH:       {is_git_in_path()} 
+{lines}
 {DIVIDER}
 {DIVIDER}
 """
 
 
-def check_core(fn):
+def check_core(fn, options=None):
     """
     Generates and prints debug information about the local system.
 
     Args:
     - fn (str): Path to the file for which the information should be generated.
+    - options (argparse.Namespace): Options from get_options(). Defaults to none set.
     """
-    debug_info = get_header(fn)
-    logging.info(debug_info)
+    if options is None:
+        options = get_options([])
+    setup_report_sink()
+    open_record_stream()
+    facts = get_header_facts(fn)
+    for fact in facts:
+        emit_record("fact", fact["name"], "info", value=fact["value"], duration_ms=fact["duration_ms"])
+    debug_info = get_header(fn, facts)
+    logger.info(debug_info)
+
+    baseline_results = []
+    if options.compare_baseline or options.save_baseline:
+        sections = get_baseline_sections(facts)
+        if options.compare_baseline:
+            baseline_results.extend(compare_baseline(sections))
+        if options.save_baseline:
+            baseline_results.append(save_baseline(sections, passed=True))
+    for result in baseline_results:
+        logger.info(result["message"])
+        logger.info(DIVIDER)
+        name = f"baseline_{result['section']}" if result.get("section") else "baseline"
+        emit_record("check", name, result["status"], value=result.get("changes"), message=result["message"])
+    close_record_stream()
 
 
 def run_diagnostic_core(namespace=None):
     """Function to run the main diagnostic checks."""
+    options = get_options()
     if namespace:
         check_core_func = namespace.get("check_core")
         if callable(check_core_func):
-            check_core_func(__file__)
+            check_core_func(__file__, options)
     else:
-        check_core(__file__)
+        check_core(__file__, options)
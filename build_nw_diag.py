@@ -0,0 +1,168 @@
+"""
+======================= NW DIAGNOSTIC UTILITY ==================================
+https://github.com/denisecase/nw-diagnostics-python/
+================================================================================
+
+PURPOSE:
+Package all the diagnostics into a single file, `nw_diag.pyz`, that runs
+  without an internet connection.
+
+ORIGIN:
+This is a maintainer script. Students do not need to run it.
+
+USAGE:
+In the root folder of this repository, run the following command:
+
+python build_nw_diag.py
+
+Then copy `nw_diag.pyz` to any machine with Python 3.8 or greater and run:
+
+python nw_diag.pyz                  (runs the core and env checks)
+python nw_diag.pyz core             (runs only the core checks)
+python nw_diag.pyz env rabbitmq     (runs the env and RabbitMQ checks)
+
+NOTES:
+Each diagnostic is stored as precompiled bytecode, so nothing is fetched or
+  compiled at startup. Only the selected diagnostics are imported.
+The bytecode only runs on the Python version that built the archive. The
+  source is stored too, so other Python versions compile it instead, which
+  is a little slower to start. Build the archive with the Python version
+  used on most target machines.
+
+================================================================================
+"""
+# Python Standard Library
+import argparse
+import importlib.util
+import marshal
+import os
+import sys
+import zipfile
+
+
+# The diagnostics to package: name -> (source file, function to run)
+DIAGNOSTICS = {
+    "core": ("basic/nw_check_core.py", "run_diagnostic_core"),
+    "env": ("environment/nw_check_env.py", "run_diagnostic_env"),
+    "rabbitmq": ("external/nw_check_rabbitmq.py", "run_diagnostic_rabbitmq"),
+}
+
+# Diagnostics run when none are named on the command line
+DEFAULT_CHECKS = ["core", "env"]
+
+OUTPUT_FILENAME = "nw_diag.pyz"
+INTERPRETER = "/usr/bin/env python3"
+
+# The entry point stored in the archive as __main__.py
+MAIN_TEMPLATE = '''"""
+NW Diagnostics, packaged by build_nw_diag.py. Run: python nw_diag.pyz [checks]
+"""
+import argparse
+import importlib
+import sys
+
+DIAGNOSTICS = {diagnostics!r}
+DEFAULT_CHECKS = {default_checks!r}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="nw_diag.pyz", description="Run the NW diagnostics.")
+    parser.add_argument(
+        "checks",
+        nargs="*",
+        default=DEFAULT_CHECKS,
+        help="diagnostics to run: {choices_text} (default: {default_text})",
+    )
+    args, remaining = parser.parse_known_args()
+    sys.argv = sys.argv[:1] + remaining
+
+    unknown = [name for name in args.checks if name not in DIAGNOSTICS]
+    if unknown:
+        parser.error(f"unknown checks: {{' '.join(unknown)}} (choose from {choices_text})")
+
+    for name in args.checks:
+        module_name, function_name = DIAGNOSTICS[name]
+        # Import only the diagnostics that were asked for
+        module = importlib.import_module(module_name)
+        getattr(module, function_name)()
+
+
+main()
+'''
+
+
+def get_pyc_bytes(source_path, display_name):
+    """
+    Compiles a source file into the contents of a .pyc file.
+
+    The .pyc is hash-based and unchecked, so it does not depend on file
+    timestamps and is loaded without the source.
+
+    Args:
+    - source_path (str): Path to the Python source file.
+    - display_name (str): File name shown in tracebacks.
+
+    Returns:
+    - bytes: The .pyc file contents.
+    """
+    with open(source_path, "rb") as f:
+        source = f.read()
+    code_object = compile(source, display_name, "exec", dont_inherit=True)
+    flags = 0b01  # Hash-based pyc, source not checked
+    return (
+        importlib.util.MAGIC_NUMBER
+        + flags.to_bytes(4, "little")
+        + importlib.util.source_hash(source)
+        + marshal.dumps(code_object)
+    )
+
+
+def build_archive(output_path=OUTPUT_FILENAME, root_dir=None):
+    """
+    Builds the single-file archive with every diagnostic.
+
+    Args:
+    - output_path (str): Where to write the archive.
+    - root_dir (str): The repository root. Defaults to this script's folder.
+
+    Returns:
+    - str: The path to the archive.
+    """
+    if root_dir is None:
+        root_dir = os.path.dirname(os.path.abspath(__file__))
+
+    entry_points = {}
+    with open(output_path, "wb") as f:
+        f.write(f"#!{INTERPRETER}\n".encode("utf-8"))
+        with zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, (source_file, function_name) in DIAGNOSTICS.items():
+                module_name = os.path.splitext(os.path.basename(source_file))[0]
+                source_path = os.path.join(root_dir, source_file)
+                archive.writestr(f"{module_name}.pyc", get_pyc_bytes(source_path, source_file))
+                # Used instead of the .pyc on other Python versions
+                archive.write(source_path, f"{module_name}.py")
+                entry_points[name] = (module_name, function_name)
+
+            main_code = MAIN_TEMPLATE.format(
+                diagnostics=entry_points,
+                default_checks=DEFAULT_CHECKS,
+                default_text=" ".join(DEFAULT_CHECKS),
+                choices_text=" ".join(DIAGNOSTICS),
+            )
+            archive.writestr("__main__.py", main_code)
+
+    if sys.platform != "win32":
+        os.chmod(output_path, 0o755)
+    return output_path
+
+
+# ---------------------------------------------------------------------------
+# If this is the script we are running, then call some functions and execute code!
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the NW diagnostics archive.")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILENAME, help="archive to write")
+    args = parser.parse_args()
+
+    path = build_archive(args.output)
+    print(f"Built {path} ({os.path.getsize(path)} bytes) with Python {sys.version.split()[0]}.")
@@ -35,23 +35,92 @@ To learn more or contribute, see the repository and its documentation.
 
 # Python Standard Library
 
+import argparse
+import atexit
+import concurrent.futures
 import datetime
+import functools
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
 import logging
+import logging.handlers
 import os
+import platform
+import queue
+import re
+import subprocess
 import sys
+import threading
+import time
 
 # Setup logging
+#
+# Every NW diagnostic run in the same process shares one background
+# thread that writes the reports, so checks only put lines on a queue.
+# Each diagnostic has its own logger and its own buffered report file.
 
 OUTPUT_FILENAME = "00_report_env.txt"
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    handlers=[logging.FileHandler(OUTPUT_FILENAME, mode="w"), logging.StreamHandler()],
-)
+REPORT_LOGGER_NAME = "nw_diagnostics"
+REPORT_BUFFER_RECORDS = 100  # Report lines held in memory before writing
+
+logger = logging.getLogger(f"{REPORT_LOGGER_NAME}.env")
+
+
+def get_report_listener():
+    """
+    Returns the report writer thread shared by all diagnostics in this
+    process, starting it on first use.
+    """
+    parent = logging.getLogger(REPORT_LOGGER_NAME)
+    listener = getattr(parent, "report_listener", None)
+    if listener is None:
+        report_queue = queue.SimpleQueue()
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter("%(message)s"))
+        listener = logging.handlers.QueueListener(report_queue, console_handler, respect_handler_level=True)
+        parent.addHandler(logging.handlers.QueueHandler(report_queue))
+        parent.setLevel(logging.INFO)
+        parent.propagate = False
+        listener.start()
+        atexit.register(close_report_listener, listener)
+        parent.report_listener = listener
+    return listener
+
+
+def close_report_listener(listener):
+    """Writes any queued and buffered report lines, then closes the report files."""
+    listener.stop()
+    for handler in listener.handlers:
+        target = getattr(handler, "target", None)
+        handler.close()
+        if target is not None:
+            target.close()
+
+
+def setup_report_sink():
+    """Starts this diagnostic's report file. Does nothing if it was already started."""
+    if getattr(logger, "report_sink", None) is not None:
+        return
+    listener = get_report_listener()
+    file_handler = logging.FileHandler(OUTPUT_FILENAME, mode="w")
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    report_sink = logging.handlers.MemoryHandler(
+        REPORT_BUFFER_RECORDS, flushLevel=logging.ERROR, target=file_handler
+    )
+    report_sink.addFilter(logging.Filter(logger.name))  # Only this diagnostic's lines
+    listener.handlers = listener.handlers + (report_sink,)
+    logger.report_sink = report_sink
+
 
 # Declare additional program constants
 
 DIVIDER = "=" * 70  # A string divider for cleaner output formatting
+CACHE_DIR = os.environ.get(
+    "NW_DIAGNOSTICS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "nw-diagnostics"),
+)
 CREATE_COMMAND = "python -m venv .venv"
 ACTIVATE_COMMAND_WINDOWS = ".venv\\Scripts\\activate"
 ACTIVATE_COMMAND_MAC_LINUX = "source .venv/bin/activate"
@@ -133,95 +202,1701 @@ Python's package search paths:
 
 def log_with_divider(message):
     """Logs a message and the DIVIDER."""
-    logging.info(message)
-    logging.info(DIVIDER)
+    logger.info(message)
+    logger.info(DIVIDER)
 
 
 def read_dependencies():
     """Read dependencies from requirements.txt and return a list of package names."""
-    if not check_requirements_file_exists():
-        return []
+    return [req["name"] for req in read_requirements() if req["name"]]
+
 
-    with open("requirements.txt", "r") as f:
-        # Use list comprehension to extract package names
-        return [line.split("==")[0].strip() for line in f.readlines()]
+def normalize_name(name):
+    """Returns the standard form of a package name (e.g. "Foo_Bar" -> "foo-bar")."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def get_import_names(dist):
+    """
+    Returns the top-level names a distribution can be imported by.
+
+    Uses top_level.txt when the distribution has one, otherwise the list of
+    installed files (RECORD).
+
+    Args:
+    - dist (importlib.metadata.Distribution): An installed distribution.
+
+    Returns:
+    - set: Top-level module and package names, e.g. {"yaml"} for PyYAML.
+    """
+    top_level = dist.read_text("top_level.txt")
+    if top_level:
+        return {line.strip() for line in top_level.splitlines() if line.strip()}
+
+    names = set()
+    for file in dist.files or []:
+        parts = file.parts
+        if len(parts) == 1:
+            # Single-file modules such as six.py or _cffi_backend.cpython-311-x86_64-linux-gnu.so
+            if parts[0].endswith((".py", ".so", ".pyd")):
+                names.add(parts[0].split(".")[0])
+        elif parts[0].isidentifier() and parts[0] != "__pycache__":
+            names.add(parts[0])
+    return names
+
+
+def build_distribution_index():
+    """
+    Scans the installed distributions once, without importing any of them.
+
+    Returns:
+    - dict: {"distributions": {normalized name: {"name", "version", "import_names"}},
+             "import_names": {import name: normalized name}}
+    """
+    distributions = {}
+    import_names = {}
+    for dist in importlib.metadata.distributions():
+        name = dist.metadata["Name"]
+        if not name:
+            continue
+        key = normalize_name(name)
+        if key in distributions:
+            continue  # The first one found on sys.path is the one Python uses
+        names = get_import_names(dist)
+        distributions[key] = {"name": name, "version": dist.version, "import_names": sorted(names)}
+        for import_name in names:
+            import_names.setdefault(import_name, key)
+    return {"distributions": distributions, "import_names": import_names}
+
+
+distribution_index = None  # Built on first use by get_distribution_index()
+
+
+distribution_index_lock = threading.Lock()
+
+
+def get_distribution_index():
+    """Returns the index of installed distributions, building it on first use."""
+    global distribution_index
+    with distribution_index_lock:
+        if distribution_index is None:
+            distribution_index = build_distribution_index()
+    return distribution_index
+
+
+def find_installed_distribution(dependency):
+    """
+    Looks up a dependency by package name or import name.
+
+    Args:
+    - dependency (str): A name from requirements.txt, e.g. "PyYAML" or "yaml".
+
+    Returns:
+    - dict: The index entry for the installed distribution, or None.
+    """
+    index = get_distribution_index()
+    key = normalize_name(dependency)
+    if key in index["distributions"]:
+        return index["distributions"][key]
+    if dependency in index["import_names"]:
+        return index["distributions"][index["import_names"][dependency]]
+    return None
 
 
 def is_dependency_installed(dependency):
-    """Check if a given dependency is installed."""
-    try:
-        __import__(dependency)
+    """
+    Check if a given dependency is installed.
+
+    Nothing is imported. Installed package metadata is checked first, then
+    modules that can be found on sys.path without metadata.
+    """
+    if not dependency:
+        return False
+    if find_installed_distribution(dependency) is not None:
         return True
-    except ImportError:
+    if dependency.isidentifier():
+        return importlib.util.find_spec(dependency) is not None
+    return False
+
+
+# Requirements parsing and version checking
+#
+# requirements.txt is read in one pass into a list of requirement dicts
+# with their version specifiers already parsed. Each requirement is then
+# checked against the installed-distribution index, without importing
+# anything.
+
+VERSION_PATTERN = re.compile(
+    r"""
+    ^\s*v?
+    (?:(?P<epoch>\d+)!)?
+    (?P<release>\d+(?:\.\d+)*)
+    (?:[-_.]?(?P<pre_label>alpha|beta|preview|pre|rc|a|b|c)[-_.]?(?P<pre_number>\d+)?)?
+    (?:-(?P<post_implicit>\d+)|[-_.]?(?:post|rev|r)[-_.]?(?P<post_number>\d+)?(?P<post_label>))?
+    (?:[-_.]?dev[-_.]?(?P<dev_number>\d+)?(?P<dev_label>))?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+PRE_RELEASE_ORDER = {"a": 0, "alpha": 0, "b": 1, "beta": 1, "c": 2, "rc": 2, "pre": 2, "preview": 2}
+SPECIFIER_PATTERN = re.compile(r"^\s*(~=|===|==|!=|<=|>=|<|>)\s*([^\s,;]+)\s*$")
+REQUIREMENT_PATTERN = re.compile(
+    r"^(?P<name>[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)\s*(?:\[(?P<extras>[^\]]*)\])?\s*(?P<rest>.*)$"
+)
+MARKER_TOKEN_PATTERN = re.compile(
+    r"""\s*(?:
+    (?P<string>'[^']*'|"[^"]*")
+    |(?P<op>===|==|!=|<=|>=|~=|<|>|not\s+in\b|in\b)
+    |(?P<paren>[()])
+    |(?P<bool>and\b|or\b)
+    |(?P<variable>[A-Za-z_][A-Za-z0-9_.]*)
+    )""",
+    re.VERBOSE,
+)
+INCLUDE_OPTIONS = ("-r", "--requirement")
+CONSTRAINT_OPTIONS = ("-c", "--constraint")
+
+
+@functools.lru_cache(maxsize=None)
+def parse_version(text):
+    """
+    Parses a version string so versions can be compared the way pip does.
+
+    Args:
+    - text (str): A version such as "2.31.0", "1.0rc1" or "3.0.post2".
+
+    Returns:
+    - dict: {"key": tuple to compare, "release": tuple of ints, "local": str or None, ...},
+            or None if the text is not a valid version.
+    """
+    match = VERSION_PATTERN.match(text)
+    if not match:
+        return None
+
+    release = tuple(int(part) for part in match.group("release").split("."))
+    trimmed = release
+    while len(trimmed) > 1 and trimmed[-1] == 0:
+        trimmed = trimmed[:-1]
+
+    pre_label = match.group("pre_label")
+    has_post = match.group("post_implicit") is not None or match.group("post_label") is not None
+    has_dev = match.group("dev_label") is not None
+    if pre_label:
+        pre_key = (PRE_RELEASE_ORDER[pre_label.lower()], int(match.group("pre_number") or 0))
+    elif has_dev and not has_post:
+        pre_key = (-1, 0)  # 1.0.dev1 sorts before 1.0a1
+    else:
+        pre_key = (3, 0)  # Final releases sort after their pre-releases
+    post_key = int(match.group("post_implicit") or match.group("post_number") or 0) if has_post else -1
+    dev_key = (0, int(match.group("dev_number") or 0)) if has_dev else (1, 0)
+
+    local = match.group("local")
+    local_key = ()
+    if local:
+        local_key = tuple(
+            (1, int(part), "") if part.isdigit() else (0, 0, part.lower())
+            for part in re.split(r"[-_.]", local)
+        )
+
+    epoch = int(match.group("epoch") or 0)
+    return {
+        "key": (epoch, trimmed, pre_key, post_key, dev_key, local_key),
+        "public_key": (epoch, trimmed, pre_key, post_key, dev_key, ()),
+        # Without the post-release (and a dev on it), e.g. 1.0.post1.dev2 -> 1.0
+        "no_post_key": (epoch, trimmed, pre_key, -1, (1, 0), ()) if has_post else (epoch, trimmed, pre_key, -1, dev_key, ()),
+        # The release this is a pre-release of, e.g. 1.0rc1 -> 1.0, 1.0.post1.dev1 -> 1.0.post1
+        "final_key": (epoch, trimmed, (3, 0), -1 if pre_label else post_key, (1, 0), ()),
+        "is_prerelease": bool(pre_label) or has_dev,
+        "is_postrelease": has_post,
+        "epoch": epoch,
+        "release": release,
+        "local": local,
+    }
+
+
+def compile_specifier(operator, version):
+    """
+    Parses one version specifier, such as ">=2.0" or "==1.4.*", ahead of time.
+
+    Returns:
+    - dict: {"operator", "version", "parsed", "prefix"}, or None if invalid.
+    """
+    prefix = None
+    parsed = None
+    if operator in ("==", "!=") and version.endswith(".*"):
+        parsed = parse_version(version[:-2])
+        if parsed is not None:
+            prefix = parsed["release"]
+    elif operator == "===":
+        parsed = {}
+    else:
+        parsed = parse_version(version)
+        if operator == "~=" and parsed is not None:
+            if len(parsed["release"]) < 2:
+                return None
+            prefix = parsed["release"][:-1]
+    if parsed is None:
+        return None
+    return {"operator": operator, "version": version, "parsed": parsed, "prefix": prefix}
+
+
+def release_starts_with(installed, spec):
+    """Returns True if the installed version's release starts with the spec's prefix."""
+    if installed["epoch"] != spec["parsed"]["epoch"]:
         return False
+    prefix = spec["prefix"]
+    release = installed["release"] + (0,) * max(0, len(prefix) - len(installed["release"]))
+    return release[: len(prefix)] == prefix
+
+
+def version_satisfies(installed_version, specifiers):
+    """
+    Checks an installed version against compiled specifiers.
+
+    Args:
+    - installed_version (str): The installed version, e.g. "2.31.0".
+    - specifiers (list): Specifiers from compile_specifier().
+
+    Returns:
+    - bool: True if every specifier is satisfied.
+    """
+    installed = parse_version(installed_version)
+    for spec in specifiers:
+        operator = spec["operator"]
+        if operator == "===":
+            if installed_version.strip().lower() != spec["version"].lower():
+                return False
+            continue
+        if installed is None:
+            return False
+        if spec["prefix"] is not None and operator in ("==", "!="):
+            if release_starts_with(installed, spec) != (operator == "=="):
+                return False
+            continue
+
+        target = spec["parsed"]["key"]
+        # A local label (+cpu) on the installed version only counts if the
+        # specifier has one too.
+        current = installed["key"] if spec["parsed"]["local"] else installed["public_key"]
+        if operator == "==" and current != target:
+            return False
+        if operator == "!=" and current == target:
+            return False
+        if operator == ">=" and current < target:
+            return False
+        if operator == "<=" and current > target:
+            return False
+        # ">1.0" does not match 1.0.post1 or 1.0+local unless the specifier
+        # is a post-release itself, and "<1.0" does not match 1.0rc1 unless
+        # it is a pre-release itself. Only versions of 1.0 are excluded, so
+        # 2.0.0+cpu still matches ">2.0.0rc1".
+        if operator == ">" and (
+            current <= target
+            or target == (installed["public_key"] if spec["parsed"]["is_postrelease"] else installed["no_post_key"])
+        ):
+            return False
+        if operator == "<" and (
+            current >= target
+            or not spec["parsed"]["is_prerelease"] and installed["is_prerelease"] and installed["final_key"] == target
+        ):
+            return False
+        if operator == "~=" and (current < target or not release_starts_with(installed, spec)):
+            return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def get_marker_environment():
+    """Returns the values environment markers (e.g. sys_platform) are compared to."""
+    implementation_version = ".".join(str(part) for part in sys.implementation.version[:3])
+    return {
+        "implementation_name": sys.implementation.name,
+        "implementation_version": implementation_version,
+        "os_name": os.name,
+        "platform_machine": platform.machine(),
+        "platform_python_implementation": platform.python_implementation(),
+        "platform_release": platform.release(),
+        "platform_system": platform.system(),
+        "platform_version": platform.version(),
+        "python_full_version": platform.python_version(),
+        "python_version": ".".join(platform.python_version_tuple()[:2]),
+        "sys_platform": sys.platform,
+        "extra": "",
+    }
+
+
+def compare_marker_values(left, operator, right):
+    """
+    Compares two marker values, as versions when both are versions.
+
+    Otherwise they are compared as plain strings, as PEP 508 asks, so
+    'platform_release >= "5.10"' still works on "6.18.44-fc-v130".
+    """
+    if operator == "in":
+        return left in right
+    if operator == "not in":
+        return left not in right
+    spec = compile_specifier(operator, right)
+    if spec is not None and parse_version(left) is not None:
+        return version_satisfies(left, [spec])
+    if operator == "==" or operator == "===":
+        return left == right
+    if operator == "!=":
+        return left != right
+    if operator == "<":
+        return left < right
+    if operator == "<=":
+        return left <= right
+    if operator == ">":
+        return left > right
+    if operator == ">=":
+        return left >= right
+    raise ValueError(f"cannot compare {left!r} {operator} {right!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def evaluate_marker(marker):
+    """
+    Evaluates an environment marker such as 'sys_platform == "win32"'.
+
+    Results are remembered, so a marker shared by many requirements is
+    only evaluated once.
+
+    Returns:
+    - bool: True if the requirement applies to this system.
+
+    Raises:
+    - ValueError: If the marker cannot be parsed.
+    """
+    environment = get_marker_environment()
+    tokens = []
+    position = 0
+    marker = marker.strip()
+    while position < len(marker):
+        match = MARKER_TOKEN_PATTERN.match(marker, position)
+        if not match or match.end() == position:
+            raise ValueError(f"invalid marker: {marker}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "op":
+            value = " ".join(value.split())
+        tokens.append((kind, value))
+        position = match.end()
+
+    def parse_value(index):
+        kind, value = tokens[index]
+        if kind == "string":
+            return value[1:-1], index + 1
+        if kind == "variable" and value in environment:
+            return environment[value], index + 1
+        raise ValueError(f"invalid marker value: {value}")
+
+    def parse_atom(index):
+        if tokens[index] == ("paren", "("):
+            result, index = parse_or(index + 1)
+            if index >= len(tokens) or tokens[index] != ("paren", ")"):
+                raise ValueError(f"unbalanced parentheses in marker: {marker}")
+            return result, index + 1
+        left, index = parse_value(index)
+        if index >= len(tokens) or tokens[index][0] != "op":
+            raise ValueError(f"missing operator in marker: {marker}")
+        operator = tokens[index][1]
+        right, index = parse_value(index + 1)
+        return compare_marker_values(left, operator, right), index
+
+    def parse_and(index):
+        result, index = parse_atom(index)
+        while index < len(tokens) and tokens[index] == ("bool", "and"):
+            right, index = parse_atom(index + 1)
+            result = result and right
+        return result, index
+
+    def parse_or(index):
+        result, index = parse_and(index)
+        while index < len(tokens) and tokens[index] == ("bool", "or"):
+            right, index = parse_and(index + 1)
+            result = result or right
+        return result, index
+
+    try:
+        result, index = parse_or(0)
+    except IndexError:
+        raise ValueError(f"incomplete marker: {marker}")
+    if index != len(tokens):
+        raise ValueError(f"unexpected text in marker: {marker}")
+    return result
+
+
+def iter_requirement_lines(path, seen=None):
+    """
+    Reads a requirements file one logical line at a time, following -r includes.
+
+    Comments, blank lines and pip options are dropped, and lines ending in a
+    backslash are joined with the next line.
+
+    Args:
+    - path (str): Path to the requirements file.
+    - seen (set): Files already being read (stops include loops).
+
+    Yields:
+    - tuple: (source, line, error) where source is "file:line" and error
+      describes a problem with the line, or is None.
+    """
+    seen = set() if seen is None else seen
+    real_path = os.path.realpath(path)
+    if real_path in seen:
+        return
+    seen.add(real_path)
+
+    with open(path, "r", encoding="utf-8") as f:
+        pending = ""
+        start = 0
+        for number, raw_line in enumerate(f, start=1):
+            if not pending:
+                start = number
+            line = raw_line.rstrip("\r\n")
+            if line.endswith("\\"):
+                pending += line[:-1]
+                continue
+            line = re.sub(r"(^|\s+)#.*$", "", pending + line).strip()
+            pending = ""
+            if not line:
+                continue
+            source = f"{path}:{start}"
+
+            option, _, value = line.partition(" ")
+            if "=" in option and option.startswith("--"):
+                option, _, value = option.partition("=")
+            elif option.startswith("-r") and option not in INCLUDE_OPTIONS:
+                option, value = "-r", option[2:]
+            value = value.strip()
+
+            if option in INCLUDE_OPTIONS:
+                include = os.path.join(os.path.dirname(path), value)
+                if not os.path.exists(include):
+                    yield source, None, f"included file {value} was not found"
+                    continue
+                yield from iter_requirement_lines(include, seen)
+            elif option in CONSTRAINT_OPTIONS or (line.startswith("-") and "#egg=" not in line):
+                continue  # Constraints and pip options do not name a requirement
+            else:
+                yield source, line, None
+
+
+def compile_requirement(source, line, error=None):
+    """
+    Parses one requirement line, such as 'requests[socks]>=2.28,<3; python_version >= "3.8"'.
+
+    Args:
+    - source (str): Where the line came from, as "file:line".
+    - line (str): The requirement text.
+    - error (str): A problem found while reading the line, if any.
+
+    Returns:
+    - dict: {"name", "key", "extras", "specifiers", "marker", "source", "line", "error"}
+    """
+    requirement = {
+        "name": None,
+        "key": None,
+        "extras": [],
+        "specifiers": [],
+        "marker": None,
+        "source": source,
+        "line": line,
+        "error": error,
+    }
+    if error:
+        return requirement
+    if line.startswith("-"):  # Editable install: -e path#egg=name
+        line = line.split("#egg=", 1)[1].split("&")[0]
+    line = re.split(r"\s+--?(?=[A-Za-z])", line, maxsplit=1)[0]  # Drop --hash and similar
+
+    match = REQUIREMENT_PATTERN.match(line)
+    if not match:
+        requirement["error"] = f"could not read requirement '{line}'"
+        return requirement
+
+    requirement["name"] = match.group("name")
+    requirement["key"] = normalize_name(requirement["name"])
+    if match.group("extras"):
+        requirement["extras"] = [extra.strip() for extra in match.group("extras").split(",") if extra.strip()]
+
+    rest = match.group("rest").strip()
+    if rest.startswith("@"):
+        # Direct reference (name @ url); a marker must come after whitespace
+        parts = re.split(r"\s+;", rest, maxsplit=1)
+        spec_text, marker = "", parts[1] if len(parts) > 1 else ""
+    else:
+        spec_text, _, marker = rest.partition(";")
+    marker = marker.strip()
+    requirement["marker"] = marker or None
+
+    spec_text = spec_text.strip()
+    if spec_text.startswith("(") and spec_text.endswith(")"):
+        spec_text = spec_text[1:-1]
+    for part in filter(None, (item.strip() for item in spec_text.split(","))):
+        spec_match = SPECIFIER_PATTERN.match(part)
+        spec = compile_specifier(*spec_match.groups()) if spec_match else None
+        if spec is None:
+            requirement["error"] = f"could not read version specifier '{part}'"
+            return requirement
+        requirement["specifiers"].append(spec)
+    return requirement
+
+
+def read_requirements(path="requirements.txt", seen=None):
+    """
+    Reads a requirements file, and any files it includes, into compiled requirements.
+
+    Args:
+    - path (str): Path to the requirements file.
+    - seen (set): If given, filled with the paths of every file read.
+
+    Returns:
+    - list: Requirement dicts from compile_requirement(), in file order.
+    """
+    if not os.path.exists(path):
+        return []
+    return [compile_requirement(*item) for item in iter_requirement_lines(path, seen)]
+
+
+def get_specifier_text(requirement):
+    """Returns the specifiers of a requirement as text, e.g. ">=2.0,<3"."""
+    return ",".join(spec["operator"] + spec["version"] for spec in requirement["specifiers"])
+
+
+def check_requirement(requirement):
+    """
+    Checks one compiled requirement against the installed distributions.
+
+    Returns:
+    - dict: {"status", "message", "name", "distribution", "installed", "required"}, where
+      distribution is the normalized name of the distribution the requirement resolved to.
+    """
+    name = requirement["name"]
+    required = get_specifier_text(requirement)
+    result = {"name": name, "distribution": normalize_name(name or ""), "installed": None, "required": required}
+
+    if requirement["error"]:
+        result["status"] = "error"
+        result["message"] = f"ERROR: {requirement['source']}: {requirement['error']}."
+        return result
+
+    if requirement["marker"]:
+        try:
+            applies = evaluate_marker(requirement["marker"])
+        except ValueError as e:
+            result["status"] = "error"
+            result["message"] = f"ERROR: {requirement['source']}: {e}."
+            return result
+        if not applies:
+            result["status"] = "skipped"
+            result["message"] = f"SKIPPED: {name} is not needed here ({requirement['marker']}).\n{DIVIDER}"
+            return result
+
+    dist = find_installed_distribution(name)
+    if dist is None:
+        if not is_dependency_installed(name):
+            result["status"] = "error"
+            result["message"] = f"ERROR: {name} is not installed in .venv. {MISSING_DEPENDENCY_MESSAGE}"
+        elif not requirement["specifiers"]:
+            result["status"] = "success"
+            result["message"] = f"YAY! {name} is installed in the .venv.\n{DIVIDER}"
+        else:
+            result["status"] = "warning"
+            result["message"] = (
+                f"WARNING: {name} is installed without package information, "
+                f"so its version could not be checked against {required}.\n{DIVIDER}"
+            )
+        return result
+
+    result["distribution"] = normalize_name(dist["name"])  # "yaml" resolves to "pyyaml"
+    result["installed"] = dist["version"]
+    if version_satisfies(dist["version"], requirement["specifiers"]):
+        result["status"] = "success"
+        result["message"] = f"YAY! {name} {dist['version']} is installed in the .venv.\n{DIVIDER}"
+    else:
+        result["status"] = "error"
+        result["message"] = (
+            f"ERROR: {name} has the wrong version in .venv: installed {dist['version']}, need {required}. "
+            f"{MISSING_DEPENDENCY_MESSAGE}"
+        )
+    return result
+
+
+# Incremental checking
+#
+# The dependency results are saved with a fingerprint of everything they
+# depend on: the requirements files, the interpreter, and the dist-info
+# folders in site-packages. If nothing changed, the saved results are used
+# as they are. Otherwise only the requirements touched by the change are
+# checked again.
+
+
+def get_env_cache_path(requirements_path):
+    """Returns the file that holds saved results for a requirements file and interpreter."""
+    key = f"{os.path.abspath(requirements_path)}|{sys.executable}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, "env", f"{digest}.json")
+
+
+def get_installed_state():
+    """
+    Lists the dist-info and egg-info folders on sys.path with their modification times.
+
+    This only reads directory listings, so it stays fast with thousands of
+    installed packages.
+
+    Returns:
+    - dict: {folder path: modification time in nanoseconds}
+    """
+    state = {}
+    for folder in sys.path:
+        if not folder or not os.path.isdir(folder):
+            continue
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name.endswith((".dist-info", ".egg-info")):
+                        state[entry.path] = entry.stat().st_mtime_ns
+        except OSError:
+            continue
+    return state
+
+
+def get_environment_fingerprint(requirement_files):
+    """
+    Describes everything the dependency results depend on.
+
+    Args:
+    - requirement_files (iterable): The requirements file and the files it includes.
+
+    Returns:
+    - dict: {"interpreter", "requirements", "installed"}
+    """
+    hashes = {}
+    for path in sorted(requirement_files):
+        with open(path, "rb") as f:
+            hashes[path] = hashlib.sha256(f.read()).hexdigest()
+    return {
+        "interpreter": [sys.executable, sys.version],
+        "requirements": hashes,
+        "installed": get_installed_state(),
+    }
+
+
+def get_changed_distributions(old_installed, new_installed):
+    """
+    Returns the normalized names of distributions added, removed or changed.
+
+    Folder names look like "PyYAML-6.0.1.dist-info", so an upgrade shows up
+    as one folder removed and another added. Names may contain dots, so only
+    the suffix and everything from the first "-" are dropped:
+
+    >>> sorted(get_changed_distributions({}, {"/site/zope.interface-5.4.0.dist-info": 1}))
+    ['zope-interface']
+    """
+    changed_paths = set(old_installed) ^ set(new_installed)
+    changed_paths.update(
+        path for path in set(old_installed) & set(new_installed) if old_installed[path] != new_installed[path]
+    )
+    return {get_folder_distribution(path) for path in changed_paths}
+
+
+def get_folder_distribution(path):
+    """Returns the normalized distribution name of a dist-info or egg-info folder."""
+    folder = os.path.basename(path)
+    for suffix in (".dist-info", ".egg-info"):
+        if folder.endswith(suffix):
+            folder = folder[: -len(suffix)]
+            break
+    return normalize_name(folder.split("-")[0])
+
+
+def load_env_cache(cache_path):
+    """Loads saved results, or returns None if there are none."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_env_cache(cache_path, fingerprint, results):
+    """Saves results and their fingerprint for the next run."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "results": results}, f)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logger.debug(f"Could not save environment cache {cache_path}: {e}")
+
+
+def check_requirements_incrementally(requirements, requirement_files, requirements_path="requirements.txt"):
+    """
+    Checks requirements, reusing saved results for anything that has not changed.
+
+    A saved result is reused when the interpreter is the same and the
+    requirement line is unchanged, unless the distribution it resolved to
+    changed. Failed results are always checked again when any installed
+    package changed, since a new package may now provide them.
+
+    Args:
+    - requirements (list): Compiled requirements from read_requirements().
+    - requirement_files (iterable): Files read to get the requirements.
+    - requirements_path (str): The top-level requirements file.
+
+    Returns:
+    - list: One result per requirement, as from check_requirement().
+    """
+    cache_path = get_env_cache_path(requirements_path)
+    fingerprint = get_environment_fingerprint(requirement_files)
+    saved = load_env_cache(cache_path)
+
+    if saved and saved["fingerprint"] == fingerprint:
+        saved_results = saved["results"]
+        if all(req["line"] in saved_results for req in requirements):
+            return [saved_results[req["line"]] for req in requirements]
+
+    reusable = {}
+    if saved and saved["fingerprint"]["interpreter"] == fingerprint["interpreter"]:
+        changed = get_changed_distributions(saved["fingerprint"]["installed"], fingerprint["installed"])
+        for line, result in saved["results"].items():
+            if result["status"] in ("success", "skipped") or not changed:
+                if "distribution" in result and result["distribution"] not in changed:
+                    reusable[line] = result
+
+    results = [reusable.get(req["line"]) or check_requirement(req) for req in requirements]
+    save_env_cache(cache_path, fingerprint, {req["line"]: result for req, result in zip(requirements, results)})
+    return results
 
 
 def check_dependencies_installed_in_dotvenv():
     """Checks if dependencies are installed in the virtual environment."""
-    dependencies = read_dependencies()
+    requirement_files = set()
+    requirements = read_requirements("requirements.txt", requirement_files)
+    return check_requirements_incrementally(requirements, requirement_files)
 
-    # Use list comprehensions for results
-    return [
-        {
-            "status": "success" if is_dependency_installed(dep) else "error",
-            "message": (
-                f"YAY! {dep} is installed in the .venv.\n{DIVIDER}"
-                if is_dependency_installed(dep)
-                else f"ERROR: {dep} is not installed in .venv. {MISSING_DEPENDENCY_MESSAGE}"
-            ),
+
+# Deep mode: import probes
+#
+# Checking package metadata cannot catch a package that is installed but
+# broken (for example, a native extension built for another Python). In
+# deep mode each dependency is imported in its own short-lived Python
+# process, several at a time, so a hang or crash only affects its own
+# result.
+
+PROBE_TIMEOUT_SECONDS = 60  # Give up on an import after this long
+PROBE_MEMORY_LIMIT_MB = 0  # Address-space limit per probe where supported (0 for none)
+PROBE_WORKERS = min(4, os.cpu_count() or 1)  # Probes running at the same time
+
+# The code each probe process runs. It prints one JSON line as its last output.
+# Only modules Python loads at startup (sys, time) are imported before the
+# timed import, so a dependency that uses json or traceback pays for them.
+IMPORT_PROBE_SCRIPT = r"""
+import sys, time
+module_name, memory_limit_mb = sys.argv[1], int(sys.argv[2])
+if memory_limit_mb > 0:
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+start = time.perf_counter()
+try:
+    __import__(module_name)
+    seconds = time.perf_counter() - start
+    result = {"outcome": "ok", "error": None, "traceback": None}
+except BaseException as e:
+    seconds = time.perf_counter() - start
+    import traceback
+    result = {"outcome": "failed", "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+import json
+result["seconds"] = seconds
+sys.stdout.flush()
+sys.stdout.write("\n" + json.dumps(result) + "\n")
+"""
+
+
+def get_probe_module(requirement):
+    """
+    Chooses the module to import for a requirement.
+
+    Prefers the import name that matches the package name, and otherwise
+    uses the first public import name (e.g. "yaml" for PyYAML).
+    """
+    dist = find_installed_distribution(requirement["name"])
+    names = [name for name in (dist["import_names"] if dist else []) if not name.startswith("_")]
+    preferred = requirement["name"].replace("-", "_").replace(".", "_").lower()
+    for name in names:
+        if name.lower() == preferred:
+            return name
+    return names[0] if names else requirement["name"]
+
+
+def probe_import(module_name, timeout=PROBE_TIMEOUT_SECONDS, memory_limit_mb=PROBE_MEMORY_LIMIT_MB):
+    """
+    Imports a module in a separate Python process.
+
+    Args:
+    - module_name (str): The module to import.
+    - timeout (float): Seconds before the probe is stopped.
+    - memory_limit_mb (int): Address-space limit for the probe process, in MB (0 for none).
+      This limits virtual memory, which packages such as torch reserve far
+      more of than they use, so set it generously.
+
+    Returns:
+    - dict: {"module", "outcome", "seconds", "error", "traceback", "returncode"}
+      where outcome is "ok", "failed", "timeout" or "crashed".
+    """
+    result = {"module": module_name, "outcome": None, "seconds": None, "error": None, "traceback": None, "returncode": None}
+    command = [sys.executable, "-c", IMPORT_PROBE_SCRIPT, module_name, str(memory_limit_mb)]
+    start = time.perf_counter()
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result.update(outcome="timeout", seconds=timeout, error=f"import did not finish within {timeout} seconds")
+        return result
+
+    result["returncode"] = completed.returncode
+    lines = completed.stdout.strip().splitlines()
+    try:
+        result.update(json.loads(lines[-1]))
+    except (IndexError, ValueError):
+        stderr_tail = "\n".join(completed.stderr.strip().splitlines()[-20:])
+        result.update(
+            outcome="crashed",
+            seconds=time.perf_counter() - start,
+            error=f"process exited with code {completed.returncode}",
+            traceback=stderr_tail or None,
+        )
+    return result
+
+
+def run_import_probes(
+    module_names, timeout=PROBE_TIMEOUT_SECONDS, memory_limit_mb=PROBE_MEMORY_LIMIT_MB, workers=PROBE_WORKERS
+):
+    """
+    Runs import probes for many modules, a few at a time.
+
+    Returns:
+    - list: Results from probe_import(), in the same order as module_names.
+    """
+    if not module_names:
+        return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda name: probe_import(name, timeout, memory_limit_mb), module_names))
+
+
+def check_dependencies_import_cleanly(timeout=PROBE_TIMEOUT_SECONDS, memory_limit_mb=PROBE_MEMORY_LIMIT_MB):
+    """Checks that each installed dependency can really be imported (deep mode)."""
+    requirements = [
+        req for req in read_requirements()
+        if req["name"] and not req["error"] and find_installed_distribution(req["name"])
+    ]
+    modules = [get_probe_module(req) for req in requirements]
+    results = []
+    for req, probe in zip(requirements, run_import_probes(modules, timeout, memory_limit_mb)):
+        name = req["name"]
+        if probe["outcome"] == "ok":
+            status = "success"
+            message = f"YAY! {name} imports cleanly as {probe['module']} ({probe['seconds'] * 1000:.0f} ms).\n{DIVIDER}"
+        else:
+            status = "error"
+            outcome = "timed out" if probe["outcome"] == "timeout" else probe["outcome"]
+            message = f"ERROR: {name} is installed but importing {probe['module']} {outcome}: {probe['error']}"
+            if probe["traceback"]:
+                message += f"\n{probe['traceback'].rstrip()}"
+            message += f"\n{DIVIDER}"
+        results.append({"status": status, "message": message, "name": name, "probe": probe})
+    return results
+
+
+# Import-time profiling
+#
+# Each dependency is imported in a fresh Python process started with
+# "-X importtime", which prints how long every module took to import.
+# The output is turned into a tree so the slowest packages and submodules
+# can be ranked.
+
+IMPORT_PROFILE_FILENAME = "00_report_env_imports.json"
+IMPORT_PROFILE_TOP = 10  # Number of entries shown in each ranking
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|( *)(\S+)\s*$")
+
+
+def parse_import_times(output):
+    """
+    Parses the output of "python -X importtime" into a tree.
+
+    Python prints a module after everything it imported, indented two
+    spaces per level, so children are collected until their parent's line
+    appears.
+
+    Args:
+    - output (str): The stderr text of the profiled process.
+
+    Returns:
+    - list: Top-level nodes, each {"name", "self_us", "cumulative_us", "children"}.
+    """
+    pending = {}
+    for line in output.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = len(indent) // 2
+        node = {
+            "name": name,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "children": pending.pop(depth + 1, []),
         }
-        for dep in dependencies
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def iter_import_nodes(nodes):
+    """Yields every node in an import tree."""
+    for node in nodes:
+        yield node
+        yield from iter_import_nodes(node["children"])
+
+
+def profile_import(module_name, timeout=PROBE_TIMEOUT_SECONDS):
+    """
+    Imports a module in a fresh process under "-X importtime".
+
+    Returns:
+    - dict: {"module", "outcome", "cumulative_us", "self_us", "tree", "error"}
+    """
+    result = {"module": module_name, "outcome": "ok", "cumulative_us": None, "self_us": None, "tree": None, "error": None}
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module_name}"]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result.update(outcome="timeout", error=f"import did not finish within {timeout} seconds")
+        return result
+
+    roots = parse_import_times(completed.stderr)
+    # Modules loaded at interpreter startup (site, encodings...) are also
+    # listed; the requested module is the last top-level entry.
+    tree = next((node for node in reversed(roots) if node["name"] == module_name), None)
+    if completed.returncode != 0 or tree is None:
+        last_line = (completed.stderr.strip().splitlines() or [""])[-1]
+        result.update(outcome="failed", error=last_line or f"process exited with code {completed.returncode}")
+        return result
+    result.update(cumulative_us=tree["cumulative_us"], self_us=tree["self_us"], tree=tree)
+    return result
+
+
+def profile_dependency_imports(requirements, timeout=PROBE_TIMEOUT_SECONDS):
+    """
+    Profiles the import time of each installed requirement, one at a time
+    so the timings do not compete for the CPU.
+
+    Returns:
+    - list: One entry per requirement: {"name", "module", "outcome", "cumulative_us", ...}
+    """
+    profiles = []
+    for req in requirements:
+        profile = profile_import(get_probe_module(req), timeout)
+        profile["name"] = req["name"]
+        profiles.append(profile)
+    return profiles
+
+
+def get_import_profile_text(profiles, top=IMPORT_PROFILE_TOP):
+    """
+    Formats import profiles as ranked tables.
+
+    Returns:
+    - str: The slowest packages by total import time, then the slowest
+      individual modules by their own import time.
+    """
+    lines = ["Dependency import times (slowest first):", "-" * 40]
+    ranked = sorted(profiles, key=lambda p: p["cumulative_us"] or 0, reverse=True)
+    for profile in ranked[:top]:
+        if profile["outcome"] == "ok":
+            lines.append(f"{profile['cumulative_us'] / 1000:10.1f} ms  {profile['name']} ({profile['module']})")
+        else:
+            lines.append(f"{'-':>10}     {profile['name']} ({profile['module']}): {profile['error']}")
+
+    modules = {}
+    for profile in profiles:
+        if profile["tree"]:
+            for node in iter_import_nodes([profile["tree"]]):
+                modules[node["name"]] = max(modules.get(node["name"], 0), node["self_us"])
+    lines += ["", "Slowest modules by their own import time:", "-" * 40]
+    for name, self_us in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"{self_us / 1000:10.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def write_import_profile_json(profiles, filename=IMPORT_PROFILE_FILENAME):
+    """Saves import profiles, including the full import trees, as JSON."""
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump({"python": platform.python_version(), "executable": sys.executable, "profiles": profiles}, f, indent=2)
+
+
+def check_dependency_import_times(timeout=PROBE_TIMEOUT_SECONDS, top=IMPORT_PROFILE_TOP):
+    """Ranks installed dependencies by how long they take to import."""
+    requirements = [
+        req for req in read_requirements()
+        if req["name"] and not req["error"] and find_installed_distribution(req["name"])
     ]
+    profiles = profile_dependency_imports(requirements, timeout)
+    write_import_profile_json(profiles)
+    failed = [profile for profile in profiles if profile["outcome"] != "ok"]
+    return {
+        "status": "error" if failed else "success",
+        "message": f"{get_import_profile_text(profiles, top)}\n\nFull import trees saved to {IMPORT_PROFILE_FILENAME}.",
+        "profiles": profiles,
+    }
+
+
+# Baseline snapshots
+#
+# A baseline saves the current state in named sections, each with a hash
+# of its contents. Comparing hashes the current sections the same way and
+# only looks inside the sections whose hashes differ, so a check with
+# nothing changed costs little more than gathering the state.
+
+BASELINE_FILENAME = "00_baseline_env.json"
+BASELINE_SCHEMA = "nw-diagnostics/baseline"
+BASELINE_VERSION = 1
+
+
+def get_section_hash(data):
+    """Returns a hash of a section's contents that does not depend on key order."""
+    text = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def save_baseline(sections, passed, path=BASELINE_FILENAME):
+    """
+    Saves the sections as the baseline to compare against later.
+
+    Args:
+    - sections (dict): Section name -> JSON-friendly data.
+    - passed (bool): Whether every check passed when the baseline was saved.
+    - path (str): The baseline file.
 
+    Returns:
+    - dict: {"status", "message"}
+    """
+    baseline = {
+        "schema": BASELINE_SCHEMA,
+        "version": BASELINE_VERSION,
+        "saved_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "passed": passed,
+        "sections": {
+            name: {"hash": get_section_hash(data), "data": data} for name, data in sections.items()
+        },
+    }
+    try:
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=1, default=str)
+        os.replace(temp_path, path)
+    except OSError as e:
+        return {"status": "error", "message": f"ERROR: Could not save the baseline to {path}: {e}"}
+    return {"status": "success", "message": f"Saved the baseline to {path} ({len(sections)} sections)."}
 
-def check_env(fn):
+
+def diff_section(old, new):
+    """
+    Lists what changed between two versions of a section's data.
+
+    Returns:
+    - list: One line of text per change.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = [f"added {key}: {new[key]}" for key in new if key not in old]
+        changes += [f"removed {key}: {old[key]}" for key in old if key not in new]
+        changes += [f"changed {key}: {old[key]} -> {new[key]}" for key in new if key in old and old[key] != new[key]]
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        old_items, new_items = set(map(str, old)), set(map(str, new))
+        changes = [f"added {item}" for item in map(str, new) if item not in old_items]
+        changes += [f"removed {item}" for item in map(str, old) if item not in new_items]
+        return changes or ["order changed"]
+    return [f"changed: {old} -> {new}"]
+
+
+def compare_baseline(sections, path=BASELINE_FILENAME):
+    """
+    Compares the sections with the saved baseline.
+
+    Args:
+    - sections (dict): Section name -> JSON-friendly data, as for save_baseline().
+    - path (str): The baseline file.
+
+    Returns:
+    - list: {"status", "message", "section", "changes"} for each section that
+      changed, or one result saying nothing changed.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return [
+            {
+                "status": "warning",
+                "message": f"WARNING: No baseline found in {path}. Save one with --save-baseline.",
+                "section": None,
+                "changes": [],
+            }
+        ]
+
+    saved = baseline.get("sections", {})
+    saved_at = baseline.get("saved_at", "an unknown time")
+    results = []
+    for name, data in sections.items():
+        if name not in saved:
+            continue  # Sections added after the baseline was saved have nothing to compare
+        if saved[name]["hash"] == get_section_hash(data):
+            continue
+        changes = diff_section(saved[name]["data"], data)
+        lines = "\n".join(f"  {change}" for change in changes)
+        results.append(
+            {
+                "status": "warning",
+                "message": f"DRIFT: {name} changed since the baseline saved at {saved_at}:\n{lines}",
+                "section": name,
+                "changes": changes,
+            }
+        )
+    if not results:
+        results.append(
+            {
+                "status": "success",
+                "message": f"YAY! Nothing changed since the baseline saved at {saved_at}.",
+                "section": None,
+                "changes": [],
+            }
+        )
+    return results
+
+
+def get_baseline_sections(results):
+    """
+    Gathers the state saved in the env baseline.
+
+    Installed distributions are read from the dist-info folder names, so
+    this stays fast with thousands of installed packages.
+
+    Args:
+    - results (list): Results from the env checks.
+
+    Returns:
+    - dict: {"sys_path", "installed_distributions", "requirement_results"}
+    """
+    installed = {}
+    for path in get_installed_state():
+        folder = os.path.basename(path).rsplit(".", 1)[0]  # e.g. "PyYAML-6.0.1"
+        name, _, version = folder.partition("-")
+        installed.setdefault(normalize_name(name), version)  # The first one on sys.path is used
+
+    requirements = {
+        result["name"]: f"{result['status']}, installed {result['installed'] or 'none'}, need {result['required'] or 'any'}"
+        for result in results
+        if "required" in result and result.get("name")
+    }
+    return {
+        "sys_path": list(sys.path),
+        "installed_distributions": installed,
+        "requirement_results": requirements,
+    }
+
+
+def get_options(argv=None):
+    """
+    Reads the env diagnostic's options from the command line.
+
+    Options meant for other diagnostics are ignored.
+
+    Returns:
+    - argparse.Namespace: The options.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--deep", action="store_true", help="also import each dependency in its own process")
+    parser.add_argument("--probe-timeout", type=float, default=PROBE_TIMEOUT_SECONDS)
+    parser.add_argument(
+        "--probe-memory-mb", type=int, default=PROBE_MEMORY_LIMIT_MB, help="address-space limit per probe (0 for none)"
+    )
+    parser.add_argument("--profile-imports", action="store_true", help="rank dependencies by import time")
+    parser.add_argument("--profile-top", type=int, default=IMPORT_PROFILE_TOP)
+    parser.add_argument("--save-baseline", action="store_true", help="save the current state as the baseline")
+    parser.add_argument("--compare-baseline", action="store_true", help="report what changed since the baseline")
+    parser.add_argument("--watch", action="store_true", help="check again whenever the environment changes")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_INTERVAL_SECONDS)
+    options, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return options
+
+
+# Structured report
+#
+# Alongside the text report, each diagnostic writes one JSON record per
+# line (NDJSON), so other tools can read the results without parsing text.
+
+RECORDS_FILENAME = "00_report_env.ndjson"
+RECORD_SCHEMA = "nw-diagnostics/report"
+RECORD_VERSION = 1
+
+record_encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+record_stream = None
+record_counts = {}  # Records written so far, by status
+
+
+def open_record_stream():
+    """Starts this diagnostic's NDJSON report with a record describing the run."""
+    global record_stream
+    close_record_stream()
+    record_counts.clear()
+    record_stream = open(RECORDS_FILENAME, "w", encoding="utf-8")
+    atexit.unregister(close_record_stream)
+    atexit.register(close_record_stream)
+    emit_record(
+        "run",
+        "started",
+        "info",
+        value={
+            "python_version": platform.python_version(),
+            "executable": sys.executable,
+            "platform": sys.platform,
+            "working_directory": os.getcwd(),
+        },
+    )
+
+
+def emit_record(record_type, name, status, value=None, message=None, duration_ms=None):
+    """
+    Writes one record to the NDJSON report, if it was started.
+
+    Args:
+    - record_type (str): "run", "fact", "check" or "summary".
+    - name (str): What the record is about, e.g. "python_version".
+    - status (str): "success", "warning", "error", "skipped" or "info".
+    - value: Any JSON-friendly data.
+    - message (str): The text shown in the text report, if any.
+    - duration_ms (float): How long it took to get the value.
+    """
+    if record_stream is None:
+        return
+    record = {
+        "schema": RECORD_SCHEMA,
+        "version": RECORD_VERSION,
+        "diagnostic": "env",
+        "type": record_type,
+        "name": name,
+        "status": status,
+        "value": value,
+        "message": message,
+        "duration_ms": duration_ms,
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+    for chunk in record_encoder.iterencode(record):
+        record_stream.write(chunk)
+    record_stream.write("\n")
+    record_counts[status] = record_counts.get(status, 0) + 1
+
+
+def close_record_stream():
+    """Finishes the NDJSON report with a summary record counting each status."""
+    global record_stream
+    if record_stream is not None:
+        emit_record("summary", "finished", "info", value=dict(record_counts))
+        record_stream.close()
+        record_stream = None
+
+
+# Check registry and scheduler
+#
+# Each check is registered with the names of the checks it depends on.
+# Checks whose dependencies have passed run at the same time on a thread
+# pool. When a check fails, only the checks that depend on it are
+# skipped. Results are always reported in registration order.
+
+CHECK_WORKERS = 4  # Checks running at the same time
+ENV_CHECKS = []
+
+
+def register_check(name, function, depends_on=(), option=None, arguments=None, watches=(), after=()):
+    """
+    Adds a check to ENV_CHECKS.
+
+    Args:
+    - name (str): A short unique name, used in depends_on.
+    - function (callable): Returns a result dict or a list of result dicts.
+    - depends_on (iterable): Names of checks that must pass first.
+      Checks that are not selected for this run are ignored.
+    - option (str): If given, the check only runs when this option is set.
+    - arguments (callable): Given the options, returns the arguments for function.
+    - watches (iterable): Inputs from get_watch_snapshot() the check reads.
+      In watch mode, the check runs again when one of them changes.
+    - after (iterable): Names of checks that must finish first, whether or not
+      they pass. Used to keep checks that compete for the CPU apart.
+    """
+    ENV_CHECKS.append(
+        {
+            "name": name,
+            "function": function,
+            "depends_on": list(depends_on),
+            "option": option,
+            "arguments": arguments or (lambda options: ()),
+            "watches": list(watches),
+            "after": list(after),
+        }
+    )
+
+
+def run_check(check, options):
+    """
+    Runs one check.
+
+    Returns:
+    - tuple: The check's results, and how long it took in milliseconds.
+      An unexpected exception becomes an error result.
+    """
+    start = time.perf_counter()
+    try:
+        result = check["function"](*check["arguments"](options))
+    except Exception as e:
+        result = {"status": "error", "message": f"ERROR: The {check['name']} check stopped unexpectedly: {e}"}
+    duration_ms = (time.perf_counter() - start) * 1000
+    return (result if isinstance(result, list) else [result]), duration_ms
+
+
+def run_checks(checks, options, workers=CHECK_WORKERS, reuse=None):
+    """
+    Runs checks, each as soon as the checks it depends on have passed.
+
+    Args:
+    - checks (list): Entries added by register_check().
+    - options (argparse.Namespace): Options from get_options().
+    - workers (int): Checks running at the same time.
+    - reuse (dict): Check name -> (results, duration_ms) from an earlier run.
+      These checks are not run again; their earlier results are used.
+
+    Returns:
+    - list: (check, results, duration_ms) triples, in the same order as checks.
+      Skipped checks have a duration of 0.
+    """
+    selected = [check for check in checks if not check["option"] or getattr(options, check["option"])]
+    selected_names = {check["name"] for check in selected}
+    outcomes = {}
+    durations = {}
+    not_passed = set()
+    for name, (results, duration_ms) in (reuse or {}).items():
+        if name in selected_names:
+            outcomes[name], durations[name] = results, duration_ms
+            # Skipped counts as not passed, as when a check is skipped below
+            if any(result["status"] in ("error", "skipped") for result in results):
+                not_passed.add(name)
+    waiting = [check for check in selected if check["name"] not in outcomes]
+    running = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while waiting or running:
+            progress = True
+            while progress:
+                progress = False
+                for check in list(waiting):
+                    depends_on = [name for name in check["depends_on"] if name in selected_names]
+                    blocked = [name for name in depends_on if name in not_passed]
+                    after = [name for name in check["after"] if name in selected_names]
+                    if blocked:
+                        outcomes[check["name"]] = [
+                            {
+                                "status": "skipped",
+                                "message": f"SKIPPED: {check['name']} (needs {', '.join(blocked)} to pass first).",
+                            }
+                        ]
+                        not_passed.add(check["name"])
+                    elif all(name in outcomes for name in depends_on + after):
+                        running[executor.submit(run_check, check, options)] = check
+                    else:
+                        continue
+                    waiting.remove(check)
+                    progress = True
+
+            if not running:
+                # Whatever is still waiting depends on itself in a loop
+                for check in waiting:
+                    outcomes[check["name"]] = [
+                        {"status": "error", "message": f"ERROR: {check['name']} has circular dependencies."}
+                    ]
+                break
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                check = running.pop(future)
+                results, durations[check["name"]] = future.result()
+                outcomes[check["name"]] = results
+                if any(result["status"] == "error" for result in results):
+                    not_passed.add(check["name"])
+
+    return [(check, outcomes[check["name"]], durations.get(check["name"], 0.0)) for check in selected]
+
+
+register_check("dotvenv_folder", check_for_dotvenv_folder, watches=["dotvenv"])
+register_check(
+    "dotvenv_active",
+    check_dotvenv_is_active,
+    depends_on=["dotvenv_folder"],
+    watches=["dotvenv"],
+)
+register_check("requirements_file", check_requirements_file_exists, watches=["requirements"])
+register_check(
+    "dependencies_installed",
+    check_dependencies_installed_in_dotvenv,
+    depends_on=["dotvenv_active", "requirements_file"],
+    watches=["requirements", "site_packages"],
+)
+register_check(
+    "dependencies_import",
+    check_dependencies_import_cleanly,
+    depends_on=["dotvenv_active", "requirements_file"],
+    option="deep",
+    arguments=lambda options: (options.probe_timeout, options.probe_memory_mb),
+    watches=["requirements", "site_packages"],
+)
+register_check(
+    "dependency_import_times",
+    check_dependency_import_times,
+    depends_on=["dotvenv_active", "requirements_file"],
+    after=["dependencies_import"],  # Import probes running alongside would skew the timings
+    option="profile_imports",
+    arguments=lambda options: (options.probe_timeout, options.profile_top),
+    watches=["requirements", "site_packages"],
+)
+
+
+def emit_check_record(check, result, duration_ms):
+    """
+    Writes one check result to the NDJSON report.
+
+    Any keys besides status and message (such as the requirement checked or
+    the probe outcome) become the record's value.
+    """
+    details = {key: value for key, value in result.items() if key not in ("status", "message")}
+    emit_record(
+        "check",
+        check["name"],
+        result["status"],
+        value=details or None,
+        message=result["message"].strip(),
+        duration_ms=duration_ms,
+    )
+
+
+def log_check_results(check, check_results, duration_ms):
+    """Logs each result of a check, separated by dividers, and records it in the NDJSON report."""
+    for result in check_results:
+        logger.info(result["message"])  # Log the message of each result
+        if not result["message"].endswith(DIVIDER):
+            logger.info(DIVIDER)  # Separate each result with a divider
+        emit_check_record(check, result, duration_ms)
+
+
+def check_env(fn, options=None):
     """
     Generates and prints debug information about the current Python environment.
 
     Args:
     - fn (str): Path to the file for which the information should be generated.
+    - options (argparse.Namespace): Options from get_options(). Defaults to none set.
     """
-    logging.info(DIVIDER)
-    logging.info("Welcome to NW Diagnostics!")
-    logging.info(
+    if options is None:
+        options = get_options([])
+    setup_report_sink()
+    open_record_stream()
+    logger.info(DIVIDER)
+    logger.info("Welcome to NW Diagnostics!")
+    logger.info(
         f"At: {datetime.date.today()} at {datetime.datetime.now().strftime('%I:%M %p')}"
     )
 
     results = []
-    checks = [
-        check_for_dotvenv_folder,
-        check_dotvenv_is_active,
-        check_requirements_file_exists,
-        check_dependencies_installed_in_dotvenv,
-    ]
+    outcomes = run_checks(ENV_CHECKS, options)
+    for check, check_results, duration_ms in outcomes:
+        log_check_results(check, check_results, duration_ms)
+        results.extend(check_results)
+    last_run["options"] = options
+    last_run["outcomes"] = {check["name"]: (check_results, duration_ms) for check, check_results, duration_ms in outcomes}
 
-    for check in checks:
-        result = check()
-        if isinstance(result, list):
-            for individual_result in result:
-                logging.info(individual_result["message"])
-            results.extend(result)
-            # Check if any individual check resulted in an error
-            if any(item["status"] == "error" for item in result):
-                break
-        else:
-            logging.info(result["message"])  # Log the message of each result
-            results.append(result)
-            logging.info(DIVIDER)  # Separate each result with a divider
-
-        # if result exists and the type is dict and the status is error, break
-        if result and isinstance(result, dict):
-            if result["status"] == "error":
-                break
+    baseline_results = []
+    if options.compare_baseline or options.save_baseline:
+        sections = get_baseline_sections(results)
+        if options.compare_baseline:
+            baseline_results.extend(compare_baseline(sections))
+        if options.save_baseline:
+            passed = all(result["status"] != "error" for result in results)
+            baseline_results.append(save_baseline(sections, passed))
+    for result in baseline_results:
+        logger.info(result["message"])
+        logger.info(DIVIDER)
+        name = f"baseline_{result['section']}" if result.get("section") else "baseline"
+        emit_record("check", name, result["status"], value=result.get("changes"), message=result["message"])
+    results.extend(baseline_results)
 
+    close_record_stream()
     return results
 
 
+# Watch mode
+#
+# After a full run, the inputs the checks read are polled a few times a
+# second. Polling only stats a handful of files and folders, so an idle
+# watch uses almost no CPU. When an input changes, only the checks that
+# watch it (and the checks that depend on those) run again, and only the
+# results that changed are shown.
+
+WATCH_INTERVAL_SECONDS = 0.5  # Time between polls
+
+last_run = {"options": None, "outcomes": {}}  # The latest results, kept for watch mode
+
+
+def get_file_state(path):
+    """Returns a file's modification time and size, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def get_requirement_files(path, state):
+    """
+    Returns the requirements file and the files it includes.
+
+    Cached by the file's state, so the file is only read again after it changes.
+    """
+    if state is None:
+        return (path,)
+    files = set()
+    try:
+        read_requirements(path, files)
+    except OSError:
+        pass
+    return tuple(sorted(files | {path}))
+
+
+def get_watch_snapshot(requirements_path="requirements.txt"):
+    """
+    Describes the inputs the env checks read, cheaply enough to poll.
+
+    Site-packages folders are compared by their own modification time,
+    which changes when a package is installed, upgraded or removed.
+    Environment variables are not watched: this process keeps its own, so
+    activating .venv or changing PATH in another shell cannot be seen.
+
+    Returns:
+    - dict: {"requirements", "dotvenv", "site_packages"}
+    """
+    requirement_files = get_requirement_files(requirements_path, get_file_state(requirements_path))
+    return {
+        "requirements": {path: get_file_state(path) for path in requirement_files},
+        "dotvenv": [get_file_state(".venv"), get_file_state(os.path.join(".venv", "pyvenv.cfg"))],
+        "site_packages": {folder: get_file_state(folder) for folder in sys.path if folder},
+    }
+
+
+def get_affected_checks(changed_inputs, checks=ENV_CHECKS):
+    """Returns the names of checks that watch a changed input or depend on such a check."""
+    affected = {check["name"] for check in checks if set(check["watches"]) & changed_inputs}
+    growing = True
+    while growing:
+        growing = False
+        for check in checks:
+            if check["name"] not in affected and set(check["depends_on"]) & affected:
+                affected.add(check["name"])
+                growing = True
+    return affected
+
+
+def rerun_changed_checks(old_snapshot, new_snapshot):
+    """
+    Runs again the checks affected by a change and logs only the results that changed.
+
+    Args:
+    - old_snapshot (dict): From get_watch_snapshot() before the change.
+    - new_snapshot (dict): From get_watch_snapshot() after the change.
+
+    Returns:
+    - list: The new results of checks whose results changed.
+    """
+    global distribution_index
+    options = last_run["options"] if last_run["options"] is not None else get_options([])
+    changed_inputs = {name for name in new_snapshot if old_snapshot.get(name) != new_snapshot[name]}
+    if not changed_inputs:
+        return []
+    if "site_packages" in changed_inputs:
+        with distribution_index_lock:
+            distribution_index = None  # Scan the installed packages again
+
+    affected = get_affected_checks(changed_inputs)
+    previous = last_run["outcomes"]
+    reuse = {name: outcome for name, outcome in previous.items() if name not in affected}
+    start = time.perf_counter()
+    outcomes = run_checks(ENV_CHECKS, options, reuse=reuse)
+    duration_ms = (time.perf_counter() - start) * 1000
+    last_run["outcomes"] = {check["name"]: (check_results, ms) for check, check_results, ms in outcomes}
+
+    checked = sorted(name for name in affected if name in last_run["outcomes"])
+    logger.info(
+        f"Changed: {', '.join(sorted(changed_inputs))}. "
+        f"Checked again: {', '.join(checked) or 'nothing'} ({duration_ms:.0f} ms)."
+    )
+    changed_results = []
+    for check, check_results, ms in outcomes:
+        old_messages = {result["message"] for result in previous.get(check["name"], ([], 0.0))[0]}
+        new_results = [result for result in check_results if result["message"] not in old_messages]
+        log_check_results(check, new_results, ms)
+        changed_results.extend(new_results)
+    if not changed_results:
+        logger.info("No results changed.")
+        logger.info(DIVIDER)
+    return changed_results
+
+
+def watch_env(fn, options=None, interval=WATCH_INTERVAL_SECONDS):
+    """
+    Runs the env checks, then runs the affected ones again whenever an input
+    changes, until interrupted with Ctrl+C.
+
+    Args:
+    - fn (str): Path to the file for which the information should be generated.
+    - options (argparse.Namespace): Options from get_options(). Defaults to none set.
+    - interval (float): Seconds between polls.
+    """
+    check_env(fn, options)
+    snapshot = get_watch_snapshot()
+    logger.info("Watching for changes. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(interval)
+            new_snapshot = get_watch_snapshot()
+            if new_snapshot != snapshot:
+                rerun_changed_checks(snapshot, new_snapshot)
+                snapshot = new_snapshot
+    except KeyboardInterrupt:
+        logger.info("Stopped watching.")
+
+
 def run_diagnostic_env(namespace=None):
     """Function to run the main diagnostic checks."""
-    if namespace:
+    options = get_options()
+    if options.watch:
+        watch_env(__file__, options, options.watch_interval)
+    elif namespace:
         check_env_func = namespace.get("check_env")
         if callable(check_env_func):
-            check_env_func(__file__)
+            check_env_func(__file__, options)
     else:
-        check_env(__file__)
+        check_env(__file__, options)
@@ -18,8 +18,8 @@ This is a utility module. It's designed to be imported and its functions
   used in other scripts, rather than being executed directly.
 
 EXTERNAL DEPENDENCIES:
-This module requires an external dependency, and should be run in a virtual
-  environment that includes the dependency.
+pika is optional. It is only imported to log in to RabbitMQ (--rabbitmq-login),
+  and without it the login is checked with the Python standard library.
 
 USAGE:
 Execute the function, which will display information 
@@ -37,38 +37,309 @@ To learn more or contribute, see the repository and its documentation.
 
 # Import from Python Standard Library
 
+import argparse
+import asyncio
+import atexit
+import base64
+import collections
 import datetime
+import functools
+import errno
+import json
 import logging
+import logging.handlers
+import os
+import platform
+import queue
+import re
+import select
+import socket
+import struct
 import subprocess
 import sys
+import time
+import urllib.request
+
+# Setup logging
+#
+# Every NW diagnostic run in the same process shares one background
+# thread that writes the reports, so checks only put lines on a queue.
+# Each diagnostic has its own logger and its own buffered report file.
 
-# Import from third party libraries
-# Must be installed into our virtual environment first
+OUTPUT_FILENAME = "00_report_rabbitmq.txt"
+REPORT_LOGGER_NAME = "nw_diagnostics"
+REPORT_BUFFER_RECORDS = 100  # Report lines held in memory before writing
 
-import pika
+logger = logging.getLogger(f"{REPORT_LOGGER_NAME}.rabbitmq")
 
-# Set up basic logging
 
-OUTPUT_FILENAME = "00_report_rabbitmq.txt"
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    handlers=[logging.FileHandler(OUTPUT_FILENAME, mode="w"), logging.StreamHandler()],
-)
+def get_report_listener():
+    """
+    Returns the report writer thread shared by all diagnostics in this
+    process, starting it on first use.
+    """
+    parent = logging.getLogger(REPORT_LOGGER_NAME)
+    listener = getattr(parent, "report_listener", None)
+    if listener is None:
+        report_queue = queue.SimpleQueue()
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter("%(message)s"))
+        listener = logging.handlers.QueueListener(report_queue, console_handler, respect_handler_level=True)
+        parent.addHandler(logging.handlers.QueueHandler(report_queue))
+        parent.setLevel(logging.INFO)
+        parent.propagate = False
+        listener.start()
+        atexit.register(close_report_listener, listener)
+        parent.report_listener = listener
+    return listener
+
+
+def close_report_listener(listener):
+    """Writes any queued and buffered report lines, then closes the report files."""
+    listener.stop()
+    for handler in listener.handlers:
+        target = getattr(handler, "target", None)
+        handler.close()
+        if target is not None:
+            target.close()
+
+
+def setup_report_sink():
+    """Starts this diagnostic's report file. Does nothing if it was already started."""
+    if getattr(logger, "report_sink", None) is not None:
+        return
+    listener = get_report_listener()
+    file_handler = logging.FileHandler(OUTPUT_FILENAME, mode="w")
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    report_sink = logging.handlers.MemoryHandler(
+        REPORT_BUFFER_RECORDS, flushLevel=logging.ERROR, target=file_handler
+    )
+    report_sink.addFilter(logging.Filter(logger.name))  # Only this diagnostic's lines
+    listener.handlers = listener.handlers + (report_sink,)
+    logger.report_sink = report_sink
+
 
 # Declare additional program constants
 
 DIVIDER = "=" * 70  # A string divider for cleaner output formatting
+RABBITMQ_HOST = "localhost"
+RABBITMQ_PORT = 5672  # AMQP
+RABBITMQ_USERNAME = "guest"  # RabbitMQ's default user, for --rabbitmq-login
+RABBITMQ_PASSWORD = "guest"
+CONNECT_TIMEOUT_MS = 250  # Time limit for connecting to the port
+HANDSHAKE_TIMEOUT_MS = 1000  # Time limit for the broker to answer
+RABBITMQCTL_TIMEOUT_SECONDS = 15  # Time limit for rabbitmqctl status (deep mode)
+RABBITMQCTL_COMMAND = "rabbitmqctl.bat" if sys.platform == "win32" else "rabbitmqctl"
+
+# Where RabbitMQ is usually installed
+CHOCO_RABBITMQ_DIR = r"C:\ProgramData\chocolatey\lib\rabbitmq\tools"
+WINDOWS_RABBITMQ_DIR = r"C:\Program Files\RabbitMQ Server"
+RABBITMQ_LIB_DIR = "/usr/lib/rabbitmq/lib"  # Linux packages: rabbitmq_server-<version>
+RABBITMQ_SBIN_DIRS = [
+    "/usr/sbin",
+    "/usr/lib/rabbitmq/bin",
+    "/usr/local/sbin",
+    "/opt/homebrew/sbin",
+    "/usr/local/opt/rabbitmq/sbin",
+    "/opt/homebrew/opt/rabbitmq/sbin",
+]
+HOMEBREW_CELLARS = ["/opt/homebrew/Cellar", "/usr/local/Cellar"]
+DPKG_STATUS_PATH = "/var/lib/dpkg/status"
+
+# Structured report
+#
+# Alongside the text report, each diagnostic writes one JSON record per
+# line (NDJSON), so other tools can read the results without parsing text.
+
+RECORDS_FILENAME = "00_report_rabbitmq.ndjson"
+RECORD_SCHEMA = "nw-diagnostics/report"
+RECORD_VERSION = 1
+
+record_encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+record_stream = None
+record_counts = {}  # Records written so far, by status
+
+
+def open_record_stream():
+    """Starts this diagnostic's NDJSON report with a record describing the run."""
+    global record_stream
+    close_record_stream()
+    record_counts.clear()
+    record_stream = open(RECORDS_FILENAME, "w", encoding="utf-8")
+    atexit.unregister(close_record_stream)
+    atexit.register(close_record_stream)
+    emit_record(
+        "run",
+        "started",
+        "info",
+        value={
+            "python_version": platform.python_version(),
+            "executable": sys.executable,
+            "platform": sys.platform,
+            "working_directory": os.getcwd(),
+        },
+    )
+
+
+def emit_record(record_type, name, status, value=None, message=None, duration_ms=None):
+    """
+    Writes one record to the NDJSON report, if it was started.
+
+    Args:
+    - record_type (str): "run", "fact", "check" or "summary".
+    - name (str): What the record is about, e.g. "python_version".
+    - status (str): "success", "warning", "error", "skipped" or "info".
+    - value: Any JSON-friendly data.
+    - message (str): The text shown in the text report, if any.
+    - duration_ms (float): How long it took to get the value.
+    """
+    if record_stream is None:
+        return
+    record = {
+        "schema": RECORD_SCHEMA,
+        "version": RECORD_VERSION,
+        "diagnostic": "rabbitmq",
+        "type": record_type,
+        "name": name,
+        "status": status,
+        "value": value,
+        "message": message,
+        "duration_ms": duration_ms,
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+    for chunk in record_encoder.iterencode(record):
+        record_stream.write(chunk)
+    record_stream.write("\n")
+    record_counts[status] = record_counts.get(status, 0) + 1
+
+
+def close_record_stream():
+    """Finishes the NDJSON report with a summary record counting each status."""
+    global record_stream
+    if record_stream is not None:
+        emit_record("summary", "finished", "info", value=dict(record_counts))
+        record_stream.close()
+        record_stream = None
+
+
+# PATH index
+#
+# Tools are looked up in an index of every file on PATH, built with one
+# os.scandir() pass per PATH folder the first time a tool is looked up.
+# Each lookup is then a dictionary access instead of another walk of PATH,
+# which is slow with long PATHs on network or Windows-mounted folders.
+
+
+def get_executable_extensions():
+    """
+    Returns the file extensions that make a file runnable on Windows, in
+    the order they are tried, or None on other systems.
+    """
+    if os.name != "nt":
+        return None
+    pathext = os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD")
+    return [extension.lower() for extension in pathext.split(os.pathsep) if extension]
+
+
+@functools.lru_cache(maxsize=None)
+def get_path_index():
+    """
+    Lists the files in every PATH folder, once per run.
+
+    On Windows, only files with a PATHEXT extension are kept, under both
+    their full name ("git.exe") and the command name ("git"). Names are
+    lower case there, as lookups are not case sensitive.
+
+    Returns:
+    - dict: Command name -> list of paths, in the order they are found on PATH.
+    """
+    extensions = get_executable_extensions()
+    index = {}
+    folders_seen = set()
+    for folder in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        folder = folder.strip('"')  # Windows allows quoted PATH entries
+        if not folder:
+            continue
+        folder_key = os.path.normcase(os.path.abspath(folder))
+        if folder_key in folders_seen:
+            continue  # The same folder listed twice on PATH
+        folders_seen.add(folder_key)
+        try:
+            with os.scandir(folder) as entries:
+                names = [entry.name for entry in entries]
+        except OSError:
+            continue  # Missing or unreadable folder
+
+        if extensions is None:
+            for name in names:
+                index.setdefault(name, []).append(os.path.join(folder, name))
+            continue
+        found = []
+        for name in names:
+            stem, extension = os.path.splitext(name.lower())
+            if extension in extensions:
+                found.append((extensions.index(extension), stem, name))
+        for rank, stem, name in sorted(found):  # git.com runs before git.exe
+            path = os.path.join(folder, name)
+            index.setdefault(name.lower(), []).append(path)
+            index.setdefault(stem, []).append(path)
+    return index
+
+
+def is_executable_file(path):
+    """Returns True if path is a file this user can run."""
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def find_executable(command):
+    """
+    Finds the file that runs for a command, like shutil.which().
+
+    Args:
+    - command (str): The command name, e.g. "git".
+
+    Returns:
+    - str: The full path, or None if the command is not on PATH.
+    """
+    key = command.lower() if os.name == "nt" else command
+    for path in get_path_index().get(key, []):
+        if is_executable_file(path):
+            return path
+    return None
+
+
+def get_executable_paths(command):
+    """
+    Lists every copy of a command on PATH. The first one is the one that
+    runs; the others are shadowed by it. Links to the same file count once.
+
+    Args:
+    - command (str): The command name, e.g. "python3".
+
+    Returns:
+    - list: Full paths, in PATH order.
+    """
+    key = command.lower() if os.name == "nt" else command
+    paths = []
+    real_paths = set()
+    for path in get_path_index().get(key, []):
+        if not is_executable_file(path):
+            continue
+        real_path = os.path.normcase(os.path.realpath(path))
+        if real_path not in real_paths:
+            real_paths.add(real_path)
+            paths.append(path)
+    return paths
+
 
 # Define program functions
 
-import os
 
 def get_choco_rabbitmq_path():
     """Find the path of RabbitMQ installation by Chocolatey."""
     # Define the general directory where Chocolatey installs software
     # Use a raw string to avoid issues with backslashes (preface with r)
-    base_choco_dir = r"C:\ProgramData\chocolatey\lib\rabbitmq\tools"
+    base_choco_dir = CHOCO_RABBITMQ_DIR
     
     # Check if the base choco directory exists
     if os.path.exists(base_choco_dir):
@@ -92,29 +363,1109 @@ def get_choco_rabbitmq_path():
     return None
 
 
+def find_latest_version_folder(base_dir, prefix):
+    """
+    Finds the folder with the highest version number among base_dir/<prefix><version>.
+
+    Returns:
+    - tuple: (folder path, version), or (None, None) if there is none.
+    """
+    try:
+        names = [name for name in os.listdir(base_dir) if name.startswith(prefix)]
+    except OSError:
+        return None, None
+    if not names:
+        return None, None
+
+    def version_key(name):
+        return [int(part) if part.isdigit() else 0 for part in re.split(r"[.-]", name[len(prefix) :])]
+
+    latest = max(names, key=version_key)
+    return os.path.join(base_dir, latest), latest[len(prefix) :]
+
+
+def get_dpkg_version(package="rabbitmq-server", status_path=DPKG_STATUS_PATH):
+    """
+    Reads a package's version from the Debian/Ubuntu package database.
+
+    Returns:
+    - str: The installed version, or None if the package is not installed.
+    """
+    try:
+        with open(status_path, "r", encoding="utf-8", errors="replace") as f:
+            in_package = installed = False
+            for line in f:
+                if line.startswith("Package: "):
+                    in_package = line.strip() == f"Package: {package}"
+                elif in_package and line.startswith("Status: "):
+                    installed = line.rstrip().endswith(" installed")
+                elif in_package and line.startswith("Version: "):
+                    return line.split(":", 1)[1].strip() if installed else None
+    except OSError:
+        pass
+    return None
+
+
+def get_rabbitmq_package_version():
+    """
+    Looks for RabbitMQ in package-manager metadata, without running anything.
+
+    Returns:
+    - tuple: (source, version), or (None, None) if no package was found.
+    """
+    version = get_dpkg_version()
+    if version:
+        return "dpkg", version
+    for cellar in HOMEBREW_CELLARS:
+        _, version = find_latest_version_folder(os.path.join(cellar, "rabbitmq"), "")
+        if version:
+            return "homebrew", version
+    _, version = find_latest_version_folder(RABBITMQ_LIB_DIR, "rabbitmq_server-")
+    if version:
+        return "package", version  # RPM and generic Linux packages
+    _, version = find_latest_version_folder(CHOCO_RABBITMQ_DIR, "rabbitmq_server-")
+    if version:
+        return "chocolatey", version
+    _, version = find_latest_version_folder(WINDOWS_RABBITMQ_DIR, "rabbitmq_server-")
+    if version:
+        return "installer", version
+    return None, None
+
+
+def get_rabbitmqctl_candidates():
+    """Lists the folders RabbitMQ's command-line tools are usually installed in."""
+    folders = [get_choco_rabbitmq_path()]
+    sbin_parent, _ = find_latest_version_folder(WINDOWS_RABBITMQ_DIR, "rabbitmq_server-")
+    if sbin_parent:
+        folders.append(os.path.join(sbin_parent, "sbin"))
+    folders.extend(RABBITMQ_SBIN_DIRS)
+    return [folder for folder in folders if folder]
+
+
+@functools.lru_cache(maxsize=None)
+def find_rabbitmq_installation():
+    """
+    Finds RabbitMQ using only cheap checks, once per run.
+
+    The checks are, in order: rabbitmqctl on the PATH, rabbitmqctl in the
+    usual install folders, and package-manager metadata for the version.
+    Nothing is run, so this takes milliseconds.
+
+    Returns:
+    - dict: {"installed", "rabbitmqctl", "found_by", "package", "version"}
+    """
+    command = RABBITMQCTL_COMMAND
+    rabbitmqctl = find_executable(command)
+    found_by = "PATH" if rabbitmqctl else None
+    if rabbitmqctl is None:
+        for folder in get_rabbitmqctl_candidates():
+            candidate = os.path.join(folder, command)
+            if os.path.isfile(candidate):
+                rabbitmqctl, found_by = candidate, "install folder"
+                break
+
+    package, version = get_rabbitmq_package_version()
+    return {
+        "installed": bool(rabbitmqctl or package),
+        "rabbitmqctl": rabbitmqctl,
+        "found_by": found_by or package,
+        "package": package,
+        "version": version,
+    }
+
+
 def is_rabbitmq_installed():
     """Return True if RabbitMQ is installed, False otherwise."""
+    return find_rabbitmq_installation()["installed"]
+
+
+def parse_rabbitmqctl_status(status):
+    """
+    Picks the useful parts out of `rabbitmqctl status --formatter json`.
+
+    Returns:
+    - dict: {"node", "version", "erlang_version", "listeners", "memory_bytes", "alarms"}
+    """
+    listeners = status.get("listeners") or []
+    memory = status.get("memory") or {}
+    total = memory.get("total") if isinstance(memory, dict) else None
+    if isinstance(total, dict):
+        total = total.get("rss") or total.get("allocated") or total.get("erlang")
+    return {
+        "node": status.get("node") or next((item.get("node") for item in listeners if item.get("node")), None),
+        "version": status.get("rabbitmq_version"),
+        "erlang_version": status.get("erlang_version"),
+        "listeners": [
+            f"{item.get('protocol')} {item.get('interface')}:{item.get('port')}" for item in listeners
+        ],
+        "memory_bytes": total,
+        "alarms": status.get("alarms") or [],
+    }
+
+
+def get_rabbitmqctl_status(rabbitmqctl, timeout=RABBITMQCTL_TIMEOUT_SECONDS):
+    """
+    Runs `rabbitmqctl status` with a time limit. It starts an Erlang VM, so
+    it can take several seconds; it is only used in deep mode.
+
+    Returns:
+    - tuple: (status dict from parse_rabbitmqctl_status() or None, error or None)
+    """
+    try:
+        completed = subprocess.run(
+            [rabbitmqctl, "status", "--formatter", "json"],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return None, f"rabbitmqctl status did not finish within {timeout} seconds"
+    except OSError as e:
+        return None, f"could not run rabbitmqctl: {e}"
+    if completed.returncode != 0:
+        lines = (completed.stderr or completed.stdout).strip().splitlines()
+        return None, f"rabbitmqctl status failed: {lines[-1] if lines else completed.returncode}"
+    try:
+        return parse_rabbitmqctl_status(json.loads(completed.stdout)), None
+    except (ValueError, AttributeError) as e:
+        return None, f"could not read rabbitmqctl status: {e}"
+
+
+# Liveness probe
+#
+# Whether RabbitMQ is running is answered in tiers, each with a short,
+# fixed time limit:
+# 1. Connect to the port (a TCP connect with a timeout in milliseconds).
+# 2. Send the AMQP 0-9-1 protocol header and read the broker's
+#    Connection.Start reply, which names the product and its version.
+# 3. Only if asked, log in. pika is used when it is installed; otherwise
+#    the login is done with the same socket-level AMQP handshake.
+#
+# pika is only imported for the login, so this diagnostic starts quickly
+# and still works in environments without pika.
+
+AMQP_PROTOCOL_HEADER = b"AMQP\x00\x00\x09\x01"  # AMQP 0-9-1
+AMQP_FRAME_METHOD = 1
+AMQP_FRAME_END = 0xCE
+AMQP_CONNECTION_START = (10, 10)  # (class id, method id)
+AMQP_CONNECTION_START_OK = (10, 11)
+AMQP_CONNECTION_TUNE = (10, 30)
+AMQP_CONNECTION_CLOSE = (10, 50)
+
+# Fixed-size AMQP field value types: type code -> struct format
+AMQP_FIELD_FORMATS = {
+    b"t": "?",  # boolean
+    b"b": "b",  # signed 8-bit
+    b"B": "B",  # unsigned 8-bit
+    b"s": ">h",  # signed 16-bit
+    b"u": ">H",  # unsigned 16-bit
+    b"I": ">i",  # signed 32-bit
+    b"i": ">I",  # unsigned 32-bit
+    b"l": ">q",  # signed 64-bit
+    b"L": ">Q",  # unsigned 64-bit
+    b"f": ">f",  # float
+    b"d": ">d",  # double
+    b"T": ">Q",  # timestamp
+}
+
+# connect_ex() results meaning a non-blocking connect is still in progress
+CONNECT_IN_PROGRESS = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, getattr(errno, "WSAEWOULDBLOCK", 10035)}
+
+
+def open_connection(host, port, timeout_ms):
+    """
+    Connects to a TCP port without waiting longer than timeout_ms in total.
+
+    Returns:
+    - socket.socket: The connected socket, in blocking mode.
+
+    Raises:
+    - OSError: If the connection was refused, timed out or failed.
+    """
+    deadline = time.monotonic() + timeout_ms / 1000
+    last_error = OSError(f"could not resolve {host}")
+    for family, sock_type, proto, _, address in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM):
+        sock = socket.socket(family, sock_type, proto)
+        sock.setblocking(False)
+        try:
+            error = sock.connect_ex(address)
+            if error not in CONNECT_IN_PROGRESS:
+                raise OSError(error, os.strerror(error))
+            remaining = deadline - time.monotonic()
+            _, writable, failed = select.select([], [sock], [sock], max(remaining, 0))
+            if not writable and not failed:
+                raise socket.timeout(f"timed out after {timeout_ms} ms")
+            error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if error:
+                raise OSError(error, os.strerror(error))
+            sock.setblocking(True)
+            return sock
+        except OSError as e:
+            sock.close()
+            last_error = e
+            if time.monotonic() >= deadline:
+                break
+    raise last_error
+
+
+def receive_exactly(sock, size, deadline):
+    """Reads exactly size bytes from a socket before the deadline (time.monotonic())."""
+    data = b""
+    while len(data) < size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout("timed out waiting for the broker")
+        sock.settimeout(remaining)
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("the connection was closed")
+        data += chunk
+    return data
+
+
+def parse_field_value(data, offset):
+    """
+    Reads one AMQP 0-9-1 field value (as used by RabbitMQ).
+
+    Returns:
+    - tuple: (value, offset after the value)
+    """
+    kind = data[offset : offset + 1]
+    offset += 1
+    if kind in AMQP_FIELD_FORMATS:
+        value_format = AMQP_FIELD_FORMATS[kind]
+        return struct.unpack_from(value_format, data, offset)[0], offset + struct.calcsize(value_format)
+    if kind in (b"S", b"x"):
+        (size,) = struct.unpack_from(">I", data, offset)
+        value = data[offset + 4 : offset + 4 + size]
+        return (value.decode("utf-8", errors="replace") if kind == b"S" else value), offset + 4 + size
+    if kind == b"F":
+        return parse_field_table(data, offset)
+    if kind == b"A":
+        (size,) = struct.unpack_from(">I", data, offset)
+        end, offset, items = offset + 4 + size, offset + 4, []
+        while offset < end:
+            item, offset = parse_field_value(data, offset)
+            items.append(item)
+        return items, end
+    if kind == b"D":
+        scale, value = struct.unpack_from(">BI", data, offset)
+        return value / (10 ** scale), offset + 5
+    if kind == b"V":
+        return None, offset
+    raise ValueError(f"unknown AMQP field type {kind!r}")
+
+
+def parse_field_table(data, offset):
+    """
+    Reads an AMQP 0-9-1 field table.
+
+    Returns:
+    - tuple: (dict, offset after the table)
+    """
+    (size,) = struct.unpack_from(">I", data, offset)
+    end, offset, table = offset + 4 + size, offset + 4, {}
+    while offset < end:
+        name_size = data[offset]
+        name = data[offset + 1 : offset + 1 + name_size].decode("utf-8", errors="replace")
+        table[name], offset = parse_field_value(data, offset + 1 + name_size)
+    return table, end
+
+
+def parse_connection_start(payload):
+    """
+    Reads the broker's Connection.Start method.
+
+    Returns:
+    - dict: {"protocol", "product", "version", "platform", "mechanisms"}
+
+    Raises:
+    - ValueError: If the payload is not a Connection.Start method.
+    """
+    if struct.unpack_from(">HH", payload, 0) != AMQP_CONNECTION_START:
+        raise ValueError("the first method was not Connection.Start")
+    major, minor = struct.unpack_from(">BB", payload, 4)
+    properties, offset = parse_field_table(payload, 6)
+    (size,) = struct.unpack_from(">I", payload, offset)
+    mechanisms = payload[offset + 4 : offset + 4 + size].decode("utf-8", errors="replace")
+    return {
+        "protocol": f"{major}-{minor}",
+        "product": properties.get("product"),
+        "version": properties.get("version"),
+        "platform": properties.get("platform"),
+        "mechanisms": mechanisms.split(),
+    }
+
+
+def read_method_frame(sock, deadline):
+    """
+    Reads one AMQP 0-9-1 method frame on channel 0.
+
+    Returns:
+    - bytes: The frame's payload, starting with the class and method ids.
+
+    Raises:
+    - ValueError: If the reply was not a method frame.
+    """
+    header = receive_exactly(sock, 7, deadline)
+    if header.startswith(b"AMQP"):
+        # The broker answers with the protocol it supports instead
+        offered = header + receive_exactly(sock, 1, deadline)
+        raise ValueError(f"the broker does not support AMQP 0-9-1 (it offered {offered!r})")
+    frame_type, channel, size = struct.unpack(">BHI", header)
+    if frame_type != AMQP_FRAME_METHOD or channel != 0:
+        raise ValueError("the reply was not an AMQP method frame")
+    payload = receive_exactly(sock, size + 1, deadline)
+    if payload[-1] != AMQP_FRAME_END:
+        raise ValueError("the reply frame was not terminated correctly")
+    return payload[:-1]
+
+
+def encode_method_frame(method, arguments):
+    """Builds an AMQP 0-9-1 method frame on channel 0 from (class id, method id) and encoded arguments."""
+    payload = struct.pack(">HH", *method) + arguments
+    return struct.pack(">BHI", AMQP_FRAME_METHOD, 0, len(payload)) + payload + bytes([AMQP_FRAME_END])
+
+
+def encode_short_string(text):
+    """Encodes an AMQP short string (up to 255 bytes)."""
+    data = text.encode("utf-8")
+    return struct.pack(">B", len(data)) + data
+
+
+def encode_long_string(data):
+    """Encodes an AMQP long string."""
+    return struct.pack(">I", len(data)) + data
+
+
+def probe_amqp_handshake(sock, timeout_ms):
+    """
+    Sends the AMQP 0-9-1 protocol header and reads the broker's Connection.Start.
+
+    Returns:
+    - dict: As from parse_connection_start().
+
+    Raises:
+    - OSError: If the broker did not answer in time.
+    - ValueError: If the answer was not from an AMQP 0-9-1 broker.
+    """
+    deadline = time.monotonic() + timeout_ms / 1000
+    sock.sendall(AMQP_PROTOCOL_HEADER)
+    return parse_connection_start(read_method_frame(sock, deadline))
+
+
+def probe_amqp_login(sock, username, password, timeout_ms):
+    """
+    Logs in on a socket that has just received Connection.Start, without pika.
+
+    Sends Connection.Start-Ok with PLAIN credentials. The broker answers
+    Connection.Tune if the login worked, or closes the connection if not.
+
+    Returns:
+    - str: None if it worked, otherwise the error.
+    """
+    deadline = time.monotonic() + timeout_ms / 1000
+    client_properties = b"\x07productS" + encode_long_string(b"nw-diagnostics")
+    arguments = (
+        encode_long_string(client_properties)  # Field table with one entry
+        + encode_short_string("PLAIN")
+        + encode_long_string(f"\0{username}\0{password}".encode("utf-8"))
+        + encode_short_string("en_US")
+    )
     try:
-        cmd = "rabbitmqctl.bat" if sys.platform == "win32" else "rabbitmqctl"
-        subprocess.check_output([cmd, "status"])
-        return True
-    except subprocess.CalledProcessError:
-        return True
-    except FileNotFoundError:
-        return False
+        sock.sendall(encode_method_frame(AMQP_CONNECTION_START_OK, arguments))
+        payload = read_method_frame(sock, deadline)
+    except ConnectionError:
+        return "the broker closed the connection (check the user name and password)"
+    except socket.timeout:
+        return f"the broker did not answer the login within {timeout_ms} ms"
+    except (OSError, ValueError, struct.error) as e:
+        return str(e)
+
+    method = struct.unpack_from(">HH", payload, 0)
+    if method == AMQP_CONNECTION_TUNE:
+        return None
+    if method == AMQP_CONNECTION_CLOSE:
+        reply_code, text_size = struct.unpack_from(">HB", payload, 4)
+        return f"{reply_code} {payload[7 : 7 + text_size].decode('utf-8', errors='replace')}"
+    return f"unexpected reply {method} to the login"
+
+
+@functools.lru_cache(maxsize=None)
+def get_pika():
+    """
+    Imports pika the first time it is needed.
+
+    Returns:
+    - module: pika, or None if it is not installed.
+    """
+    try:
+        import pika
+    except ImportError:
+        return None
+    return pika
+
+
+def probe_pika_login(host, port, username, password, timeout_ms):
+    """
+    Opens and closes a full pika connection.
+
+    Returns:
+    - str: None if it worked, otherwise the error.
+    """
+    pika = get_pika()
+    try:
+        parameters = pika.ConnectionParameters(
+            host=host,
+            port=port,
+            credentials=pika.PlainCredentials(username, password),
+            connection_attempts=1,
+            socket_timeout=timeout_ms / 1000,
+            blocked_connection_timeout=timeout_ms / 1000,
+        )
+        connection = pika.BlockingConnection(parameters)
+        connection.close()
+        return None
     except Exception as e:
-        logging.error(f"An unexpected error occurred: {e}")
-        return False
+        return str(e) or type(e).__name__
+
+
+def probe_rabbitmq(
+    host=RABBITMQ_HOST,
+    port=RABBITMQ_PORT,
+    connect_timeout_ms=CONNECT_TIMEOUT_MS,
+    handshake_timeout_ms=HANDSHAKE_TIMEOUT_MS,
+    login=False,
+    username=RABBITMQ_USERNAME,
+    password=RABBITMQ_PASSWORD,
+):
+    """
+    Checks whether a RabbitMQ broker is answering, in tiers.
+
+    Args:
+    - host (str): The broker's host name or address.
+    - port (int): The broker's AMQP port.
+    - connect_timeout_ms (int): Time limit for the TCP connect.
+    - handshake_timeout_ms (int): Time limit for the AMQP handshake, and for the login.
+    - login (bool): Also log in, with pika if it is installed.
+    - username (str): The user name for the login.
+    - password (str): The password for the login.
 
+    Returns:
+    - dict: {"host", "port", "reachable", "broker", "logged_in", "login_method",
+      "product", "version", "platform", "mechanisms", "latency_ms", "error"}.
+      "broker" is True when the port answered as an AMQP 0-9-1 broker;
+      "logged_in" is None when no login was tried.
+    """
+    probe = {
+        "host": host,
+        "port": port,
+        "reachable": False,
+        "broker": False,
+        "logged_in": None,
+        "login_method": None,
+        "product": None,
+        "version": None,
+        "platform": None,
+        "mechanisms": [],
+        "latency_ms": None,
+        "error": None,
+    }
+    start = time.perf_counter()
+    try:
+        sock = open_connection(host, port, connect_timeout_ms)
+    except socket.timeout:
+        probe["error"] = f"no answer within {connect_timeout_ms} ms (the port may be blocked by a firewall)"
+        return probe
+    except OSError as e:
+        probe["error"] = e.strerror or str(e)
+        return probe
+    probe["reachable"] = True
+    probe["latency_ms"] = (time.perf_counter() - start) * 1000
+
+    with sock:
+        try:
+            probe.update(probe_amqp_handshake(sock, handshake_timeout_ms))
+            probe.pop("protocol", None)
+            probe["broker"] = True
+        except socket.timeout:
+            probe["error"] = f"the port is open but no AMQP 0-9-1 broker answered within {handshake_timeout_ms} ms"
+            return probe
+        except (OSError, ValueError, struct.error) as e:
+            probe["error"] = f"the port is open but did not answer as an AMQP 0-9-1 broker: {e}"
+            return probe
+
+        if login and get_pika() is None:
+            probe["login_method"] = "amqp"
+            error = probe_amqp_login(sock, username, password, handshake_timeout_ms)
+            probe["logged_in"] = error is None
+            probe["error"] = error
+
+    if login and get_pika() is not None:
+        probe["login_method"] = "pika"
+        error = probe_pika_login(host, port, username, password, handshake_timeout_ms)
+        probe["logged_in"] = error is None
+        probe["error"] = error
+    return probe
 
-def is_rabbitmq_running():
+
+def is_rabbitmq_running(host=RABBITMQ_HOST, port=RABBITMQ_PORT):
     """Return True if RabbitMQ is running, False otherwise."""
+    return probe_rabbitmq(host, port)["broker"]
+
+
+# Endpoint probe
+#
+# For clusters, and to see the management and stream ports too, every
+# endpoint (node and port) is connected to several times. All endpoints
+# are probed at the same time with asyncio, so checking a whole cluster
+# takes about as long as the slowest single endpoint.
+
+RABBITMQ_PORTS = {5672: "AMQP", 5671: "AMQPS", 15672: "management", 5552: "stream"}
+ENDPOINT_SAMPLES = 5  # Connections made to each endpoint
+
+
+def get_percentile(values, percent):
+    """Returns the nearest-rank percentile of a list of numbers, or None if it is empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))  # Round up
+    return ordered[int(rank) - 1]
+
+
+def get_endpoints(nodes, ports=tuple(RABBITMQ_PORTS)):
+    """
+    Lists the endpoints to probe.
+
+    Args:
+    - nodes (iterable): Host names. "host:port" probes only that port on the host.
+      IPv6 addresses take a port in brackets, e.g. "[::1]:5672".
+    - ports (iterable): Ports probed on nodes given without a port.
+
+    Returns:
+    - tuple: ([(host, port) pairs], [nodes that could not be read, e.g. "host:amqp"])
+    """
+    endpoints, invalid = [], []
+    for node in nodes:
+        node = node.strip()
+        if not node:
+            continue
+        if node.startswith("["):
+            host, bracket, rest = node[1:].partition("]")
+            if not bracket or rest and not rest.startswith(":"):
+                invalid.append(node)
+                continue
+            port = rest[1:] if rest else None
+        elif node.count(":") == 1:
+            host, _, port = node.partition(":")
+        else:
+            host, port = node, None
+        if not host or "[" in host or "]" in host:
+            invalid.append(node)
+        elif port is None:
+            endpoints.extend((host, port) for port in ports)
+        elif port.isdigit() and 0 < int(port) < 65536:
+            endpoints.append((host, int(port)))
+        else:
+            invalid.append(node)
+    return endpoints, invalid
+
+
+def get_ports(text):
+    """
+    Reads a comma-separated port list such as "5672,15672".
+
+    Returns:
+    - tuple: ([ports], [entries that are not ports])
+    """
+    ports, invalid = [], []
+    for entry in text.split(","):
+        entry = entry.strip()
+        if entry.isdigit() and 0 < int(entry) < 65536:
+            ports.append(int(entry))
+        elif entry:
+            invalid.append(entry)
+    return ports, invalid
+
+
+async def measure_connect(host, port, timeout_ms):
+    """
+    Connects to an endpoint once.
+
+    Returns:
+    - tuple: (latency in ms or None, error or None)
+    """
+    start = time.perf_counter()
     try:
-        connection = pika.BlockingConnection(pika.ConnectionParameters("localhost"))
-        connection.close()
-        return True
-    except pika.exceptions.AMQPConnectionError:
-        return False
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout_ms / 1000)
+    except asyncio.TimeoutError:
+        return None, f"no answer within {timeout_ms} ms"
+    except OSError as e:
+        return None, e.strerror or str(e)
+    latency_ms = (time.perf_counter() - start) * 1000
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return latency_ms, None
+
+
+async def probe_endpoint(host, port, samples, timeout_ms):
+    """
+    Connects to an endpoint several times, one after another.
+
+    An endpoint that does not answer the first time is not tried again, so
+    an unreachable endpoint costs at most one time limit.
+
+    Returns:
+    - dict: {"host", "port", "service", "reachable", "samples", "failures",
+      "p50_ms", "p95_ms", "p99_ms", "max_ms", "error"}
+    """
+    latencies, failures, error = [], 0, None
+    for _ in range(samples):
+        latency_ms, sample_error = await measure_connect(host, port, timeout_ms)
+        if latency_ms is None:
+            failures += 1
+            error = error or sample_error  # Keep the first failure's reason
+            if not latencies:
+                break
+        else:
+            latencies.append(latency_ms)
+    return {
+        "host": host,
+        "port": port,
+        "service": RABBITMQ_PORTS.get(port, "other"),
+        "reachable": bool(latencies),
+        "samples": len(latencies),
+        "failures": failures,
+        "p50_ms": get_percentile(latencies, 50),
+        "p95_ms": get_percentile(latencies, 95),
+        "p99_ms": get_percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else None,
+        "error": error,
+    }
+
+
+async def probe_endpoints_async(endpoints, samples, timeout_ms):
+    """Probes all endpoints at the same time. Results are in the same order as endpoints."""
+    return await asyncio.gather(*(probe_endpoint(host, port, samples, timeout_ms) for host, port in endpoints))
+
+
+def probe_endpoints(endpoints, samples=ENDPOINT_SAMPLES, timeout_ms=CONNECT_TIMEOUT_MS):
+    """
+    Measures connect latency to each endpoint, all at the same time.
+
+    Args:
+    - endpoints (list): (host, port) pairs, e.g. from get_endpoints().
+    - samples (int): Connections made to each endpoint.
+    - timeout_ms (int): Time limit for each connection.
+
+    Returns:
+    - list: One dict per endpoint, as from probe_endpoint().
+    """
+    return asyncio.run(probe_endpoints_async(endpoints, samples, timeout_ms))
+
+
+def log_endpoint_probes(options):
+    """Probes the configured endpoints and logs a line for each."""
+    nodes = options.rabbitmq_nodes.split(",") if options.rabbitmq_nodes else [options.rabbitmq_host]
+    ports, invalid = get_ports(options.rabbitmq_ports)
+    for entry in invalid:
+        message = f"ERROR: --rabbitmq-ports entry {entry!r} is not a port number, so it was skipped."
+        logger.error(message)
+        emit_record("check", "rabbitmq_ports", "error", value=entry, message=message)
+    endpoints, invalid = get_endpoints(nodes, ports)
+    for node in invalid:
+        message = f"ERROR: --rabbitmq-nodes entry {node!r} is not a host or host:port, so it was skipped."
+        logger.error(message)
+        emit_record("check", "rabbitmq_nodes", "error", value=node, message=message)
+    start = time.perf_counter()
+    probes = probe_endpoints(endpoints, options.endpoint_samples, options.connect_timeout_ms)
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    lines = [
+        f"Endpoints ({options.endpoint_samples} connections each, {options.connect_timeout_ms} ms limit, "
+        f"{duration_ms:.0f} ms in total):"
+    ]
+    for probe in probes:
+        host = f"[{probe['host']}]" if ":" in probe["host"] else probe["host"]
+        address = f"{host}:{probe['port']} {probe['service']}"
+        if probe["reachable"]:
+            lines.append(
+                f"  {address:<32} up    p50 {probe['p50_ms']:.1f} ms  p95 {probe['p95_ms']:.1f} ms  "
+                f"p99 {probe['p99_ms']:.1f} ms"
+                + (f"  ({probe['failures']} failed)" if probe["failures"] else "")
+            )
+        else:
+            lines.append(f"  {address:<32} DOWN  {probe['error']}")
+        emit_record(
+            "check",
+            f"rabbitmq_endpoint {probe['host']}:{probe['port']}",
+            "success" if probe["reachable"] and not probe["failures"] else "warning",
+            value=probe,
+            duration_ms=duration_ms,
+        )
+    up = sum(probe["reachable"] for probe in probes)
+    lines.append(f"{up} of {len(probes)} endpoints answered.")
+    logger.info("\n".join(lines))
+
+
+# Publish/consume benchmark
+#
+# A broker can be running yet slow. The benchmark publishes messages to a
+# temporary queue and consumes them again over one connection and channel,
+# first without and then with publisher confirms. It reports messages per
+# second and the round-trip latency of single messages.
+#
+# It runs against RabbitMQ using pika.
+
+BENCHMARK_MESSAGES = 1000  # Messages published in each mode
+BENCHMARK_MESSAGE_BYTES = 1024
+BENCHMARK_LATENCY_SAMPLES = 200  # Single-message round trips timed in each mode
+BENCHMARK_MIN_RATE = 1000  # Warn below this many messages per second
+BENCHMARK_MAX_P99_MS = 50  # Warn above this 99th percentile round trip
+
+
+class PikaBenchmarkChannel:
+    """
+    A channel on a RabbitMQ connection with its own temporary queue.
+    With confirms, each publish waits until the broker has confirmed it.
+    """
+
+    def __init__(self, host, port, username, password, confirms=False, timeout_ms=HANDSHAKE_TIMEOUT_MS):
+        pika = get_pika()
+        if pika is None:
+            raise RuntimeError("the benchmark needs pika: python -m pip install pika")
+        parameters = pika.ConnectionParameters(
+            host=host,
+            port=port,
+            credentials=pika.PlainCredentials(username, password),
+            connection_attempts=1,
+            socket_timeout=timeout_ms / 1000,
+        )
+        self.connection = pika.BlockingConnection(parameters)
+        self.channel = self.connection.channel()
+        self.queue = self.channel.queue_declare(queue="", exclusive=True, auto_delete=True).method.queue
+        if confirms:
+            self.channel.confirm_delivery()
+        self.deliveries = self.channel.consume(self.queue, auto_ack=True, inactivity_timeout=timeout_ms / 1000)
+
+    def publish(self, body):
+        self.channel.basic_publish(exchange="", routing_key=self.queue, body=body)
+
+    def receive(self):
+        method, _, body = next(self.deliveries)
+        if method is None:
+            raise TimeoutError("no message arrived")
+        return body
+
+    def close(self):
+        try:
+            self.channel.cancel()
+        finally:
+            self.connection.close()
+
+
+def run_channel_benchmark(channel, messages=BENCHMARK_MESSAGES, size=BENCHMARK_MESSAGE_BYTES,
+                          latency_samples=BENCHMARK_LATENCY_SAMPLES):
+    """
+    Times one channel.
+
+    Throughput is measured by publishing every message and then consuming
+    them all. Latency is measured by sending one message at a time and
+    waiting for it to come back.
+
+    Args:
+    - channel: Has publish(body), receive() and close().
+    - messages (int): Messages for the throughput run.
+    - size (int): Bytes per message.
+    - latency_samples (int): Single-message round trips to time.
+
+    Returns:
+    - dict: {"messages", "size", "rate", "p50_ms", "p95_ms", "p99_ms"}
+    """
+    body = bytes(size)
+    start = time.perf_counter()
+    for _ in range(messages):
+        channel.publish(body)
+    for _ in range(messages):
+        channel.receive()
+    elapsed = time.perf_counter() - start
+
+    round_trips = []
+    for _ in range(latency_samples):
+        sent = time.perf_counter()
+        channel.publish(body)
+        channel.receive()
+        round_trips.append((time.perf_counter() - sent) * 1000)
+
+    return {
+        "messages": messages,
+        "size": size,
+        "rate": messages / elapsed if elapsed > 0 else float("inf"),
+        "p50_ms": get_percentile(round_trips, 50),
+        "p95_ms": get_percentile(round_trips, 95),
+        "p99_ms": get_percentile(round_trips, 99),
+    }
+
+
+def run_publish_benchmark(open_channel, messages=BENCHMARK_MESSAGES, size=BENCHMARK_MESSAGE_BYTES,
+                          latency_samples=BENCHMARK_LATENCY_SAMPLES):
+    """
+    Runs the benchmark without and with publisher confirms.
+
+    Args:
+    - open_channel (callable): Given confirms (bool), returns a channel.
+    - messages, size, latency_samples: As for run_channel_benchmark().
+
+    Returns:
+    - dict: {"without_confirms": results, "with_confirms": results}
+    """
+    results = {}
+    for confirms in (False, True):
+        channel = open_channel(confirms)
+        try:
+            results["with_confirms" if confirms else "without_confirms"] = run_channel_benchmark(
+                channel, messages, size, latency_samples
+            )
+        finally:
+            channel.close()
+    return results
+
+
+def log_publish_benchmark(options):
+    """Runs the benchmark chosen by the options and logs the results against the thresholds."""
+    target = f"{options.rabbitmq_host}:{options.rabbitmq_port}"
+
+    def open_channel(confirms):
+        return PikaBenchmarkChannel(
+            options.rabbitmq_host,
+            options.rabbitmq_port,
+            options.rabbitmq_username,
+            options.rabbitmq_password,
+            confirms,
+            options.handshake_timeout_ms,
+        )
+
+    start = time.perf_counter()
+    try:
+        results = run_publish_benchmark(open_channel, options.benchmark_messages, options.benchmark_size)
+    except Exception as e:
+        message = f"WARNING: The benchmark against {target} stopped: {e}"
+        logger.warning(message)
+        emit_record("check", "rabbitmq_benchmark", "warning", message=message)
+        return
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    lines = [f"Benchmark ({options.benchmark_messages} messages of {options.benchmark_size} bytes, {target}):"]
+    warnings = []
+    for mode, result in results.items():
+        label = mode.replace("_", " ")
+        lines.append(
+            f"  {label + ':':<18} {result['rate']:>10,.0f} msgs/s   round trip p50 {result['p50_ms']:.2f} ms  "
+            f"p95 {result['p95_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms"
+        )
+        if result["rate"] < options.benchmark_min_rate:
+            warnings.append(f"{label}: {result['rate']:,.0f} msgs/s is below {options.benchmark_min_rate:,} msgs/s")
+        if result["p99_ms"] > options.benchmark_max_p99_ms:
+            warnings.append(f"{label}: p99 {result['p99_ms']:.1f} ms is above {options.benchmark_max_p99_ms} ms")
+    lines.extend(f"WARNING: {warning}." for warning in warnings)
+    message = "\n".join(lines)
+    logger.info(message)
+    emit_record(
+        "check",
+        "rabbitmq_benchmark",
+        "warning" if warnings else "success",
+        value=results,
+        message=message,
+        duration_ms=duration_ms,
+    )
+
+
+# Monitor mode
+#
+# After the checks, the management HTTP API is polled at an interval to
+# see whether queues are backing up or a node is near its memory or disk
+# alarm. Only the last few samples of each series are kept, in fixed-size
+# buffers, so memory use stays the same however long it runs. Alerts are
+# logged when a condition starts and when it clears, not on every poll.
+
+MANAGEMENT_PORT = 15672
+MONITOR_INTERVAL_SECONDS = 5  # Time between polls
+MONITOR_WINDOW = 12  # Samples kept per series; growth is measured across them
+MONITOR_MAX_QUEUES = 100  # Only the deepest queues are followed
+MONITOR_GROWTH_ALERT = 10.0  # Alert when a queue grows faster than this (messages per second)
+MONITOR_MEMORY_ALERT = 0.8  # Alert when a node uses this share of its memory limit
+MONITOR_DISK_ALERT = 2.0  # Alert when free disk is below this multiple of the disk limit
+
+
+class RollingSeries:
+    """The most recent (time, value) samples of one measurement, in a fixed-size buffer."""
+
+    def __init__(self, size=MONITOR_WINDOW):
+        self.samples = collections.deque(maxlen=size)
+
+    def add(self, when, value):
+        self.samples.append((when, value))
+
+    def latest(self):
+        return self.samples[-1][1] if self.samples else None
+
+    def rate(self):
+        """Returns the change per second across the buffer, or None with fewer than 3 samples."""
+        if len(self.samples) < 3:
+            return None
+        (first_time, first_value), (last_time, last_value) = self.samples[0], self.samples[-1]
+        if last_time <= first_time:
+            return None
+        return (last_value - first_value) / (last_time - first_time)
+
+
+def fetch_management_json(options, path):
+    """
+    Reads one resource from the RabbitMQ management HTTP API.
+
+    Returns:
+    - The decoded JSON.
+
+    Raises:
+    - OSError: If the API could not be reached or refused the request.
+    - ValueError: If the answer was not JSON.
+    """
+    url = f"http://{options.rabbitmq_host}:{options.management_port}/api/{path}"
+    credentials = base64.b64encode(f"{options.rabbitmq_username}:{options.rabbitmq_password}".encode("utf-8"))
+    request = urllib.request.Request(url, headers={"Authorization": f"Basic {credentials.decode('ascii')}"})
+    with urllib.request.urlopen(request, timeout=options.handshake_timeout_ms / 1000) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def fetch_broker_state(options):
+    """
+    Reads the deepest queues and every node's resource use.
+
+    Returns:
+    - tuple: ({queue name: messages}, [node dicts])
+    """
+    queues = fetch_management_json(
+        options,
+        f"queues?page=1&page_size={MONITOR_MAX_QUEUES}&sort=messages&sort_reverse=true"
+        "&columns=name,vhost,messages",
+    )
+    if isinstance(queues, dict):
+        queues = queues.get("items", [])  # Paged answer
+    nodes = fetch_management_json(
+        options, "nodes?columns=name,running,mem_used,mem_limit,mem_alarm,disk_free,disk_free_limit,disk_free_alarm"
+    )
+    depths = {}
+    for item in queues:
+        vhost = item.get("vhost", "/")
+        name = item["name"] if vhost == "/" else f"{vhost}/{item['name']}"
+        depths[name] = item.get("messages") or 0
+    return depths, nodes
+
+
+def get_node_conditions(node):
+    """Lists the resource problems of one node, e.g. "memory at 85% of its limit"."""
+    conditions = []
+    if node.get("running") is False:
+        conditions.append("not running")
+    mem_used, mem_limit = node.get("mem_used"), node.get("mem_limit")
+    if node.get("mem_alarm"):
+        conditions.append("memory alarm")
+    elif mem_used and mem_limit and mem_used / mem_limit >= MONITOR_MEMORY_ALERT:
+        conditions.append(f"memory at {mem_used / mem_limit:.0%} of its limit")
+    disk_free, disk_limit = node.get("disk_free"), node.get("disk_free_limit")
+    if node.get("disk_free_alarm"):
+        conditions.append("disk alarm")
+    elif disk_free is not None and disk_limit and disk_free < disk_limit * MONITOR_DISK_ALERT:
+        conditions.append(f"free disk down to {disk_free / 1024 ** 3:.1f} GB")
+    return conditions
+
+
+def update_monitor(state, when, depths, nodes, growth_alert=MONITOR_GROWTH_ALERT):
+    """
+    Adds one poll to the rolling state and works out which alerts started or cleared.
+
+    Args:
+    - state (dict): {"queues": {name: RollingSeries}, "alerts": {key: text}}, kept between polls.
+    - when (float): The time of the poll, in seconds.
+    - depths (dict): Queue name -> messages.
+    - nodes (list): Node dicts from the management API.
+    - growth_alert (float): Messages per second that count as backing up.
+
+    Returns:
+    - tuple: (alerts that started, alerts that cleared), each a list of text.
+    """
+    queues = state["queues"]
+    for name in list(queues):
+        if name not in depths:
+            del queues[name]  # Forget queues that were deleted or are no longer among the deepest
+    current = {}
+    for name, messages in depths.items():
+        series = queues.setdefault(name, RollingSeries())
+        series.add(when, messages)
+        rate = series.rate()
+        if rate is not None and rate > growth_alert:
+            current[f"queue {name}"] = f"queue {name} is growing by {rate:.1f} messages/s ({messages} waiting)"
+    for node in nodes:
+        conditions = get_node_conditions(node)
+        if conditions:
+            current[f"node {node.get('name')}"] = f"node {node.get('name')}: {', '.join(conditions)}"
+
+    previous = state["alerts"]
+    started = [text for key, text in current.items() if key not in previous]
+    cleared = [f"{key} is back to normal" for key in previous if key not in current]
+    state["alerts"] = current
+    return started, cleared
+
+
+def monitor_rabbitmq(options, polls=None):
+    """
+    Polls the management API until interrupted, the duration has passed, or
+    the given number of polls is done.
+
+    Args:
+    - options (argparse.Namespace): Options from get_options().
+    - polls (int): Stop after this many polls (None for no limit).
+    """
+    state = {"queues": {}, "alerts": {}}
+    stop_at = time.monotonic() + options.monitor_duration if options.monitor_duration else None
+    logger.info(
+        f"Monitoring {options.rabbitmq_host}:{options.management_port} every {options.monitor_interval} s. "
+        "Press Ctrl+C to stop."
+    )
+    count = 0
+    try:
+        while True:
+            when = time.monotonic()
+            try:
+                depths, nodes = fetch_broker_state(options)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"WARNING: Could not read the management API: {e}")
+            else:
+                started, cleared = update_monitor(state, when, depths, nodes, options.monitor_growth_alert)
+                logger.info(
+                    f"{datetime.datetime.now().strftime('%H:%M:%S')} {len(depths)} queues, "
+                    f"{sum(depths.values())} messages waiting, {len(nodes)} nodes, {len(state['alerts'])} alerts."
+                )
+                for text in started:
+                    logger.warning(f"ALERT: {text}.")
+                    emit_record("check", "rabbitmq_monitor", "warning", message=f"ALERT: {text}.")
+                for text in cleared:
+                    logger.info(f"CLEARED: {text}.")
+                    emit_record("check", "rabbitmq_monitor", "success", message=f"CLEARED: {text}.")
+            count += 1
+            if (polls is not None and count >= polls) or (stop_at is not None and time.monotonic() >= stop_at):
+                break
+            wait = options.monitor_interval - (time.monotonic() - when)
+            if stop_at is not None:
+                wait = min(wait, stop_at - time.monotonic())
+            time.sleep(max(0.0, wait))
+    except KeyboardInterrupt:
+        pass
+    logger.info("Stopped monitoring.")
 
 
 def get_rabbitmq_start_command():
@@ -131,34 +1482,164 @@ def get_rabbitmq_start_command():
         return None
 
 
-def check_and_log_rabbitmq_status():
+def get_options(argv=None):
+    """
+    Reads the RabbitMQ diagnostic's options from the command line.
+
+    Options meant for other diagnostics are ignored.
+
+    Returns:
+    - argparse.Namespace: The options.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--rabbitmq-host", default=RABBITMQ_HOST)
+    parser.add_argument("--rabbitmq-port", type=int, default=RABBITMQ_PORT)
+    parser.add_argument("--connect-timeout-ms", type=int, default=CONNECT_TIMEOUT_MS)
+    parser.add_argument("--handshake-timeout-ms", type=int, default=HANDSHAKE_TIMEOUT_MS)
+    parser.add_argument("--rabbitmq-login", action="store_true", help="also log in to RabbitMQ")
+    parser.add_argument("--deep", action="store_true", help="also run rabbitmqctl status")
+    parser.add_argument("--probe-endpoints", action="store_true", help="measure connect latency to each endpoint")
+    parser.add_argument(
+        "--rabbitmq-nodes", default="", help="comma-separated cluster hosts (host, host:port or [IPv6]:port)"
+    )
+    parser.add_argument("--rabbitmq-ports", default=",".join(map(str, RABBITMQ_PORTS)))
+    parser.add_argument("--endpoint-samples", type=int, default=ENDPOINT_SAMPLES)
+    parser.add_argument("--rabbitmq-benchmark", action="store_true", help="time publishing and consuming messages")
+    parser.add_argument("--benchmark-messages", type=int, default=BENCHMARK_MESSAGES)
+    parser.add_argument("--benchmark-size", type=int, default=BENCHMARK_MESSAGE_BYTES)
+    parser.add_argument("--benchmark-min-rate", type=int, default=BENCHMARK_MIN_RATE)
+    parser.add_argument("--benchmark-max-p99-ms", type=float, default=BENCHMARK_MAX_P99_MS)
+    parser.add_argument("--rabbitmq-monitor", action="store_true", help="keep polling queue depths and node resources")
+    parser.add_argument("--management-port", type=int, default=MANAGEMENT_PORT)
+    parser.add_argument("--monitor-interval", type=float, default=MONITOR_INTERVAL_SECONDS)
+    parser.add_argument("--monitor-duration", type=float, default=0, help="seconds to monitor (0 until Ctrl+C)")
+    parser.add_argument("--monitor-growth-alert", type=float, default=MONITOR_GROWTH_ALERT)
+    parser.add_argument("--rabbitmqctl-timeout", type=float, default=RABBITMQCTL_TIMEOUT_SECONDS)
+    parser.add_argument("--rabbitmq-username", default=RABBITMQ_USERNAME)
+    parser.add_argument("--rabbitmq-password", default=RABBITMQ_PASSWORD)
+    options, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return options
+
+
+def log_rabbitmqctl_status(installation, timeout=RABBITMQCTL_TIMEOUT_SECONDS):
+    """Runs rabbitmqctl status (deep mode) and logs what it reports."""
+    if not installation["rabbitmqctl"]:
+        message = "SKIPPED: rabbitmqctl was not found, so its status could not be read."
+        logger.info(message)
+        emit_record("check", "rabbitmqctl_status", "skipped", message=message)
+        return
+
+    start = time.perf_counter()
+    status, error = get_rabbitmqctl_status(installation["rabbitmqctl"], timeout)
+    duration_ms = (time.perf_counter() - start) * 1000
+    if error:
+        message = f"WARNING: {error}."
+        logger.warning(message)
+        emit_record("check", "rabbitmqctl_status", "warning", message=message, duration_ms=duration_ms)
+        return
+
+    memory = f"{status['memory_bytes'] / 1024 ** 2:.0f} MB" if isinstance(status["memory_bytes"], (int, float)) else "unknown"
+    erlang = str(status["erlang_version"] or "unknown")
+    if not erlang.startswith("Erlang"):
+        erlang = f"Erlang {erlang}"
+    message = (
+        f"RabbitMQ node {status['node'] or 'unknown'}: version {status['version'] or 'unknown'} "
+        f"on {erlang}, memory {memory}.\n"
+        f"Listeners: {', '.join(status['listeners']) or 'none'}."
+    )
+    if status["alarms"]:
+        message += f"\nWARNING: Alarms: {', '.join(map(str, status['alarms']))}."
+    logger.info(message)
+    result_status = "warning" if status["alarms"] else "success"
+    emit_record("check", "rabbitmqctl_status", result_status, value=status, message=message, duration_ms=duration_ms)
+
+
+def check_and_log_rabbitmq_status(options=None):
     """Check and log RabbitMQ status."""
-    installed = is_rabbitmq_installed()
-    logging.info(DIVIDER)
+    if options is None:
+        options = get_options([])
+    start = time.perf_counter()
+    installation = find_rabbitmq_installation()
+    duration_ms = (time.perf_counter() - start) * 1000
+    logger.info(DIVIDER)
 
-    if not installed:
-        logging.error("ERROR: RabbitMQ is NOT installed. Please install RabbitMQ.")
+    if not installation["installed"]:
+        message = "ERROR: RabbitMQ is NOT installed. Please install RabbitMQ."
+        logger.error(message)
+        emit_record("check", "rabbitmq_installed", "error", value=installation, message=message, duration_ms=duration_ms)
+        emit_record("check", "rabbitmq_running", "skipped", message="SKIPPED: RabbitMQ is not installed.")
         return
 
-    logging.info("Yay! RabbitMQ is installed.")
-    if not is_rabbitmq_running():
-        logging.warning("RabbitMQ is NOT running. Please start RabbitMQ.")
+    message = "Yay! RabbitMQ is installed."
+    logger.info(message)
+    details = [f"found by {installation['found_by']}"]
+    if installation["version"]:
+        details.append(f"version {installation['version']}")
+    if installation["rabbitmqctl"]:
+        details.append(f"rabbitmqctl at {installation['rabbitmqctl']}")
+    logger.info(f"RabbitMQ: {', '.join(details)}.")
+    emit_record("check", "rabbitmq_installed", "success", value=installation, message=message, duration_ms=duration_ms)
+
+    if options.deep:
+        log_rabbitmqctl_status(installation, options.rabbitmqctl_timeout)
+
+    start = time.perf_counter()
+    probe = probe_rabbitmq(
+        options.rabbitmq_host,
+        options.rabbitmq_port,
+        options.connect_timeout_ms,
+        options.handshake_timeout_ms,
+        options.rabbitmq_login,
+        options.rabbitmq_username,
+        options.rabbitmq_password,
+    )
+    duration_ms = (time.perf_counter() - start) * 1000
+    address = f"{probe['host']}:{probe['port']}"
+    if probe["broker"]:
+        broker = " ".join(str(part) for part in (probe["product"] or "RabbitMQ", probe["version"]) if part)
+        message = f"Yay! {broker} is running at {address} (connected in {probe['latency_ms']:.0f} ms)."
+        logger.info(message)
+        if probe["logged_in"] is False:
+            message = f"WARNING: RabbitMQ is running, but logging in failed: {probe['error']}"
+            logger.warning(message)
+        elif probe["logged_in"]:
+            logger.info("Yay! Logged in to RabbitMQ.")
+        status = "warning" if probe["logged_in"] is False else "success"
+        emit_record("check", "rabbitmq_running", status, value=probe, message=message, duration_ms=duration_ms)
+    else:
+        message = "RabbitMQ is NOT running. Please start RabbitMQ."
+        emit_record("check", "rabbitmq_running", "warning", value=probe, message=message, duration_ms=duration_ms)
+        logger.warning(message)
+        logger.info(f"Checked {address}: {probe['error']}.")
         start_command = get_rabbitmq_start_command()
         if start_command:
-            logging.info(f"Try the following command: {start_command}")
+            logger.info(f"Try the following command: {start_command}")
         else:
-            logging.error("Platform not recognized.")
+            logger.error("Platform not recognized.")
 
 
 def run_diagnostic_rabbitmq():
     """Function to run the main diagnostic checks."""
-    logging.info(DIVIDER)
-    logging.info("Welcome to NW Diagnostics!")
-    logging.info(
+    setup_report_sink()
+    open_record_stream()
+    logger.info(DIVIDER)
+    logger.info("Welcome to NW Diagnostics!")
+    logger.info(
         f"At: {datetime.date.today()} at {datetime.datetime.now().strftime('%I:%M %p')}"
     )
-    check_and_log_rabbitmq_status()
-    logging.info(DIVIDER)
+    options = get_options()
+    check_and_log_rabbitmq_status(options)
+    if options.probe_endpoints:
+        logger.info(DIVIDER)
+        log_endpoint_probes(options)
+    if options.rabbitmq_benchmark:
+        logger.info(DIVIDER)
+        log_publish_benchmark(options)
+    if options.rabbitmq_monitor:
+        logger.info(DIVIDER)
+        monitor_rabbitmq(options)
+    logger.info(DIVIDER)
+    close_record_stream()
 
 # ---------------------------------------------------------------------------
 # If this is the script we are running, then call some functions and execute code!
@@ -0,0 +1,72 @@
+"""Tests for the code cache shared by the 00_check_*.py launchers."""
+
+import importlib.util
+import os
+import pathlib
+import subprocess
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+LAUNCHER_PATH = ROOT / "00_check_core.py"
+
+STORE_SCRIPT = """
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location("launcher", sys.argv[1])
+launcher = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(launcher)
+for i in range(20):
+    url = f"https://example.invalid/{sys.argv[2]}/{i}.py"
+    launcher.store_cached_code(url, url.encode("utf-8"), {})
+"""
+
+
+def load_launcher(cache_dir, monkeypatch):
+    monkeypatch.setenv("NW_DIAGNOSTICS_CACHE_DIR", str(cache_dir))
+    spec = importlib.util.spec_from_file_location("launcher_core", LAUNCHER_PATH)
+    launcher = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(launcher)
+    return launcher
+
+
+def test_launchers_sharing_a_cache_keep_each_others_entries(tmp_path, monkeypatch):
+    env = dict(os.environ, NW_DIAGNOSTICS_CACHE_DIR=str(tmp_path))
+    processes = [
+        subprocess.Popen([sys.executable, "-c", STORE_SCRIPT, str(LAUNCHER_PATH), name], env=env)
+        for name in ("a", "b", "c")
+    ]
+    assert all(process.wait(timeout=60) == 0 for process in processes)
+
+    launcher = load_launcher(tmp_path, monkeypatch)
+    index = launcher.load_cache_index()
+    assert len(index) == 60
+    assert all(launcher.read_cached_code(entry) is not None for entry in index.values())
+    assert not os.path.exists(launcher.get_cache_index_path() + ".lock")
+
+
+def test_eviction_keeps_unreferenced_files_newer_than_the_index(tmp_path, monkeypatch):
+    launcher = load_launcher(tmp_path, monkeypatch)
+    launcher.store_cached_code("https://example.invalid/a.py", b"a = 1\n", {})
+    index_time = launcher.get_cache_index_time()
+
+    old_path = launcher.get_cached_code_path("0" * 64)
+    new_path = launcher.get_cached_code_path("1" * 64)
+    for path in (old_path, new_path):
+        pathlib.Path(path).write_bytes(b"")
+    os.utime(old_path, (index_time - 10, index_time - 10))
+    os.utime(new_path, (index_time + 10, index_time + 10))
+
+    launcher.evict_cache_entries(launcher.load_cache_index(), index_time)
+    assert not os.path.exists(old_path)
+    assert os.path.exists(new_path)
+
+
+def test_stale_lock_file_is_taken_over(tmp_path, monkeypatch):
+    launcher = load_launcher(tmp_path, monkeypatch)
+    lock_path = launcher.get_cache_index_path() + ".lock"
+    pathlib.Path(lock_path).write_bytes(b"")
+    stale = time.time() - launcher.CACHE_LOCK_STALE_SECONDS - 1
+    os.utime(lock_path, (stale, stale))
+
+    launcher.store_cached_code("https://example.invalid/a.py", b"a = 1\n", {})
+    assert "https://example.invalid/a.py" in launcher.load_cache_index()
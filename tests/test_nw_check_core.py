@@ -0,0 +1,38 @@
+"""Tests for basic/nw_check_core.py."""
+
+import pathlib
+
+CORE_PATH = pathlib.Path(__file__).resolve().parent.parent / "basic" / "nw_check_core.py"
+
+
+def exec_like_old_launcher():
+    """Runs the module the way older 00_check_core.py launchers do."""
+    launcher_globals = {"__name__": "__main__", "__file__": str(CORE_PATH)}
+    namespace = {}
+    exec(CORE_PATH.read_text(encoding="utf-8"), launcher_globals, namespace)
+    for key in list(namespace.keys()):
+        launcher_globals[key] = namespace[key]
+    return launcher_globals
+
+
+def test_system_facts_under_old_launcher_exec():
+    module = exec_like_old_launcher()
+    facts = module["system_facts"]
+    for name in module["SYSTEM_FACT_LOOKUPS"]:
+        assert getattr(facts, name) == module["get_system_fact"](name)
+    assert facts.python_version == module["platform"].python_version()
+
+
+def test_system_facts_are_looked_up_once():
+    module = exec_like_old_launcher()
+    calls = []
+    module["SYSTEM_FACT_LOOKUPS"]["machine"] = lambda: calls.append(1) or "test-machine"
+    facts = module["system_facts"]
+    assert facts.machine == "test-machine"
+    assert facts.machine == "test-machine"
+    assert calls == [1]
+
+
+def test_unknown_fact_raises_attribute_error():
+    facts = exec_like_old_launcher()["system_facts"]
+    assert not hasattr(facts, "no_such_fact")
@@ -0,0 +1,109 @@
+"""Tests for environment/nw_check_env.py."""
+
+import importlib.util
+import pathlib
+
+import pytest
+
+ENV_PATH = pathlib.Path(__file__).resolve().parent.parent / "environment" / "nw_check_env.py"
+spec = importlib.util.spec_from_file_location("nw_check_env", ENV_PATH)
+nw_check_env = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(nw_check_env)
+
+MARKER_ENVIRONMENT = {
+    "implementation_name": "cpython",
+    "implementation_version": "3.11.7",
+    "os_name": "posix",
+    "platform_machine": "x86_64",
+    "platform_python_implementation": "CPython",
+    "platform_release": "6.18.44-fc-v130",
+    "platform_system": "Linux",
+    "platform_version": "#1 SMP",
+    "python_full_version": "3.11.7",
+    "python_version": "3.11",
+    "sys_platform": "linux",
+    "extra": "",
+}
+
+
+@pytest.mark.parametrize(
+    "installed, specifier, expected",
+    [
+        ("2.31.0", ">=2.0", True),
+        ("1.9", ">=2.0", False),
+        ("2.0", "==2.0.0", True),
+        ("2.0+cpu", "==2.0", True),
+        ("2.0+cpu", "==2.0+gpu", False),
+        ("2.0.1", "!=2.0.*", False),
+        ("2.1", "==2.*", True),
+        ("2.2.1", "~=2.2", True),
+        ("3.0", "~=2.2", False),
+        ("2.2.1", "~=2.2.0", True),
+        ("2.3", "~=2.2.0", False),
+        ("1.0.post1", ">1.0", False),
+        ("1.0+local", ">1.0", False),
+        ("1.0.post2", ">1.0.post1", True),
+        ("1.0.post1+local", ">1.0.post1", False),
+        ("2.0.0+cpu", ">2.0.0rc1", True),
+        ("1.0.post1", ">1.0a1", True),
+        ("1.0.post1.dev1", ">1.0", False),
+        ("1.0rc1", "<1.0", False),
+        ("1.0.dev1", "<1.0", False),
+        ("1.0rc1.post1", "<1.0", False),
+        ("1.0.dev1", "<1.0rc1", True),
+        ("1.0a1", "<1.0.post1", True),
+        ("1.0.post1.dev1", "<1.0.post1", False),
+        ("0.9", "<1.0", True),
+        ("1!1.0", ">2.0", True),
+        ("1.0", "<=1.0", True),
+        ("1.0.post1", "<=1.0", False),
+        ("1.0-custom", "===1.0-custom", True),
+        ("not a version", ">=1.0", False),
+    ],
+)
+def test_version_satisfies(installed, specifier, expected):
+    match = nw_check_env.SPECIFIER_PATTERN.match(specifier)
+    compiled = nw_check_env.compile_specifier(match.group(1), match.group(2))
+    assert nw_check_env.version_satisfies(installed, [compiled]) is expected
+
+
+@pytest.mark.parametrize(
+    "marker, expected",
+    [
+        ('sys_platform == "linux"', True),
+        ('sys_platform == "win32"', False),
+        ('os_name != "nt"', True),
+        ('python_version >= "3.8"', True),
+        ('python_version < "3.10"', False),
+        ('python_full_version > "3.11.6"', True),
+        ('platform_release >= "5.10"', True),
+        ('platform_release < "5.10"', False),
+        ('platform_system in "Linux Darwin"', True),
+        ('"arm" not in platform_machine', True),
+        ('sys_platform == "win32" or python_version >= "3.8"', True),
+        ('sys_platform == "linux" and python_version < "3"', False),
+        ('(sys_platform == "win32" or os_name == "posix") and extra == ""', True),
+    ],
+)
+def test_evaluate_marker(monkeypatch, marker, expected):
+    monkeypatch.setattr(nw_check_env, "get_marker_environment", lambda: MARKER_ENVIRONMENT)
+    nw_check_env.evaluate_marker.cache_clear()
+    assert nw_check_env.evaluate_marker(marker) is expected
+    nw_check_env.evaluate_marker.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "marker",
+    ['sys_platform ==', 'unknown_variable == "x"', '(sys_platform == "linux"', 'python_version ~= "x"'],
+)
+def test_evaluate_marker_rejects_invalid_markers(monkeypatch, marker):
+    monkeypatch.setattr(nw_check_env, "get_marker_environment", lambda: MARKER_ENVIRONMENT)
+    nw_check_env.evaluate_marker.cache_clear()
+    with pytest.raises(ValueError):
+        nw_check_env.evaluate_marker(marker)
+    nw_check_env.evaluate_marker.cache_clear()
+
+def test_get_changed_distributions_keeps_dotted_names():
+    old = {"/site/zope.interface-5.4.0.dist-info": 1}
+    new = {"/site/zope.interface-6.0.dist-info": 2, "/site/PyYAML-6.0.1.dist-info": 3}
+    assert nw_check_env.get_changed_distributions(old, new) == {"zope-interface", "pyyaml"}
@@ -0,0 +1,45 @@
+"""Tests for external/nw_check_rabbitmq.py."""
+
+import importlib.util
+import pathlib
+
+import pytest
+
+RABBITMQ_PATH = pathlib.Path(__file__).resolve().parent.parent / "external" / "nw_check_rabbitmq.py"
+spec = importlib.util.spec_from_file_location("nw_check_rabbitmq", RABBITMQ_PATH)
+nw_check_rabbitmq = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(nw_check_rabbitmq)
+
+
+@pytest.mark.parametrize(
+    "node, endpoints, invalid",
+    [
+        ("rabbit1", [("rabbit1", 5672), ("rabbit1", 15672)], []),
+        ("rabbit1:5673", [("rabbit1", 5673)], []),
+        ("[::1]:5672", [("::1", 5672)], []),
+        ("[::1]", [("::1", 5672), ("::1", 15672)], []),
+        ("::1", [("::1", 5672), ("::1", 15672)], []),
+        ("  ", [], []),
+        ("rabbit1:amqp", [], ["rabbit1:amqp"]),
+        ("rabbit1:70000", [], ["rabbit1:70000"]),
+        ("rabbit1:", [], ["rabbit1:"]),
+        (":5672", [], [":5672"]),
+        ("[::1]5672", [], ["[::1]5672"]),
+        ("[::1", [], ["[::1"]),
+    ],
+)
+def test_get_endpoints(node, endpoints, invalid):
+    assert nw_check_rabbitmq.get_endpoints([node], [5672, 15672]) == (endpoints, invalid)
+
+
+@pytest.mark.parametrize(
+    "text, ports, invalid",
+    [
+        ("5672,15672", [5672, 15672], []),
+        (" 5672 , ", [5672], []),
+        ("5672,amqp", [5672], ["amqp"]),
+        ("0,65536", [], ["0", "65536"]),
+    ],
+)
+def test_get_ports(text, ports, invalid):
+    assert nw_check_rabbitmq.get_ports(text) == (ports, invalid)
@@ -0,0 +1,39 @@
+"""Tests for util_logger.py."""
+
+import os
+import signal
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import util_logger  # noqa: E402
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="SIGUSR1 is not available")
+def test_sigusr1_dumps_every_flight_recorder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "excepthook", sys.excepthook)
+    monkeypatch.setattr(threading, "excepthook", threading.excepthook)
+    previous_handler = signal.getsignal(signal.SIGUSR1)
+    try:
+        first, first_log = util_logger.setup_logger("flight_a.py", flight_recorder=10)
+        second, second_log = util_logger.setup_logger("flight_b.py", flight_recorder=10)
+        first.debug("first buffered line")
+        second.debug("second buffered line")
+        os.kill(os.getpid(), signal.SIGUSR1)
+        for handler in first.handlers + second.handlers:
+            handler.flush()
+        assert "first buffered line" in first_log.read_text()
+        assert "second buffered line" in second_log.read_text()
+    finally:
+        signal.signal(signal.SIGUSR1, previous_handler)
+        for name in ("flight_a", "flight_b"):
+            logger, _ = util_logger.loggers.pop(name)
+            for handler in list(logger.handlers):
+                if handler in util_logger.flight_recorders:
+                    util_logger.flight_recorders.remove(handler)
+                logger.removeHandler(handler)
+                handler.close()
@@ -31,22 +31,16 @@ run the following command:
 # Import from Python Standard Library
 
 import datetime
+import functools
 import os
 import platform
-import shutil
 import sys
 
 # Declare program constants (typically constants are named with ALL_CAPS)
 
 DIVIDER = "=" * 70  # A string divider for cleaner output formatting
 OUTPUT_FILENAME = "util_about.txt"  # File name for saving the info
-
-# Retrieve additional system information using platform and os modules
-
-build_date, compiler = platform.python_build()
-implementation = platform.python_implementation()
-architecture = platform.architecture()[0]
-user_home = os.path.expanduser("~")
+SHADOWED_COMMANDS = ["python", "python3", "pip", "pip3", "git"]  # Reported when found more than once on PATH
 
 # Define program functions (bits of reusable code)
 
@@ -86,6 +80,112 @@ def get_source_directory_path():
     return dir
 
 
+# Tools are looked up in an index of every file on PATH, built once per run,
+# instead of walking PATH again for each tool.
+
+
+def get_executable_extensions():
+    """
+    Returns the file extensions that make a file runnable on Windows, in
+    the order they are tried, or None on other systems.
+    """
+    if os.name != "nt":
+        return None
+    pathext = os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD")
+    return [extension.lower() for extension in pathext.split(os.pathsep) if extension]
+
+
+@functools.lru_cache(maxsize=None)
+def get_path_index():
+    """
+    Lists the files in every PATH folder, once per run.
+
+    On Windows, only files with a PATHEXT extension are kept, under both
+    their full name ("git.exe") and the command name ("git"). Names are
+    lower case there, as lookups are not case sensitive.
+
+    Returns:
+    - dict: Command name -> list of paths, in the order they are found on PATH.
+    """
+    extensions = get_executable_extensions()
+    index = {}
+    folders_seen = set()
+    for folder in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        folder = folder.strip('"')  # Windows allows quoted PATH entries
+        if not folder:
+            continue
+        folder_key = os.path.normcase(os.path.abspath(folder))
+        if folder_key in folders_seen:
+            continue  # The same folder listed twice on PATH
+        folders_seen.add(folder_key)
+        try:
+            with os.scandir(folder) as entries:
+                names = [entry.name for entry in entries]
+        except OSError:
+            continue  # Missing or unreadable folder
+
+        if extensions is None:
+            for name in names:
+                index.setdefault(name, []).append(os.path.join(folder, name))
+            continue
+        found = []
+        for name in names:
+            stem, extension = os.path.splitext(name.lower())
+            if extension in extensions:
+                found.append((extensions.index(extension), stem, name))
+        for rank, stem, name in sorted(found):  # git.com runs before git.exe
+            path = os.path.join(folder, name)
+            index.setdefault(name.lower(), []).append(path)
+            index.setdefault(stem, []).append(path)
+    return index
+
+
+def is_executable_file(path):
+    """Returns True if path is a file this user can run."""
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def find_executable(command):
+    """
+    Finds the file that runs for a command, like shutil.which().
+
+    Args:
+    - command (str): The command name, e.g. "git".
+
+    Returns:
+    - str: The full path, or None if the command is not on PATH.
+    """
+    key = command.lower() if os.name == "nt" else command
+    for path in get_path_index().get(key, []):
+        if is_executable_file(path):
+            return path
+    return None
+
+
+def get_executable_paths(command):
+    """
+    Lists every copy of a command on PATH. The first one is the one that
+    runs; the others are shadowed by it. Links to the same file count once.
+
+    Args:
+    - command (str): The command name, e.g. "python3".
+
+    Returns:
+    - list: Full paths, in PATH order.
+    """
+    key = command.lower() if os.name == "nt" else command
+    paths = []
+    real_paths = set()
+    for path in get_path_index().get(key, []):
+        if not is_executable_file(path):
+            continue
+        real_path = os.path.normcase(os.path.realpath(path))
+        if real_path not in real_paths:
+            real_paths.add(real_path)
+            paths.append(path)
+    return paths
+
+
 def is_git_in_path():
     """
     Checks if git is available in the PATH.
@@ -93,7 +193,7 @@ def is_git_in_path():
     Returns:
     - bool: True if git is in the PATH, otherwise False.
     """
-    return shutil.which("git") is not None
+    return find_executable("git") is not None
 
 
 def get_preferred_command():
@@ -116,10 +216,73 @@ def is_preferred_command_available():
     - tuple: (str: Preferred command name, bool: Availability in PATH)
     """
     preferred_command = get_preferred_command()
-    is_available = shutil.which(preferred_command) is not None
+    is_available = find_executable(preferred_command) is not None
     return is_available
 
 
+def get_shadowed_commands(commands=SHADOWED_COMMANDS):
+    """
+    Finds commands with more than one copy on PATH, e.g. two python3.
+
+    Returns:
+    - dict: Command -> list of paths, in PATH order, for each shadowed command.
+    """
+    shadowed = {}
+    for command in commands:
+        paths = get_executable_paths(command)
+        if len(paths) > 1:
+            shadowed[command] = paths
+    return shadowed
+
+
+def get_shadowed_commands_text():
+    """Returns the shadowed commands as one line, or "None"."""
+    shadowed = get_shadowed_commands()
+    if not shadowed:
+        return "None"
+    return "; ".join(f"{command} ({', '.join(paths)})" for command, paths in shadowed.items())
+
+
+SYSTEM_FACT_LOOKUPS = {
+    "operating_system": lambda: f"{os.name} {platform.system()} {platform.release()}",
+    "architecture": lambda: platform.architecture()[0],
+    "cpu_count": lambda: os.cpu_count(),
+    "machine": lambda: platform.machine(),
+    "python_version": lambda: platform.python_version(),
+    "python_build": lambda: " with ".join(platform.python_build()),
+    "python_implementation": lambda: platform.python_implementation(),
+    "source_directory": lambda: get_source_directory_path(),
+    "home_directory": lambda: os.path.expanduser("~"),
+    "terminal": lambda: get_terminal_info(),  # (environment, shell)
+    "preferred_command": lambda: get_preferred_command(),
+    "preferred_command_available": lambda: is_preferred_command_available(),
+    "git_in_path": lambda: is_git_in_path(),
+    "shadowed_commands": lambda: get_shadowed_commands_text(),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_system_fact(name):
+    """Looks up one system fact, e.g. "python_version", the first time it is asked for."""
+    return SYSTEM_FACT_LOOKUPS[name]()
+
+
+class SystemFacts:
+    """
+    Facts about this machine and Python, each looked up on first access
+    and then kept, so importing this file does no work. Kept in step with
+    the copy in basic/nw_check_core.py.
+    """
+
+    def __getattr__(self, name):
+        if name not in SYSTEM_FACT_LOOKUPS:
+            raise AttributeError(name)
+        return get_system_fact(name)
+
+
+system_facts = SystemFacts()
+
+
 def print_info_to_file(filename, content):
     """
     Print the provided content to a specified file.
@@ -143,33 +306,35 @@ def get_header(fn):
     - str: Formatted debug information.
     """
 
-    environment, current_shell = get_terminal_info()
+    environment, current_shell = system_facts.terminal
+    preferred_command = system_facts.preferred_command
 
     return f"""
 {DIVIDER}
 {DIVIDER}
  Welcome to the NW Python Debugging Information Utility!
  Date and Time: {datetime.date.today()} at {datetime.datetime.now().strftime("%I:%M %p")}
- Operating System: {os.name} {platform.system()} {platform.release()}
- System Architecture: {architecture}
- Number of CPUs: {os.cpu_count()}
- Machine Type: {platform.machine()}
- Python Version: {platform.python_version()}
- Python Build Date and Compiler: {build_date} with {compiler}
- Python Implementation: {implementation}
+ Operating System: {system_facts.operating_system}
+ System Architecture: {system_facts.architecture}
+ Number of CPUs: {system_facts.cpu_count}
+ Machine Type: {system_facts.machine}
+ Python Version: {system_facts.python_version}
+ Python Build Date and Compiler: {system_facts.python_build}
+ Python Implementation: {system_facts.python_implementation}
  Active pip environment:   {os.environ.get('PIP_DEFAULT_ENV', 'None')}
  Active conda environment: {os.environ.get('PIP_DEFAULT_ENV', 'None')}
  Path to Interpreter:         {sys.executable}
  Path to virtual environment: {sys.prefix}
  Current Working Directory:   {os.getcwd()}
- Path to source directory:    {get_source_directory_path()}
+ Path to source directory:    {system_facts.source_directory}
  Path to script file:         {fn}
- User's Home Directory:       {user_home}
+ User's Home Directory:       {system_facts.home_directory}
  Terminal Environment:        {environment}
  Terminal Type:               {current_shell}
- Preferred command:           {get_preferred_command()}
- Is {get_preferred_command()} available in PATH:   {is_preferred_command_available()}
- Is git available in PATH:      {is_git_in_path()} 
+ Preferred command:           {preferred_command}
+ Is {preferred_command} available in PATH:   {system_facts.preferred_command_available}
+ Is git available in PATH:      {system_facts.git_in_path} 
+ Shadowed on PATH:            {system_facts.shadowed_commands}
 {DIVIDER}
 {DIVIDER}
 """
@@ -30,6 +30,22 @@ In your code file, instead of print(), use logger.info().
 
 Levels include: debug, info, warning, error, and critical.
 
+Calling setup_logger() again for the same file returns the same logger.
+Log lines are written by a background thread, so logging stays fast.
+
+To keep the log between runs, rotate it by size or by time, optionally
+compressing old logs with gzip:
+
+  logger, logname = setup_logger(__file__, max_bytes=1_000_000, compress=True)
+  logger, logname = setup_logger(__file__, when="midnight", backup_count=7)
+
+To keep detailed logs only when something goes wrong, use flight recorder
+mode. The last N debug and info records are kept in memory and written to
+the log only on a warning or error, an unhandled exception, or (on macOS
+and Linux) the SIGUSR1 signal:
+
+  logger, logname = setup_logger(__file__, flight_recorder=1000)
+
 @Author: Denise Case
 @Updated: 2021-08
 
@@ -38,61 +54,246 @@ Levels include: debug, info, warning, error, and critical.
 
 # Import some helpful modules from the Python Standard Library
 
+import atexit
+import collections
+import gzip
 import logging
+import logging.handlers
 import pathlib
 import platform
+import queue
+import shutil
+import signal
 import sys
 import os
 import datetime
+import threading
 
 # Declare constants (typically constants are named with ALL_CAPS)
 
 DIVIDER = "=" * 50  # A string divider for cleaner output formatting
 
+# Loggers already set up, by module name: (logger, log file name)
+loggers = {}
+loggers_lock = threading.Lock()
+
+# Flight recorders, all written by one SIGUSR1 handler
+flight_recorders = []
+
 # Define program functions (reusable bits of code)
 
 
-def setup_logger(current_file):
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts log records on a queue as they are.
+
+    The standard QueueHandler formats each message before queueing it.
+    Here the background thread does all formatting, so a logging call
+    costs little more than an enqueue. Arguments passed to the logger
+    should not be changed after the call.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class FlightRecorderHandler(logging.handlers.MemoryHandler):
+    """
+    Keeps the most recent records in memory and writes them all to the
+    target handler when a record at flush_level or above arrives.
+
+    Records are stored as they are (message and arguments), so the cost of
+    formatting is only paid for records that are written.
+
+    flush() does nothing, because logging calls it on every handler at exit
+    and the records should only be written when something went wrong.
+    dump() writes them.
+    """
+
+    def __init__(self, capacity, target, flush_level=logging.WARNING):
+        super().__init__(capacity, flushLevel=flush_level, target=target, flushOnClose=False)
+        self.buffer = collections.deque(maxlen=capacity)  # Oldest records drop off
+
+    def shouldFlush(self, record):
+        return record.levelno >= self.flushLevel
+
+    def emit(self, record):
+        self.buffer.append(record)
+        if self.shouldFlush(record):
+            self.dump()
+
+    def flush(self):
+        pass
+
+    def dump(self):
+        """Writes the kept records to the target handler and forgets them."""
+        self.acquire()
+        try:
+            # Take the records out first: the SIGUSR1 handler can run dump()
+            # again in the middle of this one, in the same thread.
+            records = list(self.buffer)
+            self.buffer.clear()
+            if self.target:
+                for record in records:
+                    self.target.handle(record)
+                self.target.flush()
+        finally:
+            self.release()
+
+
+def dump_flight_recorders(signum=None, frame=None):
+    """Writes every flight recorder's kept records (the SIGUSR1 handler)."""
+    for recorder in list(flight_recorders):
+        recorder.dump()
+
+
+def install_flight_recorder_triggers(logger, recorder):
+    """
+    Write the flight recorder on an unhandled exception or a SIGUSR1 signal.
+    @param logger: the logger that owns the recorder.
+    @param recorder: the FlightRecorderHandler.
+    """
+    previous_excepthook = sys.excepthook
+
+    def log_unhandled_exception(exc_type, exc_value, exc_traceback):
+        if not issubclass(exc_type, KeyboardInterrupt):
+            logger.critical("Unhandled exception", exc_info=(exc_type, exc_value, exc_traceback))
+        previous_excepthook(exc_type, exc_value, exc_traceback)
+
+    sys.excepthook = log_unhandled_exception
+
+    previous_thread_excepthook = threading.excepthook
+
+    def log_unhandled_thread_exception(args):
+        logger.critical(
+            f"Unhandled exception in thread {args.thread.name if args.thread else '?'}",
+            exc_info=(args.exc_type, args.exc_value, args.exc_traceback),
+        )
+        previous_thread_excepthook(args)
+
+    threading.excepthook = log_unhandled_thread_exception
+
+    # One handler writes all recorders, so a later logger does not replace
+    # an earlier one's. Signal handlers can only be set from the main thread.
+    flight_recorders.append(recorder)
+    if (
+        hasattr(signal, "SIGUSR1")
+        and threading.current_thread() is threading.main_thread()
+        and signal.getsignal(signal.SIGUSR1) is not dump_flight_recorders
+    ):
+        signal.signal(signal.SIGUSR1, dump_flight_recorders)
+
+
+def gzip_rotator(source, dest):
+    """Compresses a rotated log file with gzip."""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def gzip_namer(name):
+    """Names rotated log files with a .gz extension."""
+    return name + ".gz"
+
+
+def create_file_handler(log_file_name, max_bytes, when, backup_count, compress, mode="w"):
+    """
+    Create the handler that writes the log file.
+    @param log_file_name: the log file to write.
+    @param max_bytes: rotate the log when it reaches this size (0 for never).
+    @param when: rotate the log at this interval, e.g. "midnight" or "H" (None for never).
+    @param backup_count: the number of rotated logs to keep.
+    @param compress: gzip the rotated logs.
+    @param mode: "w" to start a new log, "a" to add to it (when not rotating).
+    @returns: the handler.
+    """
+    if max_bytes:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file_name, maxBytes=max_bytes, backupCount=backup_count
+        )
+    elif when:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_file_name, when=when, backupCount=backup_count
+        )
+    else:
+        return logging.FileHandler(log_file_name, mode)
+
+    if compress:
+        handler.rotator = gzip_rotator
+        handler.namer = gzip_namer
+    return handler
+
+
+def setup_logger(
+    current_file, max_bytes=0, when=None, backup_count=5, compress=False, flight_recorder=0
+):
     """
     Setup a logger to automatically record useful information.
+    Calling it again for the same file returns the logger already set up.
     @param current_file: the name of the file requesting a logger.
+    @param max_bytes: rotate the log when it reaches this size (0 for never).
+    @param when: rotate the log at this interval, e.g. "midnight" (None for never).
+    @param backup_count: the number of rotated logs to keep.
+    @param compress: gzip the rotated logs.
+    @param flight_recorder: if more than 0, keep this many recent records in
+        memory and only write them to the log on a warning, error, unhandled
+        exception or SIGUSR1. The log is added to instead of replaced.
     @returns: the logger object and the name of the logfile.
     """
-    logs_dir = pathlib.Path("logs")
-    logs_dir.mkdir(exist_ok=True)
-
     module_name = pathlib.Path(current_file).stem
-    log_file_name = logs_dir.joinpath(module_name + ".log")
+    # The lock is held until the logger is ready, so another thread never
+    # gets a logger whose handlers are not attached yet.
+    with loggers_lock:
+        if module_name in loggers:
+            return loggers[module_name]
+
+        logs_dir = pathlib.Path("logs")
+        logs_dir.mkdir(exist_ok=True)
+        log_file_name = logs_dir.joinpath(module_name + ".log")
+
+        logger = logging.getLogger(module_name)
+        logger.setLevel(logging.DEBUG)  # Set the root logger level.
 
-    logger = logging.getLogger(module_name)
-    logger.setLevel(logging.DEBUG)  # Set the root logger level.
+        # Create file handler to write logging messages to a file
+        mode = "a" if flight_recorder else "w"
+        file_handler = create_file_handler(log_file_name, max_bytes, when, backup_count, compress, mode)
+        file_handler.setLevel(logging.DEBUG)
 
-    # Create file handler to write logging messages to a file
-    file_handler = logging.FileHandler(log_file_name, "w")
-    file_handler.setLevel(logging.DEBUG)
+        # Create console handler to write logging messages to the console
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
 
-    # Create console handler to write logging messages to the console
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
+        # Create formatter and add it to the handlers.
+        formatter = logging.Formatter("%(asctime)s.%(name)s.%(levelname)s %(message)s")
+        file_handler.setFormatter(formatter)
+        console_handler.setFormatter(formatter)
 
-    # Create formatter and add it to the handlers.
-    formatter = logging.Formatter("%(asctime)s.%(name)s.%(levelname)s %(message)s")
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+        # Write through a background thread so logging calls only queue records.
+        # In flight recorder mode, the log file is written only by the recorder.
+        background_handlers = [console_handler] if flight_recorder else [file_handler, console_handler]
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            log_queue, *background_handlers, respect_handler_level=True
+        )
+        listener.start()
+        atexit.register(listener.stop)  # Write any queued records before exiting.
+        logger.addHandler(BackgroundQueueHandler(log_queue))
 
-    # Add the handlers to the logger.
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+        if flight_recorder:
+            recorder = FlightRecorderHandler(flight_recorder, file_handler)
+            logger.addHandler(recorder)
+            install_flight_recorder_triggers(logger, recorder)
 
-    python_version_string = platform.python_version()
-    today = datetime.date.today()
+        python_version_string = platform.python_version()
+        today = datetime.date.today()
 
-    logger.info(f"{DIVIDER}")
-    logger.info(f"Today is {today} at {datetime.datetime.now().strftime('%I:%M %p')}")
-    logger.info(f"Running on: {os.name} {platform.system()} {platform.release()}")
-    logger.info(f"Python version:  {python_version_string}")
-    logger.info(f"Python path: {sys.prefix}")
-    logger.info(f"Working dir: {os.getcwd()}")
-    logger.info(f"{DIVIDER}")
+        logger.info(f"{DIVIDER}")
+        logger.info(f"Today is {today} at {datetime.datetime.now().strftime('%I:%M %p')}")
+        logger.info(f"Running on: {os.name} {platform.system()} {platform.release()}")
+        logger.info(f"Python version:  {python_version_string}")
+        logger.info(f"Python path: {sys.prefix}")
+        logger.info(f"Working dir: {os.getcwd()}")
+        logger.info(f"{DIVIDER}")
 
-    return logger, log_file_name
+        loggers[module_name] = (logger, log_file_name)
+        return loggers[module_name]